@@ -8,9 +8,13 @@ import os
 import pickle
 import random
 import re
+import select
+import shlex
 import socket
 import subprocess
-from time import sleep, time
+import threading
+from contextlib import contextmanager
+from time import monotonic, sleep, time
 
 import cryptography
 import paramiko
@@ -19,12 +23,107 @@ import yaml
 from looseversion import LooseVersion
 
 from ceph.parallel import parallel
+from ceph.waiter import WaitUntil
 from cli.ceph.ceph import Ceph as CephCli
 from utility import lvm_utils
+from utility.command_cache import get_command_cache
 from utility.log import Log
 from utility.utils import custom_ceph_config
 
 logger = Log(__name__)
+RECV_SIZE = 32768
+
+# Maximum number of concurrent channels opened on a SSH transport
+SSH_MAX_CHANNELS = 10
+# Maximum time in seconds a command waits for a free channel when it has no timeout
+SSH_CHANNEL_WAIT_TIMEOUT = 600
+# Initial and maximum delay in seconds between SSH connection attempts
+SSH_RECONNECT_DELAY = 2
+SSH_RECONNECT_MAX_DELAY = 30
+
+_SSH_POOL = dict()
+_SSH_POOL_LOCK = threading.Lock()
+
+# TCP keepalive applied on the nodes (applies to both IPv4 and IPv6 on Linux)
+TCP_KEEPALIVE = {"time": 120, "intvl": 60, "probes": 20}
+
+# Applies the connection settings and prints the facts of the node as JSON. The shell
+# variables _sudo, _hostname_opts and _keepalive are prepended by CephNode.gather_facts.
+NODE_FACTS_SCRIPT = r"""
+_json() { printf '%s' "$1" | tr -d '\n' | sed -e 's/\\/\\\\/g' -e 's/"/\\"/g'; }
+_sysctl() { cat "/proc/sys/net/ipv4/tcp_keepalive_$1" 2>/dev/null || echo null; }
+for _opt in $_keepalive; do
+    echo "${_opt#*:}" | $_sudo tee "/proc/sys/net/ipv4/tcp_keepalive_${_opt%%:*}" >/dev/null
+done
+grep -qs 'TMOUT' ~/.bashrc || echo '[[ -z "${TMOUT+x}" ]] && export TMOUT=600' >> ~/.bashrc
+[ -f /etc/redhat-release ] && _pkg_type=rpm || _pkg_type=deb
+printf '{"hostname": "%s", "internal_ip": "%s", "pkg_type": "%s", ' \
+    "$(_json "$(hostname $_hostname_opts)")" \
+    "$(_json "$(/sbin/ifconfig eth0 2>/dev/null | grep 'inet ' | awk '{ print $2}')")" \
+    "$_pkg_type"
+printf '"distro": {"id": "%s", "version_id": "%s", "name": "%s"}, "kernel": "%s", ' \
+    "$(_json "$(. /etc/os-release 2>/dev/null; echo "$ID")")" \
+    "$(_json "$(. /etc/os-release 2>/dev/null; echo "$VERSION_ID")")" \
+    "$(_json "$(. /etc/os-release 2>/dev/null; echo "$PRETTY_NAME")")" \
+    "$(_json "$(uname -r)")"
+printf '"keepalive": {"time": %s, "intvl": %s, "probes": %s}}\n' \
+    "$(_sysctl time)" "$(_sysctl intvl)" "$(_sysctl probes)"
+"""
+
+
+# Idempotent steps bootstrapping a OneCloud node, executed in a single SSH session.
+# The public key is available in the script as $_key.
+ONECLOUD_BOOTSTRAP_STEPS = [
+    (
+        "create_user",
+        "id cephuser >/dev/null 2>&1 || (sudo groupadd -f cephuser && "
+        "sudo useradd -m -s /bin/bash -g cephuser cephuser)",
+    ),
+    (
+        "sudoers",
+        "echo 'cephuser ALL=(ALL) NOPASSWD:ALL' | sudo tee /etc/sudoers.d/cephuser "
+        "&& sudo chmod 440 /etc/sudoers.d/cephuser",
+    ),
+    (
+        "cephuser_authorized_keys",
+        "sudo mkdir -p /home/cephuser/.ssh && sudo chmod 700 /home/cephuser/.ssh && "
+        '(sudo grep -qxF "$_key" /home/cephuser/.ssh/authorized_keys 2>/dev/null || '
+        'echo "$_key" | sudo tee -a /home/cephuser/.ssh/authorized_keys) && '
+        "sudo chmod 600 /home/cephuser/.ssh/authorized_keys && "
+        "sudo chown -R cephuser:cephuser /home/cephuser/.ssh",
+    ),
+    (
+        "root_authorized_keys",
+        "sudo mkdir -p /root/.ssh && sudo chmod 700 /root/.ssh && "
+        '(sudo grep -qxF "$_key" /root/.ssh/authorized_keys 2>/dev/null || '
+        'echo "$_key" | sudo tee -a /root/.ssh/authorized_keys) && '
+        "sudo chmod 600 /root/.ssh/authorized_keys",
+    ),
+    (
+        "permit_root_login",
+        "for _conf in /etc/ssh/sshd_config.d/00-complianceascode-hardening.conf "
+        "/etc/ssh/sshd_config; do sudo sed -i "
+        "'s/^.*PermitRootLogin.*/PermitRootLogin prohibit-password/' $_conf "
+        "2>/dev/null; done; true",
+    ),
+    (
+        "restart_sshd",
+        "sudo systemctl restart sshd 2>/dev/null || "
+        "sudo systemctl restart ssh 2>/dev/null || true",
+    ),
+    ("ready_marker", "sudo touch /ceph-qa-ready"),
+]
+
+# Runs every step and prints its name, exit code, duration in ms and base64 output
+ONECLOUD_BOOTSTRAP_RUNNER = r"""
+_run() {
+    _start=$(date +%s%3N)
+    _out=$(eval "$2" 2>&1)
+    _rc=$?
+    printf 'STEP\t%s\t%s\t%s\t%s\n' "$1" "$_rc" "$(( $(date +%s%3N) - _start ))" \
+        "$(printf '%s' "$_out" | base64 | tr -d '\n')"
+}
+"""
 
 
 class SocketTimeoutException(Exception):
@@ -719,13 +818,17 @@ class Ceph(object):
                 else self.get_ceph_object("mon")
             )
 
-        timeout = datetime.timedelta(seconds=timeout)
-        starttime = datetime.datetime.now()
         pending_states = ["peering", "activating", "creating"]
         valid_states = ["active+clean"]
 
         out = str()
-        while datetime.datetime.now() - starttime <= timeout:
+        for w in WaitUntil(
+            timeout=timeout,
+            interval=5,
+            backoff=1.5,
+            max_interval=30,
+            name="check_health",
+        ):
             cmd = "ceph -s"
             if cluster_name is not None:
                 cmd += f" --cluster {cluster_name}"
@@ -737,7 +840,15 @@ class Ceph(object):
             if not any(state in out for state in pending_states):
                 if all(state in out for state in valid_states):
                     break
-            sleep(5)
+
+            # Poll often while the PG states are changing
+            w.progress(
+                [
+                    line.strip()
+                    for line in out.splitlines()
+                    if any(state in line for state in pending_states + valid_states)
+                ]
+            )
         logger.info(out)
         if not all(state in out for state in valid_states):
             logger.error("Valid States are not found in the health check")
@@ -1183,42 +1294,95 @@ def check_timeout(end_time, timeout):
         raise TimeoutException("Command exceed the allocated execution time.")
 
 
-def read_stream(channel, end_time, timeout, stderr=False, log=True):
-    """Reads the data from the given channel.
+def read_channel(channel, end_time, timeout, log=True, line_callback=None):
+    """Reads stdout and stderr of the given channel until the command exits.
+
+    The method waits on the channel instead of polling, hence it returns as
+    soon as the remote command completes. The data is collected as a list of
+    chunks and decoded once at the end.
 
     Args:
       channel: the paramiko.Channel object to be used for reading.
       end_time: maximum allocated time for reading from the channel.
       timeout: Flag to check if timeout must be enforced.
-      stderr: read from the stderr stream. Default is False.
       log: log the output. Default is True.
+      line_callback: method invoked with every line and a stderr flag.
 
     Returns:
-      a string with the data read from the channel.
+      a tuple of strings with the stdout and stderr data read from the channel.
 
     Raises:
       TimeoutException: if reading from the channel exceeds the allocated time.
     """
-    _output = bytearray()
-    _stream = channel.recv_stderr if stderr else channel.recv
-    _decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
-
-    _data = _stream(2048)
-    while _data:
-        _output.extend(_data)
-        if log:
-            for _ln in _data.splitlines():
+    streams = [
+        (False, channel.recv_ready, channel.recv, []),
+        (True, channel.recv_stderr_ready, channel.recv_stderr, []),
+    ]
+    _decoders = {
+        stderr: codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for stderr, *_ in streams
+    }
+    _partial = {False: "", True: ""}
+    _residue_end_time = None
+
+    def _emit(stderr, data, final=False):
+        text = _partial[stderr] + _decoders[stderr].decode(data, final=final)
+        lines = text.split("\n")
+        _partial[stderr] = "" if final else lines.pop()
+        for _ln in lines:
+            if final and not _ln:
+                continue
+            if log:
                 _log = logger.error if stderr else logger.debug
-                _log(_decoder.decode(_ln, final=False))
+                _log(_ln)
+            if line_callback:
+                line_callback(_ln, stderr)
+
+    while True:
+        for stderr, ready, recv, chunks in streams:
+            while ready():
+                _data = recv(RECV_SIZE)
+                if not _data:
+                    break
+                chunks.append(_data)
+                if log or line_callback:
+                    _emit(stderr, _data)
+
+        if channel.exit_status_ready() and not (
+            channel.recv_ready() or channel.recv_stderr_ready()
+        ):
+            # Wait for a short duration for data in flight after exit status.
+            if channel.eof_received or channel.closed:
+                break
+            if _residue_end_time is None:
+                _residue_end_time = datetime.datetime.now() + datetime.timedelta(
+                    seconds=10
+                )
+            elif datetime.datetime.now() >= _residue_end_time:
+                logger.debug("No EOF received post command execution.")
+                break
 
         check_timeout(end_time, timeout)
-        _data = _stream(2048)
 
-    try:
-        return _decoder.decode(_output, final=True)  # Final decode
-    except UnicodeDecodeError as e:
-        logger.error(f"Decoding failed: {e}. Replacing invalid characters.")
-        return _output.decode("utf-8", errors="replace")  # Fallback to safe decode
+        _wait = 1.0
+        if end_time:
+            _remaining = (end_time - datetime.datetime.now()).total_seconds()
+            _wait = max(min(_wait, _remaining), 0)
+
+        # The channel descriptor becomes readable on data or EOF. After EOF,
+        # only the exit status is awaited.
+        if channel.eof_received:
+            channel.status_event.wait(_wait)
+        else:
+            select.select([channel], [], [], _wait)
+
+    if log or line_callback:
+        for stderr, *_ in streams:
+            _emit(stderr, b"", final=True)
+
+    return tuple(
+        b"".join(chunks).decode("utf-8", errors="replace") for *_, chunks in streams
+    )
 
 
 class RolesContainer(object):
@@ -1294,6 +1458,76 @@ class NodeVolume(object):
         self.path = path
 
 
+def get_connection_manager(ip_address, username, password, **kwargs):
+    """Return the process wide SSH connection manager of the user on the host.
+
+    The connection managers are shared between the copies of a CephNode, for
+    example the pickled and unpickled objects, within the same process. A manager
+    is shared only by the calls using the same arguments, except for the password
+    which is updated.
+
+    Args:
+        ip_address (str): IP address of the host
+        username (str): Login user name
+        password (str): Login password
+        kwargs (dict): Arguments supported by SSHConnectionManager
+    """
+    # Unset and empty arguments fall back to the defaults of the manager
+    options = tuple(
+        sorted(
+            (k, v) for k, v in kwargs.items() if v is not False and v not in (None, "")
+        )
+    )
+    key = (ip_address, username, options)
+    with _SSH_POOL_LOCK:
+        manager = _SSH_POOL.get(key)
+        if manager is None:
+            manager = SSHConnectionManager(ip_address, username, password, **kwargs)
+            _SSH_POOL[key] = manager
+        elif manager.password != password:
+            manager.password = password
+
+        return manager
+
+
+def _for_each_node(method, nodes, timeout=None):
+    """Invoke the method of all the nodes concurrently and log the time taken."""
+    with parallel(timeout=timeout) as p:
+        for node in nodes:
+            p.spawn(getattr(node, method))
+
+    tasks = p.stats
+    logger.info(
+        "%s of %d nodes completed in %.1fs, slowest node took %.1fs",
+        method,
+        tasks["total"],
+        tasks["elapsed"],
+        tasks["max"],
+    )
+
+
+def connect_nodes(nodes, timeout=None):
+    """Connect to the nodes and gather their facts concurrently.
+
+    Args:
+        nodes (list): CephNode objects
+        timeout (int): Maximum seconds allowed for all the nodes
+    """
+    _for_each_node("connect", nodes, timeout=timeout)
+
+
+def gather_node_facts(nodes, timeout=None):
+    """Gather the facts of the nodes which were not gathered yet, concurrently.
+
+    Args:
+        nodes (list): CephNode objects
+        timeout (int): Maximum seconds allowed for all the nodes
+    """
+    pending = [node for node in nodes if not getattr(node, "facts", None)]
+    if pending:
+        _for_each_node("gather_facts", pending, timeout=timeout)
+
+
 class SSHConnectionManager(object):
     def __init__(
         self,
@@ -1304,8 +1538,11 @@ class SSHConnectionManager(object):
         private_key_file_path="",
         private_key_password=None,
         outage_timeout=600,
+        max_channels=SSH_MAX_CHANNELS,
+        port=22,
     ):
         self.ip_address = ip_address
+        self.port = port
         self.username = username
         self.password = password
         self.look_for_keys = look_for_keys
@@ -1324,18 +1561,105 @@ class SSHConnectionManager(object):
         self.__transport = None
         self.__outage_start_time = None
         self.outage_timeout = datetime.timedelta(seconds=outage_timeout)
+        self.max_channels = max_channels
+        self._init_pool()
+
+    def _init_pool(self):
+        """Initialize the channel pool and the metrics."""
+        self._lock = threading.RLock()
+        self._channel_slots = threading.BoundedSemaphore(self.max_channels)
+        self._stats = {
+            "channels": 0,
+            "in_use": 0,
+            "reconnects": 0,
+            "long_running": 0,
+            "channel_wait_time": 0.0,
+            "max_channel_wait_time": 0.0,
+            "channel_wait_timeouts": 0,
+        }
 
     @property
     def client(self):
         return self.get_client()
 
+    @property
+    def healthy(self):
+        """Return True if the transport is active and authenticated."""
+        return bool(
+            self.__transport
+            and self.__transport.is_active()
+            and self.__transport.is_authenticated()
+        )
+
+    @property
+    def stats(self):
+        """Return the channel and connection metrics of the host."""
+        with self._lock:
+            return dict(self._stats)
+
     def get_client(self):
-        if not (self.__transport and self.__transport.is_active()):
-            self.__connect()
-            self.__transport = self.__client.get_transport()
+        with self._lock:
+            if not self.healthy:
+                self.__connect()
+                self.__transport = self.__client.get_transport()
 
         return self.__client
 
+    @contextmanager
+    def open_channel(self, timeout=None, long_running=False):
+        """Open a session channel on the shared transport.
+
+        At most max_channels short lived channels are opened concurrently, the
+        callers wait for a free slot beyond which. Long running channels, e.g.
+        streams and commands without timeout, are not counted against the cap
+        so that they can not starve the other commands. The time spent waiting
+        is recorded.
+
+        Args:
+            timeout (int): Maximum time allowed for getting and opening the channel
+            long_running (bool): The channel is held for a long time
+
+        Raises:
+            TimeoutException: when no channel slot is freed within the timeout
+        """
+        wait = 0.0
+        if not long_running:
+            wait_timeout = timeout if timeout else SSH_CHANNEL_WAIT_TIMEOUT
+            start = monotonic()
+            acquired = self._channel_slots.acquire(timeout=wait_timeout)
+            wait = monotonic() - start
+            if not acquired:
+                with self._lock:
+                    self._stats["channel_wait_time"] += wait
+                    self._stats["channel_wait_timeouts"] += 1
+                raise TimeoutException(
+                    f"No SSH channel freed up on {self.ip_address} within "
+                    f"{wait_timeout}s, all {self.max_channels} channels are in use"
+                )
+
+        with self._lock:
+            self._stats["channels"] += 1
+            self._stats["in_use"] += 1
+            self._stats["long_running"] += int(long_running)
+            self._stats["channel_wait_time"] += wait
+            self._stats["max_channel_wait_time"] = max(
+                self._stats["max_channel_wait_time"], wait
+            )
+
+        channel = None
+        try:
+            channel = self.get_client().get_transport().open_session(timeout=timeout)
+            yield channel
+        finally:
+            if channel is not None:
+                channel.close()
+
+            with self._lock:
+                self._stats["in_use"] -= 1
+                self._stats["long_running"] -= int(long_running)
+            if not long_running:
+                self._channel_slots.release()
+
     def _get_ssh_key(self, private_key_file_path):
         """Get SSH key based on file type"""
         passphrase = self._private_key_password
@@ -1407,6 +1731,10 @@ class SSHConnectionManager(object):
         """Establishes a connection with the remote host using the IP Address."""
         end_time = datetime.datetime.now() + self.outage_timeout
         last_error = None
+        attempt = 0
+        if self.__transport is not None:
+            self._stats["reconnects"] += 1
+
         while end_time > datetime.datetime.now():
             try:
                 auth = (
@@ -1423,6 +1751,7 @@ class SSHConnectionManager(object):
                 )
                 connect_kw = {
                     "hostname": self.ip_address,
+                    "port": self.port,
                     "username": self.username,
                     "password": self.password,
                     "allow_agent": False,
@@ -1453,8 +1782,17 @@ class SSHConnectionManager(object):
                 if not self.__outage_start_time:
                     self.__outage_start_time = datetime.datetime.now()
 
-                logger.debug("Retrying connection in 10 seconds")
-                sleep(10)
+                # Exponential backoff with jitter bounded by the outage timeout
+                delay = min(
+                    SSH_RECONNECT_DELAY * 2**attempt, SSH_RECONNECT_MAX_DELAY
+                ) * random.uniform(0.5, 1.5)
+                delay = min(
+                    delay,
+                    max((end_time - datetime.datetime.now()).total_seconds(), 0),
+                )
+                attempt += 1
+                logger.debug(f"Retrying connection in {delay:.1f} seconds")
+                sleep(delay)
 
         hint = ""
         err_str = str(last_error).lower() if last_error else ""
@@ -1508,6 +1846,8 @@ class SSHConnectionManager(object):
         # pkey (paramiko/cryptography key) is not picklable; recreated in __setstate__
         if pickle_dict.get("pkey") is not None:
             del pickle_dict["pkey"]
+        for key in ("_lock", "_channel_slots"):
+            pickle_dict.pop(key, None)
         return pickle_dict
 
     def __setstate__(self, state):
@@ -1519,6 +1859,9 @@ class SSHConnectionManager(object):
         self.pkey = (
             self._get_ssh_key(key_path) if self.look_for_keys and key_path else None
         )
+        self.port = getattr(self, "port", 22)
+        self.max_channels = getattr(self, "max_channels", SSH_MAX_CHANNELS)
+        self._init_pool()
 
 
 class CephNode(object):
@@ -1616,7 +1959,7 @@ class CephNode(object):
                 CephObjectFactory(self).create_ceph_object("osd")
             )
 
-        self.root_connection = SSHConnectionManager(
+        self.root_connection = get_connection_manager(
             self.ip_address,
             self.root_username,
             self.root_passwd,
@@ -1624,7 +1967,7 @@ class CephNode(object):
             private_key_file_path=self.private_key_path,
             private_key_password=self.private_key_password,
         )
-        self.connection = SSHConnectionManager(
+        self.connection = get_connection_manager(
             self.ip_address,
             self.username,
             self.password,
@@ -1706,7 +2049,6 @@ class CephNode(object):
         if _is_onecloud_bootstrap:
             pass  # skip initial Paramiko connect; subprocess handles it below
         else:
-            self.rssh().exec_command("dmesg")
             self.rssh_transport().set_keepalive(15)
 
         # OneCloud: bootstrap via system SSH (OpenSSH supports CISO certificates,
@@ -1749,34 +2091,6 @@ class CephNode(object):
                 "LogLevel=ERROR",
                 f"{ssh_user}@{self.ip_address}",
             ]
-            key_b64 = base64.b64encode(key_line.encode()).decode()
-            setup_cmds = [
-                (
-                    "id cephuser >/dev/null 2>&1 || (sudo groupadd -f cephuser && "
-                    "sudo useradd -m -s /bin/bash -g cephuser cephuser)"
-                ),
-                "echo 'cephuser ALL=(ALL) NOPASSWD:ALL' "
-                "| sudo tee /etc/sudoers.d/cephuser",
-                "sudo chmod 440 /etc/sudoers.d/cephuser",
-                "sudo mkdir -p /home/cephuser/.ssh && "
-                "sudo chmod 700 /home/cephuser/.ssh",
-                f"echo '{key_b64}' | base64 -d "
-                "| sudo tee -a /home/cephuser/.ssh/authorized_keys",
-                "sudo chmod 600 /home/cephuser/.ssh/authorized_keys",
-                "sudo chown -R cephuser:cephuser /home/cephuser/.ssh",
-                "sudo mkdir -p /root/.ssh && sudo chmod 700 /root/.ssh",
-                f"echo '{key_b64}' | base64 -d "
-                "| sudo tee -a /root/.ssh/authorized_keys",
-                "sudo chmod 600 /root/.ssh/authorized_keys",
-                "sudo sed -i 's/^.*PermitRootLogin.*/PermitRootLogin prohibit-password/' "
-                "/etc/ssh/sshd_config.d/00-complianceascode-hardening.conf "
-                "2>/dev/null || true",
-                "sudo sed -i 's/^.*PermitRootLogin.*/PermitRootLogin prohibit-password/' "
-                "/etc/ssh/sshd_config 2>/dev/null || true",
-                "sudo systemctl restart sshd 2>/dev/null || "
-                "sudo systemctl restart ssh 2>/dev/null || true",
-                "sudo touch /ceph-qa-ready",
-            ]
             ssh_env = None
             askpass_file = None
             boot_pwd = getattr(self, "bootstrap_key_password", "")
@@ -1794,49 +2108,8 @@ class CephNode(object):
                 ssh_env["SSH_ASKPASS_REQUIRE"] = "force"
                 ssh_env["DISPLAY"] = ":"
 
-            def _ssh_cmd(cmd, retries=1, retry_interval=15):
-                for attempt in range(retries):
-                    try:
-                        result = subprocess.run(
-                            ssh_base + [cmd],
-                            capture_output=True,
-                            text=True,
-                            timeout=60,
-                            env=ssh_env,
-                        )
-                        if result.returncode == 0 or attempt == retries - 1:
-                            return result
-                        logger.warning(
-                            "OneCloud SSH cmd failed (attempt %d/%d): exit=%s err=%r",
-                            attempt + 1,
-                            retries,
-                            result.returncode,
-                            result.stderr[:100],
-                        )
-                    except subprocess.TimeoutExpired:
-                        if attempt == retries - 1:
-                            raise
-                        logger.warning(
-                            "OneCloud SSH timed out (attempt %d/%d), retrying in %ds",
-                            attempt + 1,
-                            retries,
-                            retry_interval,
-                        )
-                    sleep(retry_interval)
-                return result
-
             try:
-                for i, cmd in enumerate(setup_cmds):
-                    result = _ssh_cmd(
-                        cmd, retries=20 if i == 0 else 1, retry_interval=15
-                    )
-                    logger.info(
-                        "OneCloud setup: cmd=%s exit=%s out=%r err=%r",
-                        cmd[:60],
-                        result.returncode,
-                        result.stdout[:200],
-                        result.stderr[:200],
-                    )
+                self.onecloud_bootstrap(ssh_base, key_line, env=ssh_env)
             finally:
                 if askpass_file:
                     try:
@@ -1856,7 +2129,7 @@ class CephNode(object):
             self.password = ""
             self.look_for_key = True
             _key_pw = getattr(self, "private_key_password", None)
-            root_mgr = SSHConnectionManager(
+            root_mgr = get_connection_manager(
                 self.ip_address,
                 "root",
                 "",
@@ -1864,7 +2137,7 @@ class CephNode(object):
                 private_key_file_path=key_path,
                 private_key_password=_key_pw,
             )
-            cephuser_mgr = SSHConnectionManager(
+            cephuser_mgr = get_connection_manager(
                 self.ip_address,
                 "cephuser",
                 "",
@@ -1909,45 +2182,144 @@ class CephNode(object):
                 f"echo 'root:{self.root_passwd}' | {sudo_prefix}chpasswd"
             )
             logger.info(stdout.readlines())
-        # TCP keepalive (applies to both IPv4 and IPv6 on Linux)
-        self.rssh().exec_command(
-            f"echo 120 | {sudo_prefix}tee /proc/sys/net/ipv4/tcp_keepalive_time"
-        )
-        self.rssh().exec_command(
-            f"echo 60 | {sudo_prefix}tee /proc/sys/net/ipv4/tcp_keepalive_intvl"
-        )
-        self.rssh().exec_command(
-            f"echo 20 | {sudo_prefix}tee /proc/sys/net/ipv4/tcp_keepalive_probes"
-        )
-        self.exec_command(cmd="ls / ; uptime ; date")
         self.ssh_transport().set_keepalive(15)
-        vm_node = getattr(self, "vm_node", None)
-        if vm_node and getattr(vm_node, "node_type", None) == "baremetal":
-            out, err = self.exec_command(cmd="hostname -s")
-        else:
-            out, err = self.exec_command(cmd="hostname")
-        self.hostname = out.strip()
-
-        shortname = self.hostname.split(".")
-        self.shortname = shortname[0]
-        logger.info(
-            "hostname and shortname set to %s and %s", self.hostname, self.shortname
-        )
-        self.set_internal_ip()
-        self.exec_command(
-            cmd="grep -q 'TMOUT' ~/.bashrc || echo '[[ -z \"${TMOUT+x}\" ]] && export TMOUT=600' >> ~/.bashrc",
-            check_ec=False,
-        )
-        self.exec_command(cmd="[ -f /etc/redhat-release ]", check_ec=False)
-
-        if self.exit_status == 0:
-            self.pkg_type = "rpm"
+        if getattr(self, "facts", None):
+            self.apply_facts(self.facts)
         else:
-            self.pkg_type = "deb"
+            self.gather_facts()
 
         logger.info("finished connect")
         self.run_once = True
 
+    def onecloud_bootstrap(
+        self, ssh_base, key_line, env=None, retries=20, retry_interval=15
+    ):
+        """
+        Bootstrap the OneCloud node using a single SSH session.
+
+        The idempotent ONECLOUD_BOOTSTRAP_STEPS are sent as one script, which is
+        retried as a whole until the node accepts the SSH connection.
+
+        Args:
+            ssh_base (list): ssh command line up to and including the destination
+            key_line (str): public key authorized for root and cephuser
+            env (dict): environment of the ssh process
+            retries (int): attempts made until the node is reachable
+            retry_interval (int): seconds between the attempts
+
+        Returns:
+            list: dict with the step name, exit code, duration in ms and output
+        """
+        key_b64 = base64.b64encode(key_line.encode()).decode()
+        script = [
+            ONECLOUD_BOOTSTRAP_RUNNER,
+            f"_key=$(echo '{key_b64}' | base64 -d)",
+        ]
+        script += [f"_run {n} {shlex.quote(c)}" for n, c in ONECLOUD_BOOTSTRAP_STEPS]
+        script = "\n".join(script) + "\n"
+
+        result = None
+        for attempt in range(1, retries + 1):
+            try:
+                result = subprocess.run(
+                    ssh_base + ["bash -s"],
+                    input=script,
+                    capture_output=True,
+                    text=True,
+                    timeout=120,
+                    env=env,
+                )
+                # 255 is returned by ssh when the connection fails
+                if result.returncode != 255:
+                    break
+                logger.warning(
+                    "OneCloud SSH failed (attempt %d/%d): %r",
+                    attempt,
+                    retries,
+                    result.stderr[:100],
+                )
+            except subprocess.TimeoutExpired:
+                if attempt == retries:
+                    raise
+                logger.warning(
+                    "OneCloud SSH timed out (attempt %d/%d)", attempt, retries
+                )
+            if attempt < retries:
+                sleep(retry_interval)
+
+        steps = []
+        for line in result.stdout.splitlines():
+            fields = line.split("\t")
+            if len(fields) != 5 or fields[0] != "STEP":
+                continue
+            output = base64.b64decode(fields[4]).decode(errors="replace")
+            steps.append(
+                {
+                    "step": fields[1],
+                    "rc": int(fields[2]),
+                    "duration": int(fields[3]),
+                    "output": output,
+                }
+            )
+            logger.info(
+                "OneCloud setup of %s: step=%s exit=%s took=%sms out=%r",
+                self.ip_address,
+                fields[1],
+                fields[2],
+                fields[3],
+                output[:200],
+            )
+
+        failed = [_s["step"] for _s in steps if _s["rc"]]
+        if failed or len(steps) != len(ONECLOUD_BOOTSTRAP_STEPS):
+            logger.warning(
+                "OneCloud setup of %s incomplete, failed steps %s, exit=%s err=%r",
+                self.ip_address,
+                failed,
+                result.returncode,
+                result.stderr[:200],
+            )
+        return steps
+
+    def gather_facts(self):
+        """
+        Gather the facts of the node using a single remote script.
+
+        The script also applies the TCP keepalive settings and the shell TMOUT of the
+        user. The facts are kept in the pickled state of the node, hence a node
+        restored using --reuse does not gather them again.
+
+        Returns:
+            dict: hostname, internal_ip, pkg_type, distro, kernel and keepalive
+        """
+        vm_node = getattr(self, "vm_node", None)
+        baremetal = vm_node and getattr(vm_node, "node_type", None) == "baremetal"
+        keepalive = " ".join(f"{k}:{v}" for k, v in TCP_KEEPALIVE.items())
+        cmd = (
+            f"_sudo='{'sudo' if self.username != 'root' else ''}' "
+            f"_hostname_opts='{'-s' if baremetal else ''}' "
+            f"_keepalive='{keepalive}'\n{NODE_FACTS_SCRIPT}"
+        )
+        out, _ = self.exec_command(cmd=cmd)
+        facts = json.loads(out)
+        self.apply_facts(facts)
+        return facts
+
+    def apply_facts(self, facts):
+        """Set the attributes of the node from the gathered facts."""
+        self.facts = facts
+        self.hostname = facts["hostname"]
+        self.shortname = self.hostname.split(".")[0]
+        self.internal_ip = facts["internal_ip"]
+        self.pkg_type = facts["pkg_type"]
+        logger.info(
+            "hostname and shortname set to %s and %s, %s kernel %s",
+            self.hostname,
+            self.shortname,
+            facts["distro"].get("name"),
+            facts["kernel"],
+        )
+
     def set_internal_ip(self):
         """
         set the internal ip of the vm which differs from floating ip
@@ -1989,7 +2361,7 @@ class CephNode(object):
         cmd = kw["cmd"]
         _end_time = None
         _verbose = kw.get("verbose", False)
-        ssh = self.rssh if kw.get("sudo") else self.ssh
+        conn = self.root_connection if kw.get("sudo") else self.connection
         long_running = kw.get("long_running", False)
         if "timeout" in kw:
             timeout = None if kw["timeout"] == "notimeout" else kw["timeout"]
@@ -1998,72 +2370,53 @@ class CephNode(object):
             timeout = 3600 if kw.get("long_running", False) else 600
 
         try:
-            channel = ssh().get_transport().open_session(timeout=timeout)
-            channel.settimeout(timeout)
-
-            logger.info(
-                "Execute %s on %s [%s]",
-                cmd,
-                self.hostname,
-                self.ip_address,
-            )
-            _exec_start_time = datetime.datetime.now()
-            channel.exec_command(cmd)
+            with conn.open_channel(
+                timeout=timeout, long_running=long_running or timeout is None
+            ) as channel:
+                channel.settimeout(timeout)
 
-            if timeout:
-                _end_time = datetime.datetime.now() + datetime.timedelta(
-                    seconds=timeout
+                logger.info(
+                    "Execute %s on %s [%s]",
+                    cmd,
+                    self.hostname,
+                    self.ip_address,
                 )
+                _exec_start_time = datetime.datetime.now()
+                channel.exec_command(cmd)
 
-            _out = ""
-            _err = ""
-            while not channel.exit_status_ready():
-                # Prevent high resource consumption
-                sleep(1)
+                if timeout:
+                    _end_time = datetime.datetime.now() + datetime.timedelta(
+                        seconds=timeout
+                    )
 
-                # Check the streams for data and log in debug mode only if it
-                # is a long running command else don't log.
+                # Log the output in debug mode only if it is a long running command
+                # else don't log.
                 # Fixme: logging must happen in debug irrespective of type.
                 _verbose = True if long_running else _verbose
-                if channel.recv_ready():
-                    _out += read_stream(channel, _end_time, timeout, log=_verbose)
-
-                if channel.recv_stderr_ready():
-                    _err += read_stream(
-                        channel, _end_time, timeout, stderr=True, log=_verbose
-                    )
-
-                check_timeout(_end_time, timeout)
-
-            _time = (datetime.datetime.now() - _exec_start_time).total_seconds()
-            logger.info(
-                "Execution of %s took %s seconds on %s by user %s [%s]",
-                cmd,
-                str(_time),
-                self.hostname,
-                channel.get_transport().get_username(),
-                self.ip_address,
-            )
+                _out, _err = read_channel(
+                    channel,
+                    _end_time,
+                    timeout,
+                    log=_verbose,
+                    line_callback=kw.get("line_callback"),
+                )
 
-            # Check for data residues in the channel streams. This is required for the following reasons
-            #   - exit_ready and first line is blank causing data to be None
-            #   - race condition between data read and exit ready
-            try:
-                _new_timeout = datetime.datetime.now() + datetime.timedelta(seconds=10)
-                _out += read_stream(channel, _new_timeout, timeout=True)
-                _err += read_stream(channel, _new_timeout, timeout=True, stderr=True)
-            except CommandFailed:
-                logger.debug("Encountered a timeout during read post execution.")
-            except BaseException as be:
-                logger.debug("Encountered an unknown exception during last read.\n", be)
+                _time = (datetime.datetime.now() - _exec_start_time).total_seconds()
+                logger.info(
+                    "Execution of %s took %s seconds on %s by user %s [%s]",
+                    cmd,
+                    str(_time),
+                    self.hostname,
+                    channel.get_transport().get_username(),
+                    self.ip_address,
+                )
 
-            _exit = channel.recv_exit_status()
-            return _out, _err, _exit, _time
+                _exit = channel.recv_exit_status()
+                return _out, _err, _exit, _time
         except socket.timeout as terr:
             logger.error("%s failed to execute within %d seconds.", cmd, timeout)
             raise SocketTimeoutException(terr)
         except TimeoutException as tex:
-            channel.close()
             logger.error("%s failed to execute within %ds.", cmd, timeout)
             raise CommandFailed(tex)
         except BaseException as be:  # noqa
@@ -2080,6 +2433,7 @@ class CephNode(object):
           timeout: Max time to wait for command to complete. Default is 600 seconds.
           pretty_print: Bool flag to indicate if the output should be pretty printed.
           verbose: Bool flag to indicate if the command output should be printed.
+          line_callback: Method invoked with every output line and a stderr flag.
 
         Returns:
           Exit code when long_running is used
@@ -2100,7 +2454,10 @@ class CephNode(object):
             self.rssh_transport().set_keepalive(15)
 
         cmd = kw["cmd"]
-        _out, _err, _exit, _time = self.long_running(**kw)
+        try:
+            _out, _err, _exit, _time = self.long_running(**kw)
+        finally:
+            get_command_cache().observe(self, cmd)
         self.exit_status = _exit
 
         if kw.get("pretty_print"):
@@ -2185,7 +2542,7 @@ class CephNode(object):
     def __setstate__(self, pickle_dict):
         self.__dict__.update(pickle_dict)
         key_pw = getattr(self, "private_key_password", None)
-        self.root_connection = SSHConnectionManager(
+        self.root_connection = get_connection_manager(
             self.ip_address,
             "root",
             self.root_passwd,
@@ -2193,7 +2550,7 @@ class CephNode(object):
             private_key_file_path=self.private_key_path,
             private_key_password=key_pw,
         )
-        self.connection = SSHConnectionManager(
+        self.connection = get_connection_manager(
             self.ip_address,
             self.username,
             self.password,
@@ -2679,6 +3036,63 @@ class CephNode(object):
         client = self.rssh if sudo else self.ssh
         client().open_sftp().get(src, dst)
 
+    def download_command_output(self, cmd, dst, sudo=False, timeout=600):
+        """Stream the stdout of the remote command into a local file.
+
+        The output is written to the local file as it arrives, hence no
+        intermediate file is created on the remote host. It is useful for
+        archiving remote directories, for example ``tar -czf - <dir>``.
+
+        Args:
+            cmd (str): Command whose output must be downloaded
+            dst (str): Local file path
+            sudo (bool): Use root access
+            timeout (int): Maximum time allowed for the transfer
+
+        Returns:
+            Tuple of bytes written, exit status and stderr of the command
+
+        Raises:
+            TimeoutException: when the transfer exceeds the allocated time.
+        """
+        conn = self.root_connection if sudo else self.connection
+        end_time = time() + timeout
+        size, err = 0, bytearray()
+
+        logger.info("Streaming output of %s on %s to %s", cmd, self.hostname, dst)
+        with conn.open_channel(timeout=timeout, long_running=True) as channel:
+            channel.settimeout(timeout)
+            channel.exec_command(cmd)
+            with open(dst, "wb") as fh:
+                while True:
+                    while channel.recv_stderr_ready():
+                        err.extend(channel.recv_stderr(32768))
+
+                    remaining = end_time - time()
+                    if remaining <= 0:
+                        raise TimeoutException(
+                            f"{cmd} exceeded {timeout}s on {self.hostname}"
+                        )
+
+                    channel.settimeout(remaining)
+                    try:
+                        data = channel.recv(32768)
+                    except socket.timeout:
+                        raise TimeoutException(
+                            f"{cmd} exceeded {timeout}s on {self.hostname}"
+                        )
+
+                    if not data:
+                        break
+
+                    fh.write(data)
+                    size += len(data)
+
+            while channel.recv_stderr_ready():
+                err.extend(channel.recv_stderr(32768))
+
+            return size, channel.recv_exit_status(), err.decode(errors="replace")
+
     def create_dirs(self, dir_path, sudo=False):
         """Create directory on node
         Args:
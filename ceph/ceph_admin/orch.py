@@ -4,13 +4,13 @@ Module that interacts with the orchestrator CLI.
 Provide the interfaces to ceph orch and in turn manage the orchestration engine.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from json import loads
-from time import sleep
 
 from dateutil import parser
 
 from ceph.ceph import ResourceNotFoundError
+from ceph.waiter import WaitUntil
 from utility.log import Log
 
 from .ceph import CephCLI
@@ -84,37 +84,56 @@ class Orch(
         raise ResourceNotFoundError(f"No service names matched {service_name}")
 
     def check_service(
-        self, service_name: str, timeout: int = 300, interval: int = 5, exist=True
+        self,
+        service_name: str,
+        timeout: int = 300,
+        interval: int = 5,
+        exist=True,
+        max_interval: int = 30,
     ) -> bool:
         """
         check service existence based on the exist parameter.
         if exist is set, then validate its presence. otherwise, for its removal.
 
+        The interval doubles up to max_interval while the daemon counts of the
+        service remain unchanged.
+
         Args:
             service_name (Str): service name
             timeout (Int): timeout in seconds
             interval (Int): interval in seconds
             exist (Bool): exists or not
+            max_interval (Int): maximum interval in seconds
 
         Returns:
             Boolean
 
         """
-        end_time = datetime.now() + timedelta(seconds=timeout)
-
-        while end_time > datetime.now():
-            sleep(interval)
+        for w in WaitUntil(
+            timeout=timeout,
+            interval=interval,
+            backoff=2,
+            max_interval=max(interval, max_interval),
+            name="check_service",
+        ):
             out, err = self.ls({"base_cmd_args": {"format": "json"}})
             out = loads(out)
-            service = [
-                d["service_name"] for d in out if d.get("service_name") == service_name
-            ]
+            service = [d for d in out if d.get("service_name") == service_name]
 
-            if service_name not in service and not exist:
+            if not service and not exist:
                 return True
-            elif service_name in service and exist:
+            elif service and exist:
                 return True
             LOG.info("[%s] check for existence: %s, retrying" % (service_name, exist))
+            w.progress(
+                [
+                    (
+                        d.get("status", {}).get("running"),
+                        d.get("status", {}).get("size"),
+                    )
+                    for d in service
+                ]
+            )
 
         return False
 
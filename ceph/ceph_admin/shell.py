@@ -3,9 +3,11 @@
 from copy import deepcopy
 from typing import Dict, List
 
+from ceph.ceph import CommandFailed
 from utility.log import Log
 
 from .common import config_dict_to_string
+from .shell_session import ShellSessionError, get_shell_session, record_cold_call
 from .typing_ import CephAdmProtocol
 
 LOG = Log(__name__)
@@ -63,3 +65,55 @@ class ShellMixin:
             if print_output:
                 LOG.debug(out[0])
         return out
+
+    def session_shell(
+        self: CephAdmProtocol,
+        args: List[str],
+        check_status: bool = True,
+        timeout: int = 600,
+        print_output: bool = True,
+    ):
+        """
+        Run ceph commands using the persistent cephadm shell of the installer.
+
+        The command is executed in a long-lived cephadm shell container instead of
+        starting a new container per call. When the session is not usable, the
+        command is executed using the per call shell. The persistent session can
+        be disabled using the persistent_shell test configuration.
+
+        Args:
+            args (List): list arguments
+            check_status (Bool): check command status
+            timeout (Int): Maximum time allowed for execution.
+            print_output (Bool): Flag to decide whether the output should be printed in log or not
+
+        Returns:
+            out (Str), err (Str) stdout and stderr response
+        """
+        if self.config.get("persistent_shell", True):
+            cmd = " ".join(args)
+            try:
+                out, err, rc = get_shell_session(self.installer.node).execute(
+                    cmd, timeout=timeout
+                )
+            except ShellSessionError:
+                LOG.debug("Falling back to cephadm shell for %s", cmd)
+            else:
+                if check_status and rc != 0:
+                    raise CommandFailed(
+                        f"{cmd} returned {err} and code {rc} on "
+                        f"{self.installer.node.hostname}"
+                    )
+
+                if print_output:
+                    LOG.debug(out)
+
+                return out, err
+
+        record_cold_call()
+        return self.shell(
+            args,
+            check_status=check_status,
+            timeout=timeout,
+            print_output=print_output,
+        )
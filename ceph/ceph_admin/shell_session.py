@@ -0,0 +1,373 @@
+"""Long-lived cephadm shell session.
+
+Every invocation of ``cephadm shell -- <cmd>`` starts a new container which costs a
+few seconds per call. For modules that issue thousands of read only ceph commands,
+a single interactive ``cephadm shell`` is started on the installer node and the
+commands are written to it one after the other. The output of each command is
+framed using unique markers so that stdout, stderr and the exit code can be
+separated from the terminal stream.
+
+Bulk callers stream many commands through the session, a window of commands is
+written ahead of the result being read so that the shell never waits for the next
+command to arrive.
+
+A few sessions are kept per installer node so that concurrent callers are served
+in parallel. A command never waits for a busy session, when all the sessions of
+the installer are busy, or a session dies or cannot be started, the caller is
+expected to fall back to the per call shell. The counters of calls served by the warm session and by the
+per call shell are available via get_session_stats.
+"""
+
+import atexit
+import re
+import socket
+import threading
+from collections import deque
+from time import monotonic
+from uuid import uuid4
+
+from ceph.ceph import CommandFailed
+from utility.log import Log
+
+LOG = Log(__name__)
+
+BEGIN_MARKER = "__CEPHCI_BEGIN_"
+ERR_MARKER = "__CEPHCI_ERR_"
+END_MARKER = "__CEPHCI_END_"
+SETUP_CMD = (
+    "stty -echo -onlcr 2>/dev/null; unset TMOUT; export PS1='' PS2='' "
+    "HISTFILE=/dev/null"
+)
+START_TIMEOUT = 300
+MAX_FAILURES = 3
+# Maximum number of persistent shells per installer node
+MAX_SESSIONS = 4
+RECV_SIZE = 32768
+STREAM_WINDOW = 32
+
+_SESSIONS = dict()
+_SESSIONS_LOCK = threading.Lock()
+_STATS = {"warm": 0, "cold": 0, "starts": 0, "failures": 0, "busy": 0}
+_STATS_LOCK = threading.Lock()
+
+
+class ShellSessionError(Exception):
+    """The persistent shell session is not usable."""
+
+    pass
+
+
+class ShellSessionBusy(ShellSessionError):
+    """The persistent shell session is executing another command."""
+
+    pass
+
+
+def _record(key, value=1):
+    with _STATS_LOCK:
+        _STATS[key] += value
+
+
+def record_cold_call():
+    """Account a command executed using a new cephadm shell container."""
+    _record("cold")
+
+
+def get_session_stats():
+    """Return the counters of warm session calls, cold calls and session starts."""
+    with _STATS_LOCK:
+        return dict(_STATS)
+
+
+class CephadmShellSession:
+    """A cephadm shell running on the installer node executing framed commands."""
+
+    def __init__(self, node):
+        """
+        Initialize the session object, the shell is started on first use.
+
+        Args:
+            node (CephNode): The installer node.
+        """
+        self.node = node
+        self._channel = None
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._failures = 0
+
+    @property
+    def disabled(self):
+        """Return True when the session failed repeatedly and must not be used."""
+        return self._failures >= MAX_FAILURES
+
+    @property
+    def busy(self):
+        """Return True if the session is executing a command."""
+        return self._lock.locked()
+
+    def _acquire(self):
+        """Take the session without waiting, raise ShellSessionBusy if in use."""
+        if not self._lock.acquire(blocking=False):
+            _record("busy")
+            raise ShellSessionBusy(
+                f"Persistent cephadm shell on {self.node.hostname} is busy"
+            )
+
+    @property
+    def alive(self):
+        """Return True if the shell channel is open."""
+        return (
+            self._channel is not None
+            and not self._channel.closed
+            and not self._channel.exit_status_ready()
+        )
+
+    def start(self):
+        """Start the interactive cephadm shell and prepare it for framed commands."""
+        LOG.info("Starting a persistent cephadm shell on %s", self.node.hostname)
+        self._buffer = bytearray()
+        self._channel = self.node.rssh().get_transport().open_session()
+        self._channel.get_pty(term="dumb", width=4096)
+        self._channel.exec_command("cephadm shell")
+        try:
+            self._run(SETUP_CMD, timeout=START_TIMEOUT)
+        except socket.timeout:
+            raise ShellSessionError("cephadm shell did not start in time.")
+
+        _record("starts")
+
+    def close(self):
+        """Terminate the shell."""
+        if self._channel is None:
+            return
+
+        try:
+            self._channel.send(b"exit\n")
+            self._channel.close()
+        except Exception:  # noqa
+            pass
+        finally:
+            self._channel = None
+
+    def _send(self, data):
+        payload = data.encode("utf-8")
+        while payload:
+            sent = self._channel.send(payload)
+            if sent <= 0:
+                raise ShellSessionError("cephadm shell channel is closed.")
+            payload = payload[sent:]
+
+    def _read_until(self, pattern, end_time):
+        """Read from the channel until the pattern is found or the time is up."""
+        while True:
+            match = pattern.search(self._buffer)
+            if match:
+                return match
+
+            remaining = end_time - monotonic()
+            if remaining <= 0:
+                raise socket.timeout("cephadm shell command timed out.")
+
+            self._channel.settimeout(remaining)
+            data = self._channel.recv(RECV_SIZE)
+            if not data:
+                raise ShellSessionError("cephadm shell session terminated.")
+
+            self._buffer.extend(data)
+
+    def _frame(self, cmd, tag):
+        """Return the command framed by the markers of the tag."""
+        err_file = f"/tmp/cephci-{tag}.err"
+
+        # The markers are split in the format string so that an echo of the
+        # command line never matches the marker itself. stdin is closed so that
+        # a command can not consume the commands written after it.
+        return (
+            f"printf '\\n%s%s\\n' '{BEGIN_MARKER}' '{tag}'; "
+            f"{{ {cmd}\n}} </dev/null 2>{err_file}; "
+            f"_rc=$?; printf '\\n%s%s\\n' '{ERR_MARKER}' '{tag}'; "
+            f"cat {err_file} 2>/dev/null; rm -f {err_file}; "
+            f"printf '\\n%s%s:%s\\n' '{END_MARKER}' '{tag}' \"$_rc\"\n"
+        )
+
+    def _collect(self, tag, timeout):
+        """Read the framed output of the tag and return stdout, stderr and exit code."""
+        pattern = re.compile(
+            rb"\n"
+            + re.escape(f"{BEGIN_MARKER}{tag}".encode())
+            + rb"\r?\n(.*?)\r?\n"
+            + re.escape(f"{ERR_MARKER}{tag}".encode())
+            + rb"\r?\n(.*?)\r?\n"
+            + re.escape(f"{END_MARKER}{tag}:".encode())
+            + rb"(\d+)\r?\n",
+            re.DOTALL,
+        )
+        match = self._read_until(pattern, monotonic() + timeout)
+        out, err, rc = (bytes(_g) for _g in match.groups())
+        del self._buffer[: match.end()]
+
+        return (
+            out.replace(b"\r\n", b"\n").decode("utf-8", errors="replace"),
+            err.replace(b"\r\n", b"\n").decode("utf-8", errors="replace"),
+            int(rc),
+        )
+
+    def _run(self, cmd, timeout):
+        """Write the framed command and return its stdout, stderr and exit code."""
+        tag = uuid4().hex
+        self._send(self._frame(cmd, tag))
+        return self._collect(tag, timeout)
+
+    def execute(self, cmd, timeout=600):
+        """
+        Execute the command in the warm shell.
+
+        Args:
+            cmd (Str): The command to be executed.
+            timeout (Int): Maximum time allowed for execution.
+
+        Returns:
+            Tuple of stdout, stderr and exit code.
+
+        Raises:
+            ShellSessionBusy when the session is executing another command.
+            ShellSessionError when the session is not usable, the session is closed
+            so that the next call starts a new shell.
+            CommandFailed when the command does not complete within the timeout.
+        """
+        self._acquire()
+        try:
+            if self.disabled:
+                raise ShellSessionError(
+                    f"Persistent cephadm shell disabled on {self.node.hostname}"
+                )
+
+            try:
+                if not self.alive:
+                    self.start()
+
+                result = self._run(cmd, timeout)
+                self._failures = 0
+                _record("warm")
+                return result
+            except socket.timeout:
+                # The command is hung, a new shell is started on the next call.
+                LOG.error("%s failed to execute within %d seconds.", cmd, timeout)
+                self.close()
+                raise CommandFailed(f"{cmd} failed to execute within {timeout}s")
+            except Exception as e:  # noqa
+                self._failures += 1
+                _record("failures")
+                LOG.warning(
+                    "Persistent cephadm shell on %s failed: %s", self.node.hostname, e
+                )
+                self.close()
+                raise ShellSessionError(e)
+        finally:
+            self._lock.release()
+
+    def execute_stream(self, cmds, timeout=600, window=STREAM_WINDOW):
+        """
+        Execute the commands one after the other in the warm shell.
+
+        Up to window commands are written ahead of the one whose result is read.
+        The session is held until the generator is exhausted or closed.
+
+        Args:
+            cmds (Iterable): The commands to be executed.
+            timeout (Int): Maximum time allowed per command.
+            window (Int): Number of commands written ahead.
+
+        Yields:
+            Tuple of stdout, stderr and exit code of every command, in order.
+
+        Raises:
+            ShellSessionBusy when the session is executing another command.
+            ShellSessionError when the session is not usable, the commands written
+            ahead whose result was not yielded may have been executed.
+            CommandFailed when a command does not complete within the timeout.
+        """
+        self._acquire()
+        try:
+            if self.disabled:
+                raise ShellSessionError(
+                    f"Persistent cephadm shell disabled on {self.node.hostname}"
+                )
+
+            cmds = iter(cmds)
+            pending = deque()
+            try:
+                if not self.alive:
+                    self.start()
+
+                while True:
+                    for cmd in cmds:
+                        tag = uuid4().hex
+                        self._send(self._frame(cmd, tag))
+                        pending.append((cmd, tag))
+                        if len(pending) >= window:
+                            break
+
+                    if not pending:
+                        return
+
+                    cmd, tag = pending[0]
+                    result = self._collect(tag, timeout)
+                    pending.popleft()
+                    self._failures = 0
+                    _record("warm")
+                    yield result
+            except GeneratorExit:
+                # Abandoned with commands in flight, their output is not read.
+                if pending:
+                    self.close()
+                raise
+            except socket.timeout:
+                LOG.error("%s failed to execute within %d seconds.", cmd, timeout)
+                self.close()
+                raise CommandFailed(f"{cmd} failed to execute within {timeout}s")
+            except Exception as e:  # noqa
+                self._failures += 1
+                _record("failures")
+                LOG.warning(
+                    "Persistent cephadm shell on %s failed: %s", self.node.hostname, e
+                )
+                self.close()
+                raise ShellSessionError(e)
+        finally:
+            self._lock.release()
+
+
+def get_shell_session(node):
+    """
+    Return an idle persistent shell session of the given installer node.
+
+    A new session is added while the installer has less than MAX_SESSIONS, beyond
+    which a busy session is returned and its use raises ShellSessionBusy.
+
+    Args:
+        node (CephNode): The installer node.
+    """
+    key = node.ip_address
+    with _SESSIONS_LOCK:
+        sessions = _SESSIONS.setdefault(key, [])
+        for session in sessions:
+            if not session.busy and not session.disabled:
+                return session
+
+        if len(sessions) < MAX_SESSIONS:
+            sessions.append(CephadmShellSession(node))
+            return sessions[-1]
+
+        return sessions[0]
+
+
+@atexit.register
+def close_shell_sessions():
+    """Terminate all the persistent shell sessions."""
+    with _SESSIONS_LOCK:
+        for sessions in _SESSIONS.values():
+            for session in sessions:
+                session.close()
+
+        _SESSIONS.clear()
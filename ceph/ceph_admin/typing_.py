@@ -61,6 +61,7 @@ class OrchProtocol(CephAdmProtocol, Protocol):
         timeout: int = 300,
         interval: int = 5,
         exist: bool = True,
+        max_interval: int = 30,
     ) -> bool: ...
 
     def op(self, op: str, config: Dict): ...
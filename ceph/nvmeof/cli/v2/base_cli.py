@@ -1,6 +1,16 @@
 import re
+from collections import namedtuple
+from contextlib import contextmanager
+from time import monotonic
 
+from ceph.ceph import CommandFailed
 from ceph.ceph_admin.common import config_dict_to_string
+from ceph.ceph_admin.shell_session import (
+    STREAM_WINDOW,
+    CephadmShellSession,
+    ShellSessionError,
+    record_cold_call,
+)
 from ceph.nvmeof.cli.v2.common import substitute_keys
 from utility.log import Log
 
@@ -24,6 +34,20 @@ KEY_MAP = {
     "level": "log_level",
 }
 
+# interval is the time between the result and the previous one. The operations
+# are written ahead of their results, hence it is not the latency of the operation.
+BulkResult = namedtuple(
+    "BulkResult", ["entity", "action", "cmd", "rc", "out", "err", "interval"]
+)
+
+# Number of completed bulk operations between two progress messages
+BULK_PROGRESS_INTERVAL = 500
+# Exit code of the operations exceeding the per operation timeout
+BULK_TIMEOUT_RC = 124
+# Exit code of the operations written to a failed session before their result was
+# read, they may or may not have been executed
+BULK_UNKNOWN_RC = -1
+
 
 class BaseCLI:
     """Execute Command class runs NVMe CLI on Gateway Node."""
@@ -40,6 +64,7 @@ class BaseCLI:
         self.node = node
         self.shell = shell
         self.ceph_version = None
+        self._bulk = None
 
     def __local_mtls_cert_path(self) -> str:
         """Currently mtls is not supported in Ceph NVMe CLI."""
@@ -57,8 +82,8 @@ class BaseCLI:
         return self.ceph_version
 
     @substitute_keys(KEY_MAP)
-    def run_nvme_cli(self, entity, action, **kwargs):
-        LOG.info(f"NVMeoF command - {entity} {action}")
+    def nvme_cli_command(self, entity, action, **kwargs):
+        """Return the NVMe CLI command line of the entity action."""
         base_cmd_args = kwargs.get("base_cmd_args", {})
 
         # TODO: Currently mtls is not supported in Ceph NVMe CLI(Tentacle).
@@ -88,5 +113,220 @@ class BaseCLI:
             config_dict_to_string(cmd_args),
             config_dict_to_string(base_cmd_args),
         ]
-        out, err = self.shell(args=command, pretty_print=True)
+        return " ".join(command)
+
+    def run_nvme_cli(self, entity, action, **kwargs):
+        cmd = self.nvme_cli_command(entity, action, **kwargs)
+        if self._bulk is not None:
+            self._bulk.append((entity, action, cmd))
+            return "", ""
+
+        LOG.info(f"NVMeoF command - {entity} {action}")
+        out, err = self.shell(args=[cmd], pretty_print=True)
         return out, err
+
+    def _stream_session(self):
+        """Return a dedicated cephadm shell session on the installer, if enabled."""
+        cephadm = getattr(self.shell, "__self__", None)
+        if cephadm is None or not hasattr(cephadm, "installer"):
+            return None
+
+        if not getattr(cephadm, "config", {}).get("persistent_shell", True):
+            return None
+
+        return CephadmShellSession(cephadm.installer.node)
+
+    def _run_cold(self, cmd, timeout):
+        """Execute the command using a new cephadm shell container."""
+        record_cold_call()
+        try:
+            out, err = self.shell(args=[cmd], timeout=timeout, print_output=False)
+            return out, err, 0
+        except CommandFailed as e:
+            return "", str(e), 1
+
+    def stream_nvme_cli(self, ops, window=STREAM_WINDOW, timeout=600):
+        """
+        Execute the NVMe CLI operations through one long-lived cephadm shell.
+
+        The operations are written as a command stream to a cephadm shell started
+        on the installer for the stream, instead of starting a cephadm shell
+        container per operation. The shared sessions serving run_ceph_command are
+        not held by the stream. The operations are executed one after the other.
+        An operation exceeding the timeout is reported with BULK_TIMEOUT_RC and a
+        new session is started for the operations after it. When a session is not
+        usable, the operations written ahead whose result was not read are
+        reported with BULK_UNKNOWN_RC instead of being executed again, they may
+        have created the entity. The remaining operations are executed using the
+        per call shell.
+
+        Args:
+            ops: list of (entity, action, cmd) as recorded by bulk
+            window: Number of operations written ahead of the result being read
+            timeout: Seconds allowed per operation
+
+        Yields:
+            BulkResult of every operation as soon as it completes, in order
+        """
+        done = 0
+        while done < len(ops):
+            session = self._stream_session()
+            if session is None:
+                break
+
+            pending, sent, completed = ops[done:], 0, 0
+
+            def commands():
+                nonlocal sent
+                for _, _, cmd in pending:
+                    sent += 1
+                    yield cmd
+
+            stream = session.execute_stream(commands(), timeout=timeout, window=window)
+            started = monotonic()
+            try:
+                for (entity, action, cmd), (out, err, rc) in zip(pending, stream):
+                    finished = monotonic()
+                    yield BulkResult(
+                        entity, action, cmd, rc, out, err, finished - started
+                    )
+                    started = finished
+                    completed += 1
+            except CommandFailed as e:
+                entity, action, cmd = pending[completed]
+                yield BulkResult(
+                    entity,
+                    action,
+                    cmd,
+                    BULK_TIMEOUT_RC,
+                    "",
+                    str(e),
+                    monotonic() - started,
+                )
+                completed += 1
+                yield from self._unknown_results(pending[completed:sent])
+                done += max(sent, completed)
+                continue
+            except ShellSessionError as e:
+                yield from self._unknown_results(pending[completed:sent])
+                done += max(sent, completed)
+                LOG.warning(
+                    f"Falling back to cephadm shell for {len(ops) - done} operations: {e}"
+                )
+                break
+            finally:
+                stream.close()
+                session.close()
+
+            done += completed
+
+        for entity, action, cmd in ops[done:]:
+            started = monotonic()
+            out, err, rc = self._run_cold(cmd, timeout)
+            yield BulkResult(entity, action, cmd, rc, out, err, monotonic() - started)
+
+    @staticmethod
+    def _unknown_results(ops):
+        """Yield the results of the operations whose status is not known."""
+        for entity, action, cmd in ops:
+            yield BulkResult(
+                entity,
+                action,
+                cmd,
+                BULK_UNKNOWN_RC,
+                "",
+                "Unknown status, the session failed before the result was read",
+                0.0,
+            )
+
+    @contextmanager
+    def bulk(self, window=STREAM_WINDOW, timeout=600, check_status=True):
+        """
+        Provision the NVMe CLI operations issued within the block in bulk.
+
+        The entity methods called within the block, e.g. subsystem.add or
+        namespace.add_host, only record their command and return empty output,
+        hence calls within the block must not depend on the output. The recorded
+        operations are executed through stream_nvme_cli when the block exits.
+
+        Args:
+            window: Number of operations written ahead of the result being read
+            timeout: Seconds allowed per operation
+            check_status: Raise CommandFailed when any of the operations failed
+
+        Yields:
+            List filled with the BulkResult of every operation on exit
+
+        Example::
+
+            with gateway.bulk() as results:
+                for num in range(1, 1025):
+                    gateway.namespace.add(**{"args": {...}})
+            LOG.info(summarize_bulk(results))
+        """
+        if self._bulk is not None:
+            raise RuntimeError("Bulk provisioning can not be nested")
+
+        ops, results = [], []
+        self._bulk = ops
+        try:
+            yield results
+        finally:
+            self._bulk = None
+
+        LOG.info(f"NVMeoF bulk provisioning of {len(ops)} operations")
+        started = monotonic()
+        for result in self.stream_nvme_cli(ops, window=window, timeout=timeout):
+            results.append(result)
+            if result.rc:
+                LOG.error(
+                    f"{result.cmd} returned {result.rc}: {result.err.strip()[-500:]}"
+                )
+            if len(results) % BULK_PROGRESS_INTERVAL == 0:
+                elapsed = monotonic() - started
+                LOG.info(
+                    f"Completed {len(results)}/{len(ops)} NVMeoF operations, "
+                    f"{len(results) / elapsed:.1f} ops/s"
+                )
+
+        summary = summarize_bulk(results, monotonic() - started)
+        LOG.info(f"NVMeoF bulk provisioning summary: {summary}")
+        if check_status and summary["failed"]:
+            raise CommandFailed(
+                f"{summary['failed']} of {summary['total']} NVMeoF operations failed, "
+                f"the status of {summary['unknown']} of which is unknown"
+            )
+
+
+def summarize_bulk(results, elapsed=None):
+    """
+    Return the status and throughput of the bulk operations.
+
+    Args:
+        results: list of BulkResult
+        elapsed: Seconds taken by the whole bulk, defaults to the sum of intervals
+
+    Returns:
+        dict having total, failed, unknown (BULK_UNKNOWN_RC, included in failed),
+        elapsed, ops_per_sec, max_interval between two results and the counts
+        per "entity action"
+    """
+    if elapsed is None:
+        elapsed = sum(r.interval for r in results)
+
+    per_action = {}
+    for result in results:
+        key = f"{result.entity} {result.action}"
+        counts = per_action.setdefault(key, {"total": 0, "failed": 0})
+        counts["total"] += 1
+        counts["failed"] += bool(result.rc)
+
+    return {
+        "total": len(results),
+        "failed": sum(1 for r in results if r.rc),
+        "unknown": sum(1 for r in results if r.rc == BULK_UNKNOWN_RC),
+        "elapsed": round(elapsed, 3),
+        "ops_per_sec": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "max_interval": round(max((r.interval for r in results), default=0), 3),
+        "actions": per_action,
+    }
@@ -16,6 +16,8 @@ threads when an exception is encountered.
 Changelog:
     Version 1.0 used gevent module for parallel method execution.
     Version 2.0 uses concurrent.futures module instead of gevent.
+    Version 2.1 waits on futures instead of polling, supports fail fast and
+                records per task timing.
 
 You add functions to be run with the spawn method::
 
@@ -45,17 +47,49 @@ If one of the spawned functions throws an exception, it will be thrown
 when iterating over the results, or when the with block ends.
 
 When the scope of with block changes, the main thread waits until all
-spawned functions have completed within the given timeout. On timeout,
-all pending threads/processes are issued shutdown command.
+spawned functions have completed. When a timeout is given and it expires,
+all pending threads/processes are issued shutdown command and a TimeoutError
+is raised.
+
+With fail_fast enabled, the first exception cancels the tasks that have not
+yet started and is raised immediately without waiting for the siblings::
+
+    with parallel(fail_fast=True) as p:
+        for node in nodes:
+            p.spawn(install, node)
+
+Results can be consumed as soon as they are available::
+
+    with parallel() as p:
+        for node in nodes:
+            p.spawn(collect, node)
+        for result in p.as_completed():
+            print(result)
+
+Timing information of every spawned task is available via the stats
+property once the with block has exited::
+
+    with parallel() as p:
+        ...
+    logger.info(p.stats)
 """
 
 import logging
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-from datetime import datetime, timedelta
-from time import sleep
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_EXCEPTION,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import as_completed, wait
+from time import monotonic
 
 logger = logging.getLogger(__name__)
 
+# Maximum wait for a result when iterating over an object without timeout
+DEFAULT_TIMEOUT = 3600
+
 
 class parallel:
     """This class is a context manager for concurrent method execution."""
@@ -66,13 +100,16 @@ class parallel:
         timeout=None,
         shutdown_cancel_pending=False,
         max_workers=None,
+        fail_fast=False,
     ):
         """Object initialization method.
 
         Args:
             thread_pool (bool)          Whether to use threads or processes.
-            timeout (int | float)       Maximum allowed time.
+            timeout (int | float)       Maximum allowed time, waits until completion if not set.
             shutdown_cancel_pending (bool) If enabled, it would cancel pending tasks.
+            max_workers (int)           Maximum number of workers.
+            fail_fast (bool)            Cancel the siblings on first exception.
         """
         if thread_pool:
             self._executor = ThreadPoolExecutor(max_workers=max_workers)
@@ -80,9 +117,13 @@ class parallel:
             self._executor = ProcessPoolExecutor(max_workers=max_workers)
         self._timeout = timeout
         self._cancel_pending = shutdown_cancel_pending
+        self._fail_fast = fail_fast
         self._futures = list()
         self._results = list()
+        self._timings = dict()
         self._iter_index = 0
+        self._start_time = None
+        self._end_time = None
 
     @property
     def count(self):
@@ -92,6 +133,76 @@ class parallel:
     def results(self):
         return self._results
 
+    @property
+    def deadline(self):
+        """Monotonic time by which all spawned tasks must complete, if timed."""
+        if not self._timeout:
+            return None
+        return self._start_time + self._timeout
+
+    def _remaining(self):
+        """Seconds left until the deadline, None when there is no timeout."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - monotonic(), 0)
+
+    @property
+    def stats(self):
+        """Timing details of the spawned tasks.
+
+        Returns:
+            dict with the below keys
+                total           Number of spawned tasks
+                completed       Number of tasks that returned successfully
+                failed          Number of tasks that raised an exception
+                cancelled       Number of tasks that were cancelled
+                pending         Number of tasks that did not complete
+                elapsed         Seconds spent within the context
+                min/max/mean    Task duration in seconds
+                tasks           List of per task timing records
+        """
+        tasks = [self._task_stats(_f) for _f in self._futures]
+        durations = [t["duration"] for t in tasks if t["duration"] is not None]
+        _end = self._end_time if self._end_time else monotonic()
+
+        return {
+            "total": len(tasks),
+            "completed": len([t for t in tasks if t["status"] == "completed"]),
+            "failed": len([t for t in tasks if t["status"] == "failed"]),
+            "cancelled": len([t for t in tasks if t["status"] == "cancelled"]),
+            "pending": len([t for t in tasks if t["status"] == "pending"]),
+            "elapsed": (_end - self._start_time) if self._start_time else 0.0,
+            "min": min(durations) if durations else 0.0,
+            "max": max(durations) if durations else 0.0,
+            "mean": sum(durations) / len(durations) if durations else 0.0,
+            "tasks": tasks,
+        }
+
+    def _task_stats(self, future):
+        """Returns the timing record of the given future."""
+        _timing = self._timings[future]
+        _finished = _timing["finished"]
+        _duration = (_finished - _timing["submitted"]) if _finished else None
+
+        if not future.done():
+            _status = "pending"
+        elif future.cancelled():
+            _status = "cancelled"
+        elif future.exception() is not None:
+            _status = "failed"
+        else:
+            _status = "completed"
+
+        return {
+            "name": _timing["name"],
+            "status": _status,
+            "duration": _duration,
+        }
+
+    def _on_done(self, future):
+        """Records the completion time of the future."""
+        self._timings[future]["finished"] = monotonic()
+
     def spawn(self, fun, *args, **kwargs):
         """Triggers the first class method.
 
@@ -103,37 +214,91 @@ class parallel:
         Returns:
             None
         """
+        if self._start_time is None:
+            self._start_time = monotonic()
+
         _future = self._executor.submit(fun, *args, **kwargs)
+        self._timings[_future] = {
+            "name": getattr(fun, "__name__", repr(fun)),
+            "submitted": monotonic(),
+            "finished": None,
+        }
         self._futures.append(_future)
+        _future.add_done_callback(self._on_done)
+
+    def as_completed(self):
+        """Yields the results of the spawned tasks as they complete.
+
+        Exceptions raised by a task are yielded instead of being raised, which
+        is consistent with iterating over the object.
+
+        Raises:
+            TimeoutError    when the tasks do not complete within the deadline.
+        """
+        _remaining = self._remaining() if self._futures else None
+        for _f in as_completed(self._futures, timeout=_remaining):
+            try:
+                yield _f.result()
+            except Exception as e:
+                logger.exception(e)
+                yield e
+
+    def _cancel(self):
+        """Cancels the tasks which have not started and releases the executor."""
+        for _f in self._futures:
+            _f.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
     def __enter__(self):
+        self._start_time = monotonic()
         return self
 
     def __exit__(self, exc_type, exc_value, trackback):
-        _not_done = self._futures[:]
-        _end_time = datetime.now() + timedelta(
-            seconds=self._timeout if self._timeout else 3600
-        )
+        if exc_value is not None and self._fail_fast:
+            self._cancel()
+            self._end_time = monotonic()
+            logger.exception(trackback)
+            return False
 
-        # Wait for all futures to complete within the given time or 1 hour.
-        while datetime.now() < _end_time:
-            # if the list is empty break
-            if len(_not_done) == 0:
-                break
+        _return_when = FIRST_EXCEPTION if self._fail_fast else ALL_COMPLETED
 
-            sleep(2.0)
-            for _f in _not_done:
-                if _f.done():
-                    _not_done.remove(_f)
+        # Wait for all futures to complete, within the timeout if given.
+        _done, _not_done = wait(
+            self._futures, timeout=self._remaining(), return_when=_return_when
+        )
+        self._end_time = monotonic()
+
+        _failed = [
+            _f
+            for _f in self._futures
+            if _f in _done and not _f.cancelled() and _f.exception()
+        ]
+        if self._fail_fast and _failed and _not_done:
+            # Fail fast, siblings are not waited upon.
+            logger.error("Cancelling %d pending tasks", len(_not_done))
+            self._cancel()
+            logger.error(
+                "Encountered an exception during parallel execution.",
+                exc_info=_failed[0].exception(),
+            )
+            raise _failed[0].exception()
 
         # Graceful shutdown of running threads
         if _not_done:
             self._executor.shutdown(wait=False, cancel_futures=self._cancel_pending)
+        else:
+            self._executor.shutdown(wait=False)
 
         if exc_value is not None:
             logger.exception(trackback)
             return False
 
+        if _not_done:
+            raise FutureTimeoutError(
+                f"{len(_not_done)} of {self.count} tasks did not complete "
+                f"within {self._timeout} seconds"
+            )
+
         # Check for any exceptions and raise
         # At this point, all threads/processes should have completed or cancelled
         try:
@@ -155,7 +320,9 @@ class parallel:
 
         try:
             # Keeping timeout consistent when called within the context
-            _timeout = self._timeout if self._timeout else 3600
+            _timeout = self._remaining()
+            if _timeout is None:
+                _timeout = DEFAULT_TIMEOUT
             out = self._futures[self._iter_index].result(timeout=_timeout)
         except Exception as e:
             logger.exception(e)
@@ -24,8 +24,10 @@ from ceph.ceph import CommandFailed, SocketTimeoutException, TimeoutException
 from ceph.ceph_admin import CephAdmin
 from ceph.parallel import parallel
 from ceph.rados import utils as osd_utils
+from ceph.waiter import WaitUntil
 from tests.rados.rados_test_util import wait_for_device_rados
 from utility import utils
+from utility.command_cache import get_command_cache
 from utility.log import Log
 
 log = Log(__name__)
@@ -171,6 +173,8 @@ class RadosOrchestrator:
         """
         Runs ceph commands with json tag for the action specified otherwise treats action as command
         and returns formatted output
+
+        Read-only queries are served from the run wide command cache when it is enabled.
         Args:
             print_output: bool to print output and error
             cmd: Command that needs to be run
@@ -180,11 +184,14 @@ class RadosOrchestrator:
         """
 
         cmd = f"{cmd} -f json"
-        try:
+
+        def _fetch():
             if client_exec:
-                out, err = self.client.exec_command(cmd=cmd, sudo=True, timeout=timeout)
-            else:
-                out, err = self.node.shell([cmd], timeout=timeout, print_output=False)
+                return self.client.exec_command(cmd=cmd, sudo=True, timeout=timeout)
+            return self.node.session_shell([cmd], timeout=timeout, print_output=False)
+
+        try:
+            out, err = get_command_cache().lookup(self.node.installer, cmd, _fetch)
         except Exception as er:
             log.error(f"Exception hit while command execution. {er}")
             raise
@@ -7236,7 +7243,8 @@ EOF"""
         Automation for bug : [1] & [2]
         Args:
             timeout: timeout in seconds or "unlimited"
-            sleep_interval: sleep timeout in seconds (default: 120)
+            sleep_interval: maximum sleep timeout in seconds (default: 120), the PG states
+                are checked more often while they are changing
             test_pool: name of the test pool, whose PG states need to be monitored.
             recovery_thread: flag to control if recovery threads are to be modified
         Returns:  True -> pass, False -> fail
@@ -7247,14 +7255,13 @@ EOF"""
             )
             self.change_recovery_threads(config={}, action="set")
 
-        end_time = None
-        if timeout == "unlimited":
-            condition = lambda: True
-        elif isinstance(timeout, int):
-            end_time = datetime.datetime.utcnow() + datetime.timedelta(seconds=timeout)
-            condition = lambda: datetime.datetime.utcnow() < end_time
-
-        while condition():
+        for w in WaitUntil(
+            timeout=None if timeout == "unlimited" else timeout,
+            interval=min(30, sleep_interval),
+            backoff=2,
+            max_interval=sleep_interval,
+            name="wait_for_clean_pg_sets",
+        ):
             health_warnings = (
                 "remapped",
                 "backfilling",
@@ -7267,6 +7274,7 @@ EOF"""
                 "backfilling_wait",
             )
             all_pg_active_clean = True
+            pg_states = []
             if test_pool:
                 log.debug(f"Checking for active + clean PGs on pool: {test_pool}")
                 pool_pg_ids = self.get_pgid(pool_name=test_pool)
@@ -7278,6 +7286,7 @@ EOF"""
                         continue
                     if any(key in health_warnings for key in pg_state.split("+")):
                         all_pg_active_clean = False
+                        pg_states.append((pg_id, pg_state))
                         log.debug(
                             f"PG: {pg_id} in states: {pg_state}"
                             f"Waiting for active + clean. "
@@ -7292,6 +7301,7 @@ EOF"""
                     status_report = self.run_ceph_command(
                         cmd="ceph report", client_exec=True
                     )
+                    pg_states = status_report["num_pg_by_state"]
                     for entry in status_report["num_pg_by_state"]:
                         if any(
                             key in health_warnings for key in entry["state"].split("+")
@@ -7301,7 +7311,7 @@ EOF"""
                         log.info(
                             f"Waiting for active + clean. Active alerts: {status_report['health']['checks'].keys()},"
                             f" PG States: {status_report['num_pg_by_state']}."
-                            f" Checking status again in {sleep_interval} seconds"
+                            f" Checking status again in at most {sleep_interval} seconds"
                         )
                         log.info(
                             f"\nceph status : {self.run_ceph_command(cmd='ceph -s', client_exec=True)}\n"
@@ -7315,7 +7325,9 @@ EOF"""
                     self.change_recovery_threads(config={}, action="rm")
                 log.info("The recovery and back-filling of the OSDs/Pool is completed")
                 return True
-            time.sleep(sleep_interval)
+
+            # Poll at the initial interval while the recovery makes progress
+            w.progress(pg_states)
 
         if recovery_thread:
             log.debug("Removing recovery thread settings")
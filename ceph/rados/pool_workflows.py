@@ -12,6 +12,7 @@ import traceback
 from ceph.ceph_admin import CephAdmin
 from ceph.rados.core_workflows import RadosOrchestrator
 from ceph.rados.rados_scrub import RadosScrubber
+from ceph.waiter import WaitUntil
 from utility.log import Log
 
 log = Log(__name__)
@@ -569,16 +570,16 @@ class PoolFunctions:
 
         Returns:  True -> pass, False -> fail
         """
-        end_time = 0
-        if timeout == "unlimited":
-            condition = lambda x: "unlimited" == x
-        elif isinstance(timeout, int):
-            end_time = datetime.datetime.now() + datetime.timedelta(seconds=timeout)
-            condition = lambda x: end_time > datetime.datetime.now()
-
         pool_id = self.get_pool_id(pool_name=pool_name)
-        while condition(end_time if isinstance(timeout, int) else timeout):
+        for w in WaitUntil(
+            timeout=None if timeout == "unlimited" else timeout,
+            interval=10,
+            backoff=2,
+            max_interval=60,
+            name="wait_for_clean_pool_pgs",
+        ):
             flag = False
+            pg_states = []
             cmd = "ceph pg dump pgs"
             pg_dump = self.rados_obj.run_ceph_command(cmd=cmd)
             for entry in pg_dump["pg_stats"]:
@@ -604,12 +605,13 @@ class PoolFunctions:
                         f"PG ID : {entry['pgid']}    ---------      PG State : {entry['state']}"
                     )
                     if not flag:
+                        pg_states.append((entry["pgid"], entry["state"]))
                         break
             if flag:
                 log.info("The recovery and back-filling of the OSD is completed")
                 return True
-            log.info("Waiting for active + clean. checking status again in a minute")
-            time.sleep(60)
+            log.info("Waiting for active + clean. checking status again")
+            w.progress(pg_states)
 
         log.error("The cluster did not reach active + Clean state")
 
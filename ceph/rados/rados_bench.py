@@ -4,16 +4,50 @@ RADOS bench testing uses the rados binary that comes with the ceph-common packag
 It contains a benchmarking facility that exercises the cluster by way of librados,
 the low level native object storage API provided by Ceph.
 
+The summary printed by every rados bench invocation is parsed into a sample with the
+bandwidth, IOPS and latency, hence a continuous run records a time series per client
+and reports the percentiles of the samples on teardown.
 """
 
+import re
+import threading
 from concurrent.futures import ALL_COMPLETED, ThreadPoolExecutor, wait
-from time import time
+from itertools import count
+from time import monotonic, time
 
 from ceph.ceph_admin.common import config_dict_to_string
 from utility.log import Log
 
 LOG = Log(__name__)
 
+BENCH_METRICS = {
+    "Total time run": "duration",
+    "Total writes made": "ops",
+    "Total reads made": "ops",
+    "Bandwidth (MB/sec)": "bandwidth",
+    "Average IOPS": "iops",
+    "Average Latency(s)": "latency",
+    "Max latency(s)": "latency_max",
+    "Min latency(s)": "latency_min",
+}
+SUMMARY_METRICS = ("bandwidth", "iops", "latency")
+PERCENTILES = (50, 90, 99)
+REPORT_TABLE = "rados_bench"
+REPORT_COLUMNS = (
+    "timestamp",
+    "client",
+    "pool",
+    "mode",
+    "iteration",
+    "concurrent_ios",
+    "bandwidth",
+    "iops",
+    "latency",
+)
+REPORT_BATCH_SIZE = 50
+_ID_COUNTER = count(1)
+_SUMMARY_LINE = re.compile(r"^\s*([A-Za-z][A-Za-z ()/]*?):\s+([-\d.]+)\s*$", re.M)
+
 
 class ClientNotFoundError(Exception):
     pass
@@ -33,7 +67,8 @@ class RadosBenchExecutionFailure(Exception):
 
 def create_id(prefix=""):
     """
-    Return unique name with prefix
+    Return unique name with prefix, the counter keeps the names created within the
+    same second by concurrent clients unique
 
     Args:
         prefix (Str): required prefix
@@ -41,7 +76,49 @@ def create_id(prefix=""):
     Returns:
         Unique Id (Str)
     """
-    return f"{prefix or 'test_run'}-{int(time())}"
+    return f"{prefix or 'test_run'}-{int(time())}-{next(_ID_COUNTER)}"
+
+
+def parse_bench_output(out):
+    """
+    Return the metrics of the rados bench summary
+
+    Args:
+        out (Str): output of a rados bench write or seq run
+
+    Returns:
+        metrics (Dict) : duration, ops, bandwidth (MB/sec), iops and latency (seconds)
+
+    Example::
+
+        Total time run:         10.0524
+        Bandwidth (MB/sec):     429.75
+        Average IOPS:           107
+        Average Latency(s):     0.148
+    """
+    metrics = dict()
+    for label, value in _SUMMARY_LINE.findall(out or ""):
+        if label in BENCH_METRICS:
+            metrics[BENCH_METRICS[label]] = float(value)
+    return metrics
+
+
+def percentile(values, pct):
+    """
+    Return the percentile of the values using linear interpolation
+
+    Args:
+        values (List): numbers
+        pct (Int): percentile between 0 and 100
+
+    Returns:
+        percentile (Float)
+    """
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
 
 
 def create_osd_pool(node, pool_name=None, pg_num=16):
@@ -97,19 +174,28 @@ def delete_osd_pool(node, pool_name):
 class RadosBench:
     """Rados Bench class to execute benchmark tests"""
 
-    def __init__(self, mon_node, clients=[]):
+    def __init__(self, mon_node, clients=[], database=None, table=REPORT_TABLE):
         """
         Initialize Rados Benchmark
 
         Args:
             mon_node (CephNode): monitor node
             clients (List): list of clients
+            database (Database): store the samples are pushed to in batches (Optional)
+            table (Str): table of the store holding the samples
 
         """
         self.SIGStop = False
         self.mon = mon_node
         self.clients = clients
         self.pools = []
+        self.tasks = []
+        self.metrics = dict()
+        self.database = database
+        self.table = table
+        self.batch_size = REPORT_BATCH_SIZE
+        self._pending = []
+        self._lock = threading.Lock()
 
     def fetch_client(self, node=""):
         """
@@ -157,10 +243,16 @@ class RadosBench:
                 check_ec(bool): flag to control Exit code checks
 
         """
+        run_name, _ = RadosBench._write(client, pool_name, **config)
+        return run_name
+
+    @staticmethod
+    def _write(client, pool_name, **config):
+        """Returns the run name and the output of the rados bench write test"""
         base_cmd = ["rados", "bench"]
         seconds = str(config.pop("seconds"))
-        _timeout = config.get("timeout", int(seconds) + 100)
-        check_ec = config.get("check_ec", True)
+        _timeout = config.pop("timeout", int(seconds) + 100)
+        check_ec = config.pop("check_ec", True)
         base_cmd.extend(["-p", pool_name, seconds, "write"])
 
         run_name = config.pop("run-name", False)
@@ -171,10 +263,10 @@ class RadosBench:
         base_cmd.append(config_dict_to_string(config))
         base_cmd = " ".join(base_cmd)
 
-        client.exec_command(
+        out, _ = client.exec_command(
             cmd=base_cmd, sudo=True, timeout=_timeout, check_ec=check_ec
         )
-        return run_name if run_name else None
+        return run_name if run_name else None, out
 
     @staticmethod
     def sequential_read(client, pool_name, **config):
@@ -204,6 +296,12 @@ class RadosBench:
         :warning: there should be a write operation pre-executed.
 
         """
+        run_name, _ = RadosBench._sequential_read(client, pool_name, **config)
+        return run_name
+
+    @staticmethod
+    def _sequential_read(client, pool_name, **config):
+        """Returns the run name and the output of the rados bench seq test"""
         base_cmd = ["rados", "bench"]
 
         run_name = config.get("run-name")
@@ -215,8 +313,8 @@ class RadosBench:
 
         base_cmd = " ".join(base_cmd)
 
-        client.exec_command(cmd=base_cmd, sudo=True)
-        return run_name if run_name else None
+        out, _ = client.exec_command(cmd=base_cmd, sudo=True)
+        return run_name if run_name else None, out
 
     @staticmethod
     def cleanup(client, pool_name, run_name=""):
@@ -244,38 +342,139 @@ class RadosBench:
     def initiate_stop_signal(self):
         self.SIGStop = True
 
-    def continuous_run(self, client, pool_name, duration):
+    def record(self, client, pool_name, mode, iteration, out, **labels):
+        """
+        Parse the rados bench output into a sample of the client time series
+
+        Args:
+            client (CephNode): client node which executed the benchmark
+            pool_name (Str): ceph OSD pool name
+            mode (Str): write or seq
+            iteration (Int): iteration of the continuous run
+            out (Str): rados bench output
+            labels (Dict): additional fields of the sample, e.g. concurrent_ios
+
+        Returns:
+            sample (Dict)
+        """
+        sample = {
+            "timestamp": time(),
+            "client": client.shortname,
+            "pool": pool_name,
+            "mode": mode,
+            "iteration": iteration,
+            **labels,
+            **parse_bench_output(out),
+        }
+        LOG.info(
+            f"[ {pool_name}-{client.shortname} ] {mode} #{iteration}: "
+            f"{sample.get('bandwidth')} MB/s, {sample.get('iops')} IOPS, "
+            f"{sample.get('latency')}s latency"
+        )
+
+        batch = []
+        with self._lock:
+            self.metrics.setdefault(client.shortname, []).append(sample)
+            if self.database:
+                self._pending.append(sample)
+                if len(self._pending) >= self.batch_size:
+                    batch, self._pending = self._pending, []
+
+        self._push(batch)
+        return sample
+
+    def _push(self, samples):
+        """Insert the samples into the report store, failures are only logged"""
+        if not samples:
+            return
+        rows = [tuple(_s.get(col) for col in REPORT_COLUMNS) for _s in samples]
+        try:
+            self.database.insert_many(self.table, REPORT_COLUMNS, rows)
+        except Exception as err:  # noqa
+            LOG.error(f"Unable to push {len(rows)} RadosBench samples: {err}")
+
+    def flush(self):
+        """Push the pending samples to the report store"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        self._push(batch)
+
+    @staticmethod
+    def _schedule(config):
+        """
+        Yield the steps of the schedule, the last step is repeated until stopped.
+
+        Args:
+            config (Dict): benchmark execution config
+
+        Example::
+
+            config:
+                duration: 10
+                schedule:
+                  - for: 300             # seconds the step lasts
+                    concurrent-ios: 4    # rate, number of concurrent operations
+                  - for: 300
+                    concurrent-ios: 16
+                    seconds: 30          # duration of every write and seq run
+        """
+        steps = config.get("schedule") or [{}]
+        for index, step in enumerate(steps):
+            step = dict(step)
+            step.setdefault("seconds", config.get("duration", 10))
+            if index == len(steps) - 1:
+                step.pop("for", None)
+            yield step
+
+    def continuous_run(self, client, pool_name, duration, schedule=None):
         """
         run indefinite loop of rados bench IOs with data provided
           - write
           - sequential read
           - cleanup
 
+        The bandwidth, IOPS and latency of every write and read are recorded in
+        self.metrics keyed by the client name.
+
         Args:
             client (CephNode): client node to execute rados benchmark commands
             pool_name (Str): ceph OSD pool name
             duration (Int): duration of benchmark run in seconds
+            schedule (List): rate/duration steps, refer RadosBench._schedule
 
         """
+        iteration = 0
         try:
             LOG.info(
                 f"[ {pool_name}-{client.shortname} ] RadosBench execution Initiated...."
             )
-            while not self.stop_signal():
-                run_name = ""
-                try:
-                    config = {
-                        "seconds": str(duration),
-                        "run-name": True,
-                        "no-cleanup": True,
-                    }
-                    run_name = self.write(client, pool_name, **config)
-                    config["run-name"] = run_name
-                    self.sequential_read(client, pool_name, **config)
-                except Exception:  # no qa
-                    raise RadosBenchExecutionFailure
-                finally:
-                    self.cleanup(client, pool_name, run_name)
+            for step in self._schedule({"duration": duration, "schedule": schedule}):
+                step_end = monotonic() + step.pop("for") if "for" in step else None
+                labels = {"concurrent_ios": step.get("concurrent-ios")}
+                while not self.stop_signal():
+                    if step_end and monotonic() >= step_end:
+                        break
+
+                    iteration += 1
+                    run_name = ""
+                    try:
+                        config = {
+                            **step,
+                            "seconds": str(step["seconds"]),
+                            "run-name": True,
+                            "no-cleanup": True,
+                        }
+                        run_name, out = self._write(client, pool_name, **config)
+                        self.record(
+                            client, pool_name, "write", iteration, out, **labels
+                        )
+                        config["run-name"] = run_name
+                        _, out = self._sequential_read(client, pool_name, **config)
+                        self.record(client, pool_name, "seq", iteration, out, **labels)
+                    except Exception:  # no qa
+                        raise RadosBenchExecutionFailure
+                    finally:
+                        self.cleanup(client, pool_name, run_name)
         finally:
             LOG.info(
                 f"[ {pool_name}-{client.shortname} ] RadosBench execution Ended...."
@@ -290,15 +489,69 @@ class RadosBench:
         """
         wait(self.tasks, return_when=ALL_COMPLETED)
 
+    def summary(self):
+        """
+        Return the aggregate of the recorded samples
+
+        Returns:
+            summary (Dict): samples count, min, max, mean and percentiles of the
+                            bandwidth, IOPS and latency keyed by client and mode,
+                            the client "all" aggregates every client.
+
+        Example::
+
+            {"all": {"write": {"bandwidth": {"count": 4, "p50": 420.5, ...}}}}
+        """
+        with self._lock:
+            series = {_c: list(_s) for _c, _s in self.metrics.items()}
+        series["all"] = [_s for samples in series.values() for _s in samples]
+
+        summary = dict()
+        for client, samples in series.items():
+            for mode in sorted({_s["mode"] for _s in samples}):
+                for metric in SUMMARY_METRICS:
+                    values = [
+                        _s[metric]
+                        for _s in samples
+                        if _s["mode"] == mode and metric in _s
+                    ]
+                    if not values:
+                        continue
+                    stats = {
+                        "count": len(values),
+                        "min": min(values),
+                        "max": max(values),
+                        "mean": sum(values) / len(values),
+                    }
+                    stats.update(
+                        {f"p{_p}": percentile(values, _p) for _p in PERCENTILES}
+                    )
+                    summary.setdefault(client, {}).setdefault(mode, {})[metric] = stats
+        return summary
+
     def teardown(self):
         """
         cleanup bench mark residues
         - remove pools
         - wait for tasks completion with cleanup
+        - report the percentiles of the recorded samples
+
+        Returns:
+            summary (Dict): refer RadosBench.summary
         """
         self.initiate_stop_signal()
         self.wait_for_completion()
+        self.flush()
+
+        summary = self.summary()
+        for mode, metrics in summary.get("all", {}).items():
+            for metric, stats in metrics.items():
+                LOG.info(
+                    f"RadosBench {mode} {metric}: "
+                    + ", ".join(f"{_k}={_v:.3f}" for _k, _v in stats.items())
+                )
         LOG.info("RadosBench Execution Completed......")
+        return summary
 
     def run(self, config):
         """
@@ -319,29 +572,37 @@ class RadosBench:
                 duration (int): benchmark duration
                 pg_num (int): placement group number
                 pool_per_client (bool): True - pool per client, False - one pool used by all clients
+                schedule (list): rate/duration steps, refer RadosBench._schedule
+                batch_size (int): samples pushed together to the report store
         """
         LOG.info("RadosBench Execution Started ......")
         duration = config.get("duration")
         pg_num = config.get("pg_num")
-        pool_per_placement = config.get("pool_per_placement")
+        pool_per_client = config.get(
+            "pool_per_client", config.get("pool_per_placement")
+        )
+        schedule = config.get("schedule")
+        self.batch_size = config.get("batch_size", self.batch_size)
 
         self.pools = create_pools(
             node=self.mon,
-            num_pools=len(self.clients) if pool_per_placement else 1,
+            num_pools=len(self.clients) if pool_per_client else 1,
             pg_num=pg_num,
         )
 
         if len(self.pools) == 1:
-            clients = dict((i, self.pools[0]) for i in self.clients)
+            clients = [(i, self.pools[0]) for i in self.clients]
         else:
-            clients = zip(self.clients, self.pools)
+            clients = list(zip(self.clients, self.pools))
 
         self.executor = ThreadPoolExecutor()
         self.tasks = []
         try:
-            for client, pool in clients.items():
+            for client, pool in clients:
                 self.tasks.append(
-                    self.executor.submit(self.continuous_run, client, pool, duration)
+                    self.executor.submit(
+                        self.continuous_run, client, pool, duration, schedule
+                    )
                 )
         except BaseException as err:  # noqa
             LOG.error(err, exc_info=True)
@@ -0,0 +1,48 @@
+from cli.utilities.batch import BATCH_CONCURRENCY
+from utility.log import Log
+
+log = Log(__name__)
+
+
+def rbd_batch(rbd, ops, concurrency=BATCH_CONCURRENCY, **kw):
+    """
+    Execute the rbd operations on the client in a single remote invocation
+    Args:
+        rbd: cli.rbd.Rbd object
+        ops: list of (method, config) where method is one of Rbd.BATCH_METHODS,
+             e.g. "clone", "snap.create", "trash.mv", "migration.prepare", and
+             config its keyword arguments
+        concurrency: number of operations executed at the same time on the client
+        kw: op_timeout, max_output and timeout, refer cli.utilities.batch.run_batch
+
+    Returns:
+        list of BatchResult having cmd, rc, duration, out and err per operation
+
+    Example::
+
+        ops = [("flatten", {"image-spec": f"pool/clone{i}"}) for i in range(1000)]
+        results = rbd_batch(rbd, ops, concurrency=16)
+    """
+    with rbd.batch(concurrency=concurrency, **kw) as batch:
+        for method, config in ops:
+            batch.add(method, **config)
+    return batch.results
+
+
+def batch_failures(results, expect=None):
+    """
+    Return the failed operations of the batch
+    Args:
+        results: list of BatchResult returned by rbd_batch
+        expect: string expected in the output of every operation (optional)
+
+    Returns:
+        list of BatchResult which returned a non zero exit code or lack the string
+    """
+    failed = [r for r in results if r.rc or (expect and expect not in r.out + r.err)]
+    if failed:
+        log.error(
+            f"{len(failed)} of {len(results)} operations failed, e.g. "
+            f"{failed[0].cmd}: {(failed[0].out + failed[0].err).strip()[-500:]}"
+        )
+    return failed
@@ -4,7 +4,6 @@ import os
 import random
 import re
 import time
-import traceback
 from json import loads
 from pathlib import Path
 from time import mktime, sleep
@@ -13,7 +12,6 @@ from typing import Tuple
 import requests
 import yaml
 from htmllistparse import fetch_listing
-from libcloud.common.exceptions import BaseHTTPError
 from libcloud.compute.providers import get_driver
 from libcloud.compute.types import Provider
 from packaging.version import Version
@@ -33,7 +31,15 @@ from compute.onecloud import (
     resolve_image_for_site,
     resolve_project_for_site,
 )
-from compute.openstack import CephVMNodeV2, NetworkOpFailure, NodeError, VolumeOpFailure
+from compute.openstack import (
+    AUTH_CACHE,
+    CephVMNodeV2,
+    NetworkOpFailure,
+    NodeError,
+    VolumeOpFailure,
+)
+from compute.openstack_cleanup import OpenStackCleanup
+from compute.rate_limiter import get_rate_limiter
 from utility.log import Log
 from utility.retry import retry
 from utility.utils import (
@@ -282,7 +288,8 @@ def create_ibmc_ceph_nodes(
         else:
             params["root-login"] = True
 
-        with parallel() as p:
+        limiter = get_rate_limiter("ibmc")
+        with parallel(max_workers=limiter.max_concurrent) as p:
             for node in range(1, 100):
                 node = "node" + str(node)
                 if not ceph_cluster.get(node):
@@ -314,8 +321,6 @@ def create_ibmc_ceph_nodes(
                 if node_dict.get("cloud-data"):
                     node_params["cloud-data"] = node_dict.get("cloud-data")
 
-                # Throttling the spawning of VSI's to avoid hammering of provisioner
-                sleep(node_count * 5)
                 node_count += 1
 
                 p.spawn(setup_vm_node_ibm, node, ceph_nodes, **node_params)
@@ -568,7 +573,7 @@ def create_onecloud_ceph_nodes(
             body["arch"] = arch
 
         log.info("Deploying OneCloud cluster with %d VMs", len(virtual_machines))
-        resp = client.post("/clusters", json=body)
+        resp = get_rate_limiter("onecloud").call(client.post, "/clusters", json=body)
         if resp.status_code in (200, 201):
             break
         err_text = resp.text.lower()
@@ -778,9 +783,9 @@ def create_ceph_nodes(
         else:
             params["root-login"] = True
 
-        with parallel() as p:
+        limiter = get_rate_limiter("openstack")
+        with parallel(max_workers=limiter.max_concurrent) as p:
             for node in range(1, 100):
-                sleep(10 * node)
                 node = "node" + str(node)
                 if not ceph_cluster.get(node):
                     break
@@ -962,7 +967,8 @@ def create_aws_ceph_nodes(
         else:
             params["root-login"] = True
 
-        with parallel() as p:
+        limiter = get_rate_limiter("aws")
+        with parallel(max_workers=limiter.max_concurrent) as p:
             for node in range(1, 100):
                 node_key = "node" + str(node)
                 if not ceph_cluster.get(node_key):
@@ -997,7 +1003,6 @@ def create_aws_ceph_nodes(
                 if node_dict.get("cloud-data"):
                     node_params["cloud-data"] = node_dict.get("cloud-data")
 
-                sleep(node_count * 5)
                 node_count += 1
                 p.spawn(setup_vm_node_aws, node_key, ceph_nodes, **node_params)
 
@@ -1082,76 +1087,36 @@ def get_openstack_driver(yaml):
         ex_force_service_region=service_region,
         ex_domain_name=domain_name,
         ex_tenant_domain_id=tenant_domain_id,
+        ex_auth_cache=AUTH_CACHE,
     )
     return driver
 
 
 def cleanup_ceph_nodes(osp_cred, pattern=None, timeout=300):
     log.info("Destroying existing osp instances..")
-    user = os.getlogin()
-    name = pattern if pattern else "-{user}-".format(user=user)
-    driver = get_openstack_driver(osp_cred)
-    timeout = datetime.timedelta(seconds=timeout)
-    with parallel() as p:
-        for volume in driver.list_volumes():
-            if volume.name is None:
-                log.info("Volume has no name, skipping")
-            elif name in volume.name:
-                p.spawn(volume_cleanup, volume, osp_cred)
-                sleep(1)
-        sleep(30)
-        log.info("Done cleaning up volumes")
-        for node in driver.list_nodes():
-            if name in node.name:
-                starttime = datetime.datetime.now()
-                log.info(
-                    "Destroying node {node_name} with {timeout} timeout".format(
-                        node_name=node.name, timeout=timeout
-                    )
-                )
-                while True:
-                    try:
-                        node.destroy()
-                        break
-                    except AttributeError:
-                        if datetime.datetime.now() - starttime > timeout:
-                            raise RuntimeError(
-                                "Failed to destroy node {node_name} with {timeout} timeout:\n{stack_trace}".format(
-                                    node_name=node.name,
-                                    timeout=timeout,
-                                    stack_trace=traceback.format_exc(),
-                                )
-                            )
-                        else:
-                            sleep(1)
-                sleep(5)
+    name = pattern if pattern else "-{user}-".format(user=os.getlogin())
+    cleanup = OpenStackCleanup(
+        lambda: get_openstack_driver(osp_cred), name, timeout=timeout
+    )
+    remaining = cleanup.run()
+    log.info("Done cleaning up volumes")
+
+    if remaining["nodes"]:
+        raise RuntimeError(
+            "Failed to destroy nodes {nodes} with {timeout}s timeout".format(
+                nodes=[node.name for node in remaining["nodes"]], timeout=timeout
+            )
+        )
     log.info("Done cleaning up nodes")
 
 
 def volume_cleanup(volume, osp_cred):
     log.info("Removing volume %s", volume.name)
-    errors = {}
-    driver = get_openstack_driver(osp_cred)
-    sleep(10)
-    timeout = datetime.timedelta(seconds=200)
-    starttime = datetime.datetime.now()
-    while True:
-        try:
-            volobj = driver.ex_get_volume(volume.id)
-            driver.detach_volume(volobj)
-            sleep(30)
-            driver.destroy_volume(volobj)
-            break
-        except BaseHTTPError as e:
-            log.error(e, exc_info=True)
-            errors.update({volume.name: e.message})
-            if errors:
-                if datetime.datetime.now() - starttime > timeout:
-                    for vol, err in errors.items():
-                        log.error(
-                            "Error destroying {vol}: {err}".format(vol=vol, err=err)
-                        )
-                    return 1
+    cleanup = OpenStackCleanup(
+        lambda: get_openstack_driver(osp_cred), volume.name, timeout=200
+    )
+    if cleanup.cleanup_volumes([volume]):
+        return 1
 
 
 def keep_alive(ceph_nodes):
@@ -1,6 +1,83 @@
-"""Helper object to encapsulate waiting for timeouts"""
+"""Helper object to encapsulate waiting for timeouts
 
+The waiter polls at the given interval which optionally grows by the backoff factor
+up to max_interval while nothing changes. Reporting progress via ``progress()``
+resets the interval, so that a cluster which is converging is polled often and a
+stalled one is polled rarely.
+
+A waiter can be bound to a parent deadline, the wait then ends at the earlier of its
+own timeout and the parent deadline. The time taken by every wait is recorded and
+summarized using log_wait_summary.
+
+Example::
+
+    for w in WaitUntil(timeout=600, interval=5, backoff=2, max_interval=60):
+        status = get_pg_states()
+        if all_clean(status):
+            break
+        w.progress(status)
+
+    if w.expired:
+        raise TimeoutError("PGs are not active+clean")
+"""
+
+import sys
+import threading
 import time
+from collections import deque
+
+from utility.log import Log
+
+LOG = Log(__name__)
+
+MAX_RECORDS = 10000
+
+_RECORDS = deque(maxlen=MAX_RECORDS)
+_RECORDS_LOCK = threading.Lock()
+_NOT_SET = object()
+
+
+def get_wait_records():
+    """Return the timing records of the waits, the most recent being the last."""
+    with _RECORDS_LOCK:
+        return [dict(_record) for _record in _RECORDS]
+
+
+def clear_wait_records():
+    """Drop all the timing records."""
+    with _RECORDS_LOCK:
+        _RECORDS.clear()
+
+
+def log_wait_summary(top=10):
+    """
+    Write the waits that took the most time to the run log.
+
+    Args:
+        top (Int): Number of wait names to be listed.
+    """
+    summary = dict()
+    for record in get_wait_records():
+        entry = summary.setdefault(
+            record["name"], {"count": 0, "elapsed": 0.0, "max": 0.0, "expired": 0}
+        )
+        entry["count"] += 1
+        entry["elapsed"] += record["elapsed"]
+        entry["max"] = max(entry["max"], record["elapsed"])
+        entry["expired"] += int(record["expired"])
+
+    if not summary:
+        return
+
+    lines = ["Time spent waiting:"]
+    for name, entry in sorted(
+        summary.items(), key=lambda _item: _item[1]["elapsed"], reverse=True
+    )[:top]:
+        lines.append(
+            f"  {name}: {entry['count']} waits, {entry['elapsed']:.1f}s total, "
+            f"{entry['max']:.1f}s max, {entry['expired']} expired"
+        )
+    LOG.info("\n".join(lines))
 
 
 class WaitUntil(object):
@@ -10,23 +87,181 @@ class WaitUntil(object):
     to write the retry logic in a for-loop.
     """
 
-    def __init__(self, timeout=60, interval=1):
+    def __init__(
+        self,
+        timeout=60,
+        interval=1,
+        backoff=1.0,
+        max_interval=None,
+        deadline=None,
+        name=None,
+    ):
+        """
+        Initialize the waiter, the clock starts at the first iteration.
+
+        Args:
+            timeout (Int): Maximum seconds to wait, None waits until the deadline
+            interval (Int): Seconds to wait between attempts
+            backoff (Float): Multiplier applied to the interval after every attempt
+            max_interval (Int): Upper bound of the interval, defaults to timeout
+            deadline (Float | WaitUntil): time.monotonic value or a parent waiter
+                                          whose deadline bounds this wait
+            name (Str): Name of the wait in the timing records, defaults to the
+                        name of the calling function
+        """
         self.timeout = timeout
         self.interval = interval
+        self.backoff = backoff
+        self.max_interval = max_interval
         self.expired = False
+        self.name = name or sys._getframe(1).f_code.co_name
+        self._parent = deadline
+        self._current = interval
+        self._marker = _NOT_SET
         self._attempt = 0
         self._start = None
+        self._end = None
+        self._record = None
+
+    @property
+    def attempts(self):
+        """Return the number of attempts made."""
+        return self._attempt
+
+    @property
+    def elapsed(self):
+        """Return the seconds elapsed since the first attempt."""
+        return 0.0 if self._start is None else time.monotonic() - self._start
+
+    @property
+    def deadline(self):
+        """Return the time.monotonic value at which the wait ends, None if unbounded."""
+        if self._start is None:
+            self._begin()
+        return self._end
+
+    @property
+    def remaining(self):
+        """Return the seconds left before the deadline, None if unbounded."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def _begin(self):
+        self._start = time.monotonic()
+        ends = []
+        if self.timeout is not None:
+            ends.append(self._start + self.timeout)
+
+        parent = self._parent
+        if isinstance(parent, WaitUntil):
+            parent = parent.deadline
+        if parent is not None:
+            ends.append(parent)
+
+        self._end = min(ends) if ends else None
+        self._record = {
+            "name": self.name,
+            "timeout": self.timeout,
+            "attempts": 0,
+            "elapsed": 0.0,
+            "expired": False,
+        }
+        with _RECORDS_LOCK:
+            _RECORDS.append(self._record)
+
+    def progress(self, marker=_NOT_SET):
+        """
+        Report progress, the next attempt is made after the initial interval.
+
+        Args:
+            marker: Value describing the observed state. The interval is reset only
+                    when it differs from the previous value. Without a marker, the
+                    interval is always reset.
+        """
+        if marker is not _NOT_SET:
+            changed = marker != self._marker
+            self._marker = marker
+            if not changed:
+                return
+
+        self._current = self.interval
+
+    def _next_interval(self):
+        interval = self._current
+        self._current *= self.backoff
+        upper = self.max_interval if self.max_interval is not None else self.timeout
+        if upper is not None:
+            self._current = min(self._current, max(upper, self.interval))
+        return interval
 
     def __iter__(self):
         return self
 
     def __next__(self):
         if self._start is None:
-            self._start = time.time()
-        if time.time() - self._start > self.timeout:
+            self._begin()
+
+        if self._end is not None and time.monotonic() >= self._end:
             self.expired = True
+            self._record.update(elapsed=self.elapsed, expired=True)
             raise StopIteration()
+
+        # The last attempt is made at the deadline
         if self._attempt != 0:
-            time.sleep(self.interval)
+            interval = self._next_interval()
+            if self._end is not None:
+                interval = min(interval, self._end - time.monotonic())
+
+            if interval > 0:
+                time.sleep(interval)
+
         self._attempt += 1
+        self._record.update(attempts=self._attempt, elapsed=self.elapsed)
         return self
+
+
+def wait_until(
+    predicate,
+    timeout=60,
+    interval=1,
+    backoff=1.0,
+    max_interval=None,
+    progress=None,
+    deadline=None,
+    name=None,
+):
+    """
+    Poll the predicate until it returns a truthy value or the wait expires.
+
+    Args:
+        predicate (Callable): Returns a truthy value when the condition is met
+        timeout (Int): Maximum seconds to wait, None waits until the deadline
+        interval (Int): Initial seconds to wait between attempts
+        backoff (Float): Multiplier applied to the interval after every attempt
+        max_interval (Int): Upper bound of the interval
+        progress (Callable): Returns a value describing the state, a change in the
+                             value resets the interval
+        deadline (Float | WaitUntil): Deadline of the parent wait
+        name (Str): Name of the wait in the timing records
+
+    Returns:
+        The value returned by the predicate, False if the wait expired.
+    """
+    waiter = WaitUntil(
+        timeout=timeout,
+        interval=interval,
+        backoff=backoff,
+        max_interval=max_interval,
+        deadline=deadline,
+        name=name or sys._getframe(1).f_code.co_name,
+    )
+    for w in waiter:
+        result = predicate()
+        if result:
+            return result
+
+        if progress is not None:
+            w.progress(progress())
+
+    return False
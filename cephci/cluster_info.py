@@ -2,10 +2,13 @@ import json
 import os
 import pickle
 import re
+from time import monotonic
 
 import yaml
 from docopt import docopt
 
+from ceph.ceph import TimeoutException
+from ceph.parallel import parallel
 from cli.cephadm.cephadm import CephAdm
 from cli.utilities.packages import Rpm, SubscriptionManager
 from cli.utilities.utils import (
@@ -23,6 +26,9 @@ log = Log(__name__)
 CEPH_VAR_LOG_DIR = "/var/log/ceph"
 _CEPH_VAR_LOG_DIR = "var/log/ceph"
 CEPH_COREDUMP_DIR = "/var/lib/systemd/coredump/"
+_CEPH_COREDUMP_DIR = "var/lib/systemd/coredump"
+# Maximum time in seconds allowed for collecting an archive from a node
+NODE_COLLECTION_TIMEOUT = 900
 
 doc = """
 Utility to gather cluster information
@@ -141,66 +147,129 @@ def get_container_details(node):
     return _info
 
 
+def gather_node_info(node):
+    """Gather configuration info of the node"""
+    _info = get_node_details(node)
+    _info.update({"List_of_packages": get_installed_packages(node)})
+    if node.role == "installer":
+        _info.update({"Cluster_details": get_cluster_details(node)})
+
+    if node.role != "client":
+        _info.update({"List_of_images": get_container_images_details(node)})
+        _info.update({"List_of_containers": get_container_details(node)})
+
+    if node.role == "osd":
+        _info.update({"List_of_host_ceph_disks": get_osd_host_disks(node)})
+
+    return _info
+
+
 def gather_info(cluster):
     """Gather cluster configuration info"""
-    info, nodes = {}, cluster.get_nodes()
-    for node in nodes:
-        _info = get_node_details(node)
-        _info.update({"List_of_packages": get_installed_packages(node)})
-        if node.role == "installer":
-            _info.update({"Cluster_details": get_cluster_details(node)})
+    nodes = cluster.get_nodes()
+    with parallel() as p:
+        for node in nodes:
+            p.spawn(gather_node_info, node)
+
+    return {node.hostname: _info for node, _info in zip(nodes, p.results)}
+
+
+def collect_node_archive(node, path, dst, timeout=NODE_COLLECTION_TIMEOUT):
+    """
+    Stream a compressed archive of the remote path into the local file.
+
+    Args:
+        node (CephNode): Node from which the archive is collected
+        path (str): Path relative to / to be archived
+        dst (str): Local file path
+        timeout (int): Maximum time allowed for the node
+
+    Returns:
+        Manifest entry having the node, file, size, duration and status
+    """
+    start, size, status = monotonic(), 0, "failed"
+    try:
+        size, rc, err = node.download_command_output(
+            cmd=f"tar -C / --warning=no-file-changed -czf - {path}",
+            dst=dst,
+            sudo=True,
+            timeout=timeout,
+        )
+        # tar returns 1 when files changed while being archived
+        status = "complete" if rc in (0, 1) else "failed"
+        if status == "failed":
+            log.error(f"Failed to archive {path} on {node.hostname}: {err}")
+    except TimeoutException as e:
+        status = "timeout"
+        log.error(f"Failed to collect {path} from {node.hostname}: {e}")
+        size = os.path.getsize(dst) if os.path.exists(dst) else 0
+    except Exception as e:
+        log.error(f"Failed to collect {path} from {node.hostname}: {e}")
+        size = os.path.getsize(dst) if os.path.exists(dst) else 0
+
+    return {
+        "node": node.hostname,
+        "file": os.path.basename(dst),
+        "size": size,
+        "duration": round(monotonic() - start, 3),
+        "status": status,
+    }
 
-        if node.role != "client":
-            _info.update({"List_of_images": get_container_images_details(node)})
-            _info.update({"List_of_containers": get_container_details(node)})
 
-        if node.role == "osd":
-            _info.update({"List_of_host_ceph_disks": get_osd_host_disks(node)})
+def collect_cluster_archives(cluster, path, download_dir, suffix, timeout):
+    """
+    Collect the archive of the path from all nodes of the cluster concurrently.
+
+    A manifest of the archives is written into the download directory.
 
-        info.update({node.hostname: _info})
+    Args:
+        cluster (Ceph): Ceph cluster object
+        path (str): Path relative to / to be archived
+        download_dir (str): Local directory to store the archives
+        suffix (str): Suffix of the archive file name
+        timeout (int): Maximum time allowed per node
 
-    return info
+    Returns:
+        List of manifest entries
+    """
+    os.makedirs(download_dir, exist_ok=True)
+    nodes = cluster.get_nodes()
+    with parallel(timeout=timeout + 60) as p:
+        for node in nodes:
+            dst = os.path.join(download_dir, f"{node.hostname}-{suffix}.tar")
+            log.info(f"Downloading {dst} from {node.hostname}")
+            p.spawn(collect_node_archive, node, path, dst, timeout)
+
+    manifest = p.results
+    cluster_name = getattr(cluster, "name", None) or "ceph"
+    write_output(
+        {"archives": manifest, "elapsed": round(p.stats["elapsed"], 3)},
+        os.path.join(download_dir, f"{cluster_name}-{suffix}-manifest.yaml"),
+    )
 
+    return manifest
 
-def get_ceph_var_logs(cluster, log_dir):
+
+def get_ceph_var_logs(cluster, log_dir, timeout=NODE_COLLECTION_TIMEOUT):
     """
     This method is to download and store
     ceph cluster var logs into log directory.
     """
     download_dir = os.path.join(log_dir, "ceph_logs")
-    os.makedirs(download_dir, exist_ok=True)
-    for node in cluster.get_nodes():
-        tar_file = f"{node.hostname}-cephlog.tar"
-        node.exec_command(
-            cmd=f"tar -C / --warning=no-file-changed -cvzf {tar_file} {_CEPH_VAR_LOG_DIR}",
-            sudo=True,
-        )
-
-        node.download_file(
-            src=tar_file,
-            dst=os.path.join(download_dir, tar_file),
-            sudo=True,
-        )
-        log.info(f"Downloading {tar_file} from {node.hostname} to {download_dir}")
+    return collect_cluster_archives(
+        cluster, _CEPH_VAR_LOG_DIR, download_dir, "cephlog", timeout
+    )
 
 
-def collect_ceph_coredumps(cluster, _dir):
+def collect_ceph_coredumps(cluster, _dir, timeout=NODE_COLLECTION_TIMEOUT):
     """
     This method is to download and store
     ceph coredumps into custom directory.
     """
     download_dir = os.path.join(_dir, "ceph_coredumps")
-    os.makedirs(download_dir, exist_ok=True)
-    for node in cluster.get_nodes():
-        tar_file = f"{node.hostname}-coredump.tar"
-        node.exec_command(cmd=f"tar -cvzf {tar_file} {CEPH_COREDUMP_DIR}", sudo=True)
-
-        node.download_file(
-            src=tar_file,
-            dst=os.path.join(download_dir, tar_file),
-            sudo=True,
-        )
-        log.info(f"Downloading {tar_file} from {node.hostname} to {download_dir}")
+    return collect_cluster_archives(
+        cluster, _CEPH_COREDUMP_DIR, download_dir, "coredump", timeout
+    )
 
 
 def write_output(data, output):
@@ -9,6 +9,7 @@ from utils.utility import set_logging_env
 
 from cli.exceptions import NotSupportedError
 from utility.log import Log
+from utility.retry import retry
 
 LOG = Log(__name__)
 
@@ -16,6 +17,12 @@ DEFAULT_PROJECT = "CEPH"
 DEFAULT_QUERY = "NOT HAS_VALUE:resolution AND type:testcase AND NOT status:inactive AND caseautomation.KEY:automated"
 TEST_FILTER = "staticQueryResult"
 
+# Bulk update of the test records, a testcase reported by several xunit files
+# keeps the result of the highest severity.
+RESULT_SEVERITY = {"passed": 0, "failed": 1}
+# Number of updated records between two progress messages
+PROGRESS_INTERVAL = 50
+
 
 doc = """
 Utility to report result to service
@@ -123,45 +130,148 @@ def create_testrun(
         raise Exception(msg)
 
 
+@retry(Exception, tries=3, delay=5)
+def _update_test_record(TestRun, record):
+    TestRun.update_test_record_by_fields(**record)
+
+
 def _update_testrun(TestRun, testcase_id, result, comment, user, executed, duration):
     """Update testrun results"""
     LOG.info(f"Updating polarion with testcase '{testcase_id}'")
     try:
-        TestRun.update_test_record_by_fields(
-            test_case_id=testcase_id,
-            test_result=result,
-            test_comment=comment,
-            executed_by=user,
-            executed=executed,
-            duration=duration,
+        _update_test_record(
+            TestRun,
+            dict(
+                test_case_id=testcase_id,
+                test_result=result,
+                test_comment=comment,
+                executed_by=user,
+                executed=executed,
+                duration=duration,
+            ),
         )
         LOG.info(f"Updated testcase '{testcase_id}' in polarion")
+        return True
     except Exception as e:
         LOG.error(f"Failed to update testcase '{testcase_id}' with error: \n{str(e)}")
+        return False
 
 
-def update_test_results(testrun_id, xunit, user):
-    """Update testrun with xunit results"""
-    from pylero.test_run import TestRun
+def parse_test_records(xunit, user):
+    """Yield the test records of the xunit file.
 
-    TestRun = TestRun(test_run_id=testrun_id, project_id=project)
+    The file is parsed with iterparse and every testcase element is released
+    once processed, hence large files are not held in memory.
 
-    LOG.info(f"Updating testruns '{testrun_id}' with results '{xunit}'")
-    root = ET.parse(xunit).getroot()
-    for tc in root.findall("testsuite/testcase"):
-        result, executed = "passed", datetime.datetime.now()
-        duration, comment = tc.attrib.get("time"), tc.attrib.get("name")
-        for properties in tc:
-            # Check for failed message
-            if properties.tag == "failure":
-                result = "failed"
+    Args:
+        xunit: Path to the xunit file
+        user: Polarion user executing the tests
+    """
+    for _, elem in ET.iterparse(xunit, events=("end",)):
+        if elem.tag != "testcase":
+            continue
 
-            # Update polarion with testcase id
+        result = "failed" if elem.find("failure") is not None else "passed"
+        for properties in elem:
             for property in properties:
                 testcase_id = property.attrib.get("value")
-                _update_testrun(
-                    TestRun, testcase_id, result, comment, user, executed, duration
+                if not testcase_id:
+                    continue
+
+                yield dict(
+                    test_case_id=testcase_id,
+                    test_result=result,
+                    test_comment=elem.attrib.get("name"),
+                    executed_by=user,
+                    executed=datetime.datetime.now(),
+                    duration=elem.attrib.get("time"),
                 )
+        elem.clear()
+
+
+def collect_test_records(xunits, user):
+    """Return the test records of the xunit files, one per testcase.
+
+    Args:
+        xunits: Paths to the xunit files
+        user: Polarion user executing the tests
+    """
+    records = dict()
+    for xunit in xunits:
+        if not os.path.exists(xunit):
+            LOG.error(
+                f"xunit results {xunit} not present. Skipping polarion update ..."
+            )
+            continue
+
+        for record in parse_test_records(xunit, user):
+            previous = records.get(record["test_case_id"])
+            if previous and RESULT_SEVERITY.get(
+                previous["test_result"], 0
+            ) >= RESULT_SEVERITY.get(record["test_result"], 0):
+                continue
+            records[record["test_case_id"]] = record
+
+    return list(records.values())
+
+
+def update_test_records(testrun_id, records):
+    """Update the testrun with the records.
+
+    pylero uses one SOAP session per process and every record update is a
+    transaction on it, hence the records are updated one after the other
+    using a single testrun object. A record is retried before being reported
+    as failed.
+
+    Args:
+        testrun_id: Test run ID
+        records: Test records returned by collect_test_records
+
+    Returns:
+        List of testcase IDs which failed to be updated
+    """
+    from pylero.test_run import TestRun
+
+    testrun = TestRun(
+        test_run_id=testrun_id,
+        project_id=os.environ.get("POLARION_PROJECT", DEFAULT_PROJECT),
+    )
+    LOG.info(f"Updating testrun '{testrun_id}' with {len(records)} records")
+
+    failed = []
+    for index, record in enumerate(records, start=1):
+        if not _update_testrun(
+            testrun,
+            record["test_case_id"],
+            record["test_result"],
+            record["test_comment"],
+            record["executed_by"],
+            record["executed"],
+            record["duration"],
+        ):
+            failed.append(record["test_case_id"])
+
+        if index % PROGRESS_INTERVAL == 0:
+            LOG.info(f"Updated {index}/{len(records)} records of '{testrun_id}'")
+
+    if failed:
+        LOG.error(f"Failed to update testcases {failed} of testrun '{testrun_id}'")
+
+    return failed
+
+
+def update_test_results(testrun_id, xunit, user):
+    """Update testrun with xunit results
+
+    Args:
+        testrun_id: Test run ID
+        xunit: Path to an xunit file or a list of paths
+        user: Polarion user executing the tests
+    """
+    xunits = [xunit] if isinstance(xunit, str) else list(xunit)
+    LOG.info(f"Updating testruns '{testrun_id}' with results '{xunits}'")
+    records = collect_test_records(xunits, user)
+    return update_test_records(testrun_id, records)
 
 
 if __name__ == "__main__":
@@ -221,12 +331,5 @@ if __name__ == "__main__":
             testplan_id=testplan_id,
         )
 
-    # Update results with testrun
-    for xunit in xunit_results:
-        if not os.path.exists(xunit):
-            LOG.error(
-                f"xunit results {xunit} not present. Skipping polarion update ..."
-            )
-            continue
-
-        update_test_results(testrun_id, xunit, config.get("user"))
+    # Update results of all the xunit files with testrun
+    update_test_results(testrun_id, xunit_results, config.get("user"))
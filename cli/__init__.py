@@ -1,37 +1,233 @@
+import threading
+from concurrent.futures import ALL_COMPLETED, FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from functools import partialmethod
+from operator import attrgetter
+from time import monotonic
+
+from cli.exceptions import MultiNodeExecutionError
+from cli.utilities.batch import BATCH_CONCURRENCY, run_batch
+from utility.command_cache import get_command_cache
+
+# Commands recorded by the batch of the calling thread instead of being executed
+_BATCH = threading.local()
+
+
+class CommandBatch:
+    """Commands of CLI methods recorded for a batched execution."""
+
+    def __init__(self, cli):
+        self.cli = cli
+        self.commands = []
+        self.results = []
+
+    def add(self, method, **kw):
+        """Record the command of the CLI method instead of executing it.
+
+        Args:
+            method (str): Method or dotted path of a sub command method listed in
+                          BATCH_METHODS of the CLI, e.g. "clone" or "snap.create"
+            kw (dict): Keyword arguments of the method
+
+        Raises:
+            ValueError when the method is not allowed in batches
+        """
+        if method not in self.cli.BATCH_METHODS:
+            raise ValueError(
+                f"{type(self.cli).__name__}.{method} can not be batched, "
+                f"batched methods are {self.cli.BATCH_METHODS}"
+            )
+
+        _BATCH.commands = self.commands
+        try:
+            attrgetter(method)(self.cli)(**kw)
+        finally:
+            _BATCH.commands = None
 
 
 class Cli:
-    def __init__(self, ctx):
+    # Maximum number of nodes on which a command is executed concurrently
+    max_workers = 16
+    # Methods which can be batched, their output is not read by the method
+    BATCH_METHODS = ()
+
+    def __init__(self, ctx, parallel=False, fail_fast=False):
+        """Initialize the CLI interface.
+
+        By default the command is executed on the nodes one after the other and
+        the execution stops at the first node on which it fails.
+
+        Args:
+            ctx (CephNode | list): Node(s) on which the commands are executed
+            parallel (bool): Execute the command on the nodes concurrently
+            fail_fast (bool): Stop at the first node on which the command fails,
+                              applies to the concurrent execution
+        """
         self.ctx = ctx
+        self.parallel = parallel
+        self.fail_fast = fail_fast
+        self.durations = {}
+
+    def _exec_on_node(self, ctx, cmd, sudo, long_running, check_ec, timeout):
+        """Execute the command on the node and record the time taken.
+
+        Read-only ceph queries are served from the run wide command cache when it
+        is enabled. Results of the commands which failed are not cached.
+        """
+        start = monotonic()
+
+        def _fetch():
+            return ctx.exec_command(
+                cmd=cmd,
+                sudo=sudo,
+                long_running=long_running,
+                check_ec=check_ec,
+                timeout=timeout,
+            )
+
+        def _succeeded():
+            # A failure raises CommandFailed when the exit code is checked
+            if check_ec:
+                return True
+            return getattr(getattr(ctx, "node", ctx), "exit_status", None) == 0
+
+        try:
+            if long_running:
+                return _fetch()
+            return get_command_cache().lookup(ctx, cmd, _fetch, _succeeded)
+        finally:
+            self.durations[ctx.shortname] = monotonic() - start
+
+    def _execute_parallel(self, fail_fast, *args):
+        """Execute the command on all the nodes using a bounded worker pool.
+
+        Returns:
+            Dictionary of node shortname and the command result
+
+        Raises:
+            The exception of the node when the command fails on a single node or
+            MultiNodeExecutionError when it fails on several nodes.
+        """
+        workers = min(self.max_workers, len(self.ctx)) or 1
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = {
+            executor.submit(self._exec_on_node, ctx, *args): ctx for ctx in self.ctx
+        }
+        done, _ = wait(
+            futures, return_when=FIRST_EXCEPTION if fail_fast else ALL_COMPLETED
+        )
+
+        # Nodes yet to be started are skipped when stopping at the first failure
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        out, failures = {}, {}
+        for future, ctx in futures.items():
+            if future not in done:
+                continue
+
+            if future.exception():
+                failures[ctx.shortname] = future.exception()
+            else:
+                out[ctx.shortname] = future.result()
+
+        if failures and (fail_fast or len(failures) == 1):
+            raise list(failures.values())[0]
+
+        if failures:
+            raise MultiNodeExecutionError(failures)
+
+        return out
 
     def execute(self, cmd, sudo=False, long_running=False, check_ec=False, **kwargs):
         """Inerface to execute commands on node(s).
 
+        When multiple nodes are provided, the command is executed on them one
+        after the other, or concurrently when parallel is enabled. The time taken
+        on every node is available in durations.
+
         Args:
             cmd (str): Command to be execute
             sudo (bool): Use root access
             long_running (bool): Long running command
             check_exit_status (bool): Check command exit status
+            parallel (bool): Override the concurrent execution on nodes
+            fail_fast (bool): Override stopping at the first failed node
         """
+        recorded = getattr(_BATCH, "commands", None)
+        if recorded is not None:
+            recorded.append((cmd, sudo))
+            return "", ""
+
+        timeout = kwargs.get("timeout", 3600)
         if isinstance(self.ctx, list):
+            if kwargs.get("parallel", self.parallel):
+                return self._execute_parallel(
+                    kwargs.get("fail_fast", self.fail_fast),
+                    cmd,
+                    sudo,
+                    long_running,
+                    check_ec,
+                    timeout,
+                )
+
             out = {}
             for ctx in self.ctx:
-                out[ctx.shortname] = ctx.exec_command(
-                    cmd=cmd,
-                    sudo=sudo,
-                    long_running=long_running,
-                    check_ec=check_ec,
-                    timeout=kwargs.get("timeout", 3600),
+                out[ctx.shortname] = self._exec_on_node(
+                    ctx, cmd, sudo, long_running, check_ec, timeout
                 )
             return out
         else:
-            return self.ctx.exec_command(
-                cmd=cmd,
-                sudo=sudo,
-                long_running=long_running,
-                check_ec=check_ec,
-                timeout=kwargs.get("timeout", 3600),
+            return self._exec_on_node(
+                self.ctx, cmd, sudo, long_running, check_ec, timeout
             )
 
     execute_as_sudo = partialmethod(execute, sudo=True)
+
+    @contextmanager
+    def batch(self, concurrency=BATCH_CONCURRENCY, **kwargs):
+        """Execute the commands added to the batch in one remote invocation.
+
+        The commands of the methods added to the batch are recorded and executed
+        on the node when the block exits. Only the methods listed in BATCH_METHODS
+        can be added, as the output of the recorded commands is not available to
+        the methods. The commands needing root access are executed as root and the
+        others as the user, as separate invocations.
+
+        Args:
+            concurrency (int): Number of commands executed at the same time
+            kwargs (dict): op_timeout, max_output and timeout, refer run_batch
+
+        Yields:
+            CommandBatch, its results are filled with the BatchResult of every
+            command on exit
+
+        Example::
+
+            with rbd.batch(concurrency=16) as batch:
+                for i in range(1000):
+                    batch.add("flatten", **{"image-spec": f"pool/clone{i}"})
+            failed = [r for r in batch.results if r.rc]
+        """
+        batch = CommandBatch(self)
+        yield batch
+
+        node = self.ctx[0] if isinstance(self.ctx, list) else self.ctx
+        results = [None] * len(batch.commands)
+        for sudo in (False, True):
+            indexes = [
+                i for i, (_, _sudo) in enumerate(batch.commands) if _sudo == sudo
+            ]
+            if not indexes:
+                continue
+
+            out = run_batch(
+                node,
+                [batch.commands[i][0] for i in indexes],
+                concurrency=concurrency,
+                sudo=sudo,
+                **kwargs,
+            )
+            for index, result in zip(indexes, out):
+                results[index] = result
+
+        batch.results.extend(results)
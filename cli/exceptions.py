@@ -75,3 +75,16 @@ class OsdOperationError(Exception):
     """
     Custom exception thrown when OSD operation fails
     """
+
+
+class MultiNodeExecutionError(Exception):
+    """
+    Custom exception thrown when a command fails on more than one node.
+    """
+
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(
+            "Command failed on nodes: "
+            + ", ".join(f"{node} ({err})" for node, err in failures.items())
+        )
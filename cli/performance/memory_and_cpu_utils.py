@@ -1,6 +1,10 @@
+import csv
 import os
+from datetime import datetime, timezone
+from functools import partial
 from threading import Thread
 
+from cli.performance.utilities.memory_and_cpu_logger import HEADER, SUMMARY_PREFIX
 from cli.utilities.configs import get_cephci_config
 from utility.log import Log
 
@@ -10,6 +14,8 @@ log = Log(__name__)
 SCRIPT = "memory_and_cpu_logger.py"
 SCRIPT_PATH = "cli/performance/utilities/"
 SCRIPT_DST_PATH = "/home/"
+MERGED_FILE = "memory_and_cpu.csv"
+MERGED_HEADER = ["timestamp", "test", "node"] + HEADER[1:]
 
 
 def upload_mem_and_cpu_logger_script(cluster):
@@ -40,62 +46,91 @@ def upload_mem_and_cpu_logger_script(cluster):
     return all(is_present)
 
 
+def _get_node_processes(ceph_cluster, process_list):
+    """Return the processes to be monitored on every node of the cluster."""
+    node_processes = {}
+    for ceph_process in process_list:
+        role = ceph_process.replace("ceph-", "").strip()
+        nodes = ceph_cluster.get_nodes(role)
+        if not nodes:
+            log.info(
+                f"No nodes found specific to given process {ceph_process}, running on all nodes"
+            )
+            nodes = ceph_cluster.get_nodes()
+        for node in nodes:
+            node_processes.setdefault(node, []).append(ceph_process.strip())
+    return node_processes
+
+
 def start_logging_processes(ceph_cluster, test_name):
     """
-    Start logging processes on all nodes for a given process
+    Start a single collector on every node sampling all its processes
+
+    The samples are streamed back over the SSH channel of the collector while the
+    test is in progress.
+
     Args:
         ceph_cluster(ceph): Ceph cluster object
         test_name(str): Name of the test
-        interval(int): Interval of monitoring
-    """
 
+    Returns:
+        list of collector threads and the tracker holding the streamed samples
+    """
     logging_process = []
-    tracker = {}
+    tracker = {"test_name": test_name, "samples": {}, "overhead": {}, "files": {}}
     proc_mon_details = _get_process_list_to_monitor()
     interval = proc_mon_details["interval"]
-    for ceph_process in proc_mon_details["process_list"]:
-        role = ceph_process.replace("ceph-", "").strip()
-        nodes = ceph_cluster.get_nodes(role)
-        if not nodes:
-            log.info(
-                f"No nodes found specific to given process {ceph_process}, running on all nodes"
-            )
-            nodes = ceph_cluster.get_nodes()
-        for node in nodes:
-            log.info(f"Triggering monitoring for {ceph_process} on {node.hostname}")
-            if node not in tracker.keys():
-                tracker[node] = []
-            node_specific_test_name = f"{node.hostname}-{test_name}"
-            logger_cmd = (
-                f"/usr/bin/env python {SCRIPT_DST_PATH}{SCRIPT} -p {ceph_process.strip()} "
-                f"-t {node_specific_test_name} -i {interval}"
-            )
-            # Set the stop_flag as 0 before starting the test
-            cmd = f"echo '0' > {SCRIPT_DST_PATH}status"
-            node.exec_command(cmd=cmd, sudo=True)
-            th = Thread(
-                target=lambda: node.exec_command(
-                    cmd=logger_cmd, sudo=True, long_running=True
-                ),
-                args=(),
-            )
-            logging_process.append(th)
-            th.start()
-            tracker[node].append(f"{ceph_process.strip()}-{node_specific_test_name}")
+    node_processes = _get_node_processes(ceph_cluster, proc_mon_details["process_list"])
+    for node, processes in node_processes.items():
+        log.info(f"Triggering monitoring for {processes} on {node.hostname}")
+        node_specific_test_name = f"{node.hostname}-{test_name}"
+        logger_cmd = (
+            f"/usr/bin/env python {SCRIPT_DST_PATH}{SCRIPT} -p {','.join(processes)} "
+            f"-t {node_specific_test_name} -i {interval}"
+        )
+        # Set the stop_flag as 0 before starting the test
+        cmd = f"echo '0' > {SCRIPT_DST_PATH}status"
+        node.exec_command(cmd=cmd, sudo=True)
+
+        tracker["samples"][node] = []
+        tracker["files"][node] = f"/root/{node_specific_test_name}.csv"
+        th = Thread(
+            target=node.exec_command,
+            kwargs={
+                "cmd": logger_cmd,
+                "sudo": True,
+                "check_ec": False,
+                "timeout": "notimeout",
+                "line_callback": partial(_collect_sample, tracker, node),
+            },
+        )
+        logging_process.append(th)
+        th.start()
     return logging_process, tracker
 
 
+def _collect_sample(tracker, node, line, stderr):
+    """Record a line streamed by the collector running on the node."""
+    if stderr or not line:
+        return
+    if line.startswith(SUMMARY_PREFIX):
+        tracker["overhead"][node] = line[len(SUMMARY_PREFIX) :].strip()
+        return
+    if line.startswith(HEADER[0]):
+        return
+    tracker["samples"][node].append(line)
+
+
 def stop_logging_process(ceph_cluster, logging_process, download_path, tracker):
     """
     Stops the logging process
     Args:
         ceph_cluster(ceph): Ceph cluster object
-        logging_process(dict): Dictionary of all the active logging processes
+        logging_process(list): List of all the active collector threads
         download_path(str): Path to where the data has to be downloaded
-        tracker(dict): Dict keeping track of each mon job
+        tracker(dict): Dict keeping track of the samples of each node
     """
-    nodes = ceph_cluster.get_nodes()
-    for node in nodes:
+    for node in tracker["samples"]:
         # Set the stop_flag as 1 to stop the script running on the node
         cmd = f"echo '1' > {SCRIPT_DST_PATH}status"
         node.exec_command(cmd=cmd, sudo=True)
@@ -103,7 +138,7 @@ def stop_logging_process(ceph_cluster, logging_process, download_path, tracker):
     # Wait for all the process to complete
     wait_for_logging_processes_to_stop(logging_process)
 
-    # Collect the mem logs from all the nodes
+    # Merge the samples of all the nodes
     download_logger_data_from_nodes(download_path, tracker)
 
 
@@ -118,27 +153,61 @@ def wait_for_logging_processes_to_stop(logging_process):
 
 def download_logger_data_from_nodes(download_path, tracker):
     """
-    Downloads the logger data from all the nodes to the given path. The data will be collected and stored under folders
-    specific to each test case
+    Appends the samples of all the nodes to the time-series file of the run
+
+    The samples are streamed while the test is in progress. The CSV file written
+    by the collector is downloaded only for the nodes whose stream was lost.
+
     Args:
         download_path(str): Path where the logs are to be downloaded
-        tracker(dict): Tracker Dictionary containing nodes and files to be copied for each node
+        tracker(dict): Tracker Dictionary containing the samples of each node
     """
+    download_dir = f"{download_path}/performance-metrics"
+    os.makedirs(download_dir, exist_ok=True)
+    merged_file = f"{download_dir}/{MERGED_FILE}"
+
+    rows = []
+    for node, lines in tracker["samples"].items():
+        if not lines:
+            lines = _download_samples(node, tracker["files"][node], download_dir)
+
+        for record in csv.reader(lines):
+            if len(record) != len(HEADER) or record[0] == HEADER[0]:
+                continue
+            rows.append(
+                [float(record[0]), tracker["test_name"], node.hostname] + record[1:]
+            )
+
+        if node in tracker["overhead"]:
+            log.info(
+                f"Collector overhead on {node.hostname}: {tracker['overhead'][node]}"
+            )
+
+    rows.sort(key=lambda row: row[0])
+    write_header = not os.path.exists(merged_file)
+    with open(merged_file, "a") as _file:
+        writer = csv.writer(_file, lineterminator="\n")
+        if write_header:
+            writer.writerow(MERGED_HEADER)
+        for row in rows:
+            stamp = datetime.fromtimestamp(row[0], tz=timezone.utc)
+            writer.writerow([stamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]] + row[1:])
+
+    log.info(f"Appended {len(rows)} samples of {tracker['test_name']} to {merged_file}")
+
+
+def _download_samples(node, src_file, download_dir):
+    """Download the CSV file written by the collector and return its lines."""
+    dst_file = f"{download_dir}/{os.path.basename(src_file)}"
     try:
-        for node, files in tracker.items():
-            for file in files:
-                src_file = f"/root/{file}.csv"
-                download_dir = (
-                    f"{download_path}/performance-metrics/{file.split('-')[-1]}"
-                )
-                os.makedirs(download_dir, exist_ok=True)
-                node.download_file(
-                    src=src_file, dst=f"{download_dir}/{file}.csv", sudo=True
-                )
-                log.info(f"Downloading {file} from {node.hostname} to {download_dir}")
-        log.info("All files downloaded from all the nodes")
-    except Exception:
-        log.error(f"Failed to download {file} from {node.hostname}")
+        node.download_file(src=src_file, dst=dst_file, sudo=True)
+        with open(dst_file) as _file:
+            lines = _file.read().splitlines()
+        os.remove(dst_file)
+        return lines
+    except Exception as err:
+        log.error(f"Failed to download {src_file} from {node.hostname}: {err}")
+        return []
 
 
 def _get_process_list_to_monitor():
@@ -1,5 +1,14 @@
 """
 A tool to monitor and log memory consumption processes.
+
+All the given processes are sampled in a single pass over /proc. The CPU usage is
+computed from the utime and stime fields of /proc/<pid>/stat and the memory usage
+from VmRSS of /proc/<pid>/status, hence no external command is spawned per sample.
+
+The samples of a pass are written as one batch of CSV rows to the output file and
+to stdout, so that the caller can stream them while the test is in progress. The
+time and CPU consumed by the collector itself are reported as the "collector"
+process and summarized on exit.
 """
 
 from __future__ import print_function
@@ -7,51 +16,172 @@ from __future__ import print_function
 import argparse
 import csv
 import os
-import subprocess
-from time import sleep
+import sys
+from time import monotonic, sleep, time
 
+HEADER = ["timestamp", "daemon", "pid", "cpu_percent", "rss_mb"]
+COLLECTOR = "collector"
+SUMMARY_PREFIX = "# overhead"
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+STATUS_FILE = "/home/status"
 
-def run_command(cmd):
-    """
-    Run command using Popen and return output
-    """
-    ret = subprocess.Popen(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True
-    )
-    output = ret.stdout.read().decode("utf8").split("\n")[:-1]
-    return output
 
+def read_file(path):
+    """Return the content of the file, None if the process has exited."""
+    try:
+        with open(path, "rb") as _file:
+            return _file.read().decode("utf8", errors="replace")
+    except (IOError, OSError):
+        return None
 
-def get_memory_and_cpu_consumption(proc_name):
+
+def parse_stat(data):
     """
-    Get the memory and cpu consumed by a given process
+    Return the command name, CPU ticks and start time of the process.
+
+    The command name is enclosed in parentheses and may contain spaces, hence the
+    fields are split after the last closing parenthesis.
     """
-    # The command gives an output as shown below:
-    # [2020-08-07 09:34:48] 16422 0.0 9.99609
-    #
-    # Where,
-    # [2020-08-07 09:34:48] is UTC timestamp.
-    # 16422 is the process ID.
-    # 0.0 is the CPU usage.
-    # 9.99609 is memory consumption in MB.
-    cmd = (
-        "ps u -p `pgrep " + proc_name + "` | "
-        "awk 'NR>1 && $11~/" + proc_name + "$/{print "
-        'strftime("[%Y-%d-%m %H:%M:%S]", '
-        "systime(), 1), $13,$2,$3,$6/1024}'"
-    )
-    memory_and_cpu_consumed = run_command(cmd)
-    return memory_and_cpu_consumed
+    name = data[data.index("(") + 1 : data.rindex(")")]
+    fields = data[data.rindex(")") + 2 :].split()
+    # Fields utime, stime and starttime are 14, 15 and 22 of proc(5)
+    return name, int(fields[11]) + int(fields[12]), int(fields[19])
+
+
+def parse_rss(data):
+    """Return the resident set size in MB from /proc/<pid>/status."""
+    for line in data.splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def daemon_name(pid, name):
+    """Return the daemon name (osd.1, mon.node1) from the command line of the process."""
+    cmdline = (read_file(f"/proc/{pid}/cmdline") or "").split("\0")
+    for index, arg in enumerate(cmdline[:-1]):
+        if arg in ("-n", "--name"):
+            return cmdline[index + 1]
+        if arg in ("-i", "--id"):
+            return f"{name.replace('ceph-', '')}.{cmdline[index + 1]}"
+    return name
+
+
+class Collector:
+    """Samples the CPU and memory consumed by the processes of the given names."""
+
+    def __init__(self, process_names):
+        self.process_names = set(process_names)
+        self._previous = dict()
+        self._daemons = dict()
+        self._own_cpu = None
+        self.samples = 0
+        self.sample_time = 0.0
+        self.max_sample_time = 0.0
+
+    def _uptime(self):
+        return float(read_file("/proc/uptime").split()[0])
+
+    def _cpu_percent(self, pid, ticks, start_ticks, now):
+        """CPU usage since the previous sample, else since the process started."""
+        previous = self._previous.get(pid)
+        self._previous[pid] = (ticks, now)
+        if previous and previous[1] < now:
+            return 100.0 * (ticks - previous[0]) / CLK_TCK / (now - previous[1])
+
+        elapsed = self._uptime() - start_ticks / CLK_TCK
+        return 100.0 * ticks / CLK_TCK / elapsed if elapsed > 0 else 0.0
+
+    def _sample_pid(self, pid, name, start_ticks, ticks, now):
+        status = read_file(f"/proc/{pid}/status")
+        if status is None:
+            return None
+
+        key = (pid, start_ticks)
+        if key not in self._daemons:
+            self._daemons[key] = daemon_name(pid, name)
+
+        return [
+            self._daemons[key],
+            pid,
+            round(self._cpu_percent(pid, ticks, start_ticks, now), 2),
+            round(parse_rss(status), 2),
+        ]
+
+    def _own_usage(self, now):
+        """CPU usage of the collector since the previous sample."""
+        cpu = os.times()
+        total = cpu.user + cpu.system
+        previous, self._own_cpu = self._own_cpu, (total, now)
+        if previous and previous[1] < now:
+            return 100.0 * (total - previous[0]) / (now - previous[1])
+        return 0.0
+
+    def sample(self):
+        """Return the rows of all the monitored processes in a single /proc scan."""
+        start = monotonic()
+        timestamp = round(time(), 3)
+        rows, seen = [], set()
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+
+            stat = read_file(f"/proc/{pid}/stat")
+            if stat is None:
+                continue
+
+            name, ticks, start_ticks = parse_stat(stat)
+            if name not in self.process_names:
+                continue
+
+            row = self._sample_pid(pid, name, start_ticks, ticks, start)
+            if row:
+                seen.add(pid)
+                rows.append([timestamp] + row)
+
+        # Forget the processes which have exited
+        for pid in set(self._previous) - seen:
+            del self._previous[pid]
+
+        elapsed = monotonic() - start
+        self.samples += 1
+        self.sample_time += elapsed
+        self.max_sample_time = max(self.max_sample_time, elapsed)
+        rows.append(
+            [
+                timestamp,
+                COLLECTOR,
+                os.getpid(),
+                round(self._own_usage(monotonic()), 2),
+                round(parse_rss(read_file("/proc/self/status") or ""), 2),
+            ]
+        )
+        return rows
+
+    def summary(self):
+        """Return the sampling overhead of the collector."""
+        cpu = os.times()
+        mean = self.sample_time / self.samples if self.samples else 0.0
+        return (
+            f"{SUMMARY_PREFIX} samples={self.samples} "
+            f"mean_ms={mean * 1000:.3f} max_ms={self.max_sample_time * 1000:.3f} "
+            f"cpu_s={cpu.user + cpu.system:.3f}"
+        )
+
+
+def stop_requested(status_file):
+    """Return True once the caller writes 1 to the status file."""
+    return "0" not in (read_file(status_file) or "0")
 
 
 def main():
     """
-    This tool monitors the memory and cpu utilisation of a given resource. The parameters for this tool are
+    This tool monitors the memory and cpu utilisation of the given processes. The parameters for this tool are
     Usage:
-        memory_and_cou_logger.py --process_name <Process Name>
+        memory_and_cou_logger.py --process_name <Comma separated process names>
                                  --interval <interval in seconds>
                                  --testname <name of the test>
-        e.g: python memory_and_cpu_logger.py -p ceph-mgr -t Sample_Test_0 -i 10
+        e.g: python memory_and_cpu_logger.py -p ceph-mgr,ceph-osd -t Sample_Test_0 -i 10
     """
     # Setting up command line arguments
     parser = argparse.ArgumentParser(
@@ -63,12 +193,12 @@ def main():
         type=str,
         dest="process_name",
         required=True,
-        help="Name of process for which cpu and memory is to be logged",
+        help="Comma separated names of processes for which cpu and memory is to be logged",
     )
     parser.add_argument(
         "-i",
         "--interval",
-        type=int,
+        type=float,
         dest="interval",
         default=60,
         help="Time interval to wait between consecutive logs(Default:60)",
@@ -81,36 +211,42 @@ def main():
         required=True,
         help="Test name for which memory is logged",
     )
+    parser.add_argument(
+        "-s",
+        "--status-file",
+        type=str,
+        dest="status_file",
+        default=STATUS_FILE,
+        help="Logging stops once 1 is written to the file(Default:/home/status)",
+    )
     args = parser.parse_args()
 
-    # Declare all three parameters
-    process_name = args.process_name
-    interval = args.interval
+    process_names = [_p.strip() for _p in args.process_name.split(",") if _p.strip()]
+    collector = Collector(process_names)
 
-    # Generating CSV file header
-    with open(f"{process_name}-{args.testname}.csv", "a") as file:
-        csv_writer_obj = csv.writer(file)
-        csv_writer_obj.writerow([args.testname, "", "", ""])
-        csv_writer_obj.writerow(
-            ["Time stamp", "Process Name", "Process ID", "CPU Usage", "Memory Usage"]
-        )
+    with open(f"{args.testname}.csv", "w") as file:
+        file_writer = csv.writer(file, lineterminator="\n")
+        stream_writer = csv.writer(sys.stdout, lineterminator="\n")
+        file_writer.writerow(HEADER)
+        stream_writer.writerow(HEADER)
+
+        while not stop_requested(args.status_file):
+            start = monotonic()
+            rows = collector.sample()
+
+            # A single write per pass for the file and the stream
+            file_writer.writerows(rows)
+            stream_writer.writerows(rows)
+            file.flush()
+            sys.stdout.flush()
+
+            # Sleep in short steps to stop soon after the request
+            end = start + args.interval
+            while monotonic() < end and not stop_requested(args.status_file):
+                sleep(min(1.0, max(0.0, end - monotonic())))
 
-        # Taking memory output for a given
-        # number of times
-        stop_flag = "0"
-        counter = 0
-        while "0" in stop_flag:
-            data = get_memory_and_cpu_consumption(process_name)
-
-            # Logging information to csv file
-            for line in data:
-                info = line.split(" ")
-                csv_writer_obj.writerow(
-                    [" ".join(info[:2]), info[2], info[3], info[4], info[5]]
-                )
-                sleep(interval)
-            counter += 1
-            stop_flag = str(os.popen("cat /home/status").read())
+    print(collector.summary())
+    sys.stdout.flush()
 
 
 if __name__ == "__main__":
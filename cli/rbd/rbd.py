@@ -13,9 +13,32 @@ from .mirror.mirror import Mirror
 from .namespace import Namespace
 from .pool import Pool
 from .snap import Snap
+from .trash import Trash
 
 
 class Rbd(Cli):
+    BATCH_METHODS = (
+        "create",
+        "resize",
+        "rm",
+        "flatten",
+        "clone",
+        "copy",
+        "rename",
+        "snap.create",
+        "snap.rm",
+        "snap.purge",
+        "snap.protect",
+        "snap.unprotect",
+        "snap.rollback",
+        "trash.mv",
+        "trash.restore",
+        "trash.rm",
+        "trash.purge",
+        "migration.prepare",
+        "migration.action",
+    )
+
     def __init__(self, nodes, base_cmd=""):
         super(Rbd, self).__init__(nodes)
         self.base_cmd = f"{base_cmd}rbd"
@@ -29,6 +52,7 @@ class Rbd(Cli):
         self.namespace = Namespace(nodes, self.base_cmd)
         self.group = Group(nodes, self.base_cmd)
         self.migration = Migration(nodes, self.base_cmd)
+        self.trash = Trash(nodes, self.base_cmd)
 
     def create(self, **kw):
         """
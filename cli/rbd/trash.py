@@ -0,0 +1,101 @@
+from copy import deepcopy
+
+from cli import Cli
+from cli.utilities.utils import build_cmd_from_args
+
+
+class Trash(Cli):
+    """
+    This module provides CLI interface to manage images in the trash of a pool.
+    """
+
+    def __init__(self, nodes, base_cmd):
+        super(Trash, self).__init__(nodes)
+        self.base_cmd = base_cmd + " trash"
+
+    def mv(self, **kw):
+        """
+        Moves an image to the trash.
+        Args:
+            kw(dict): Key/value pairs that needs to be provided to the installer
+                Example::
+                Supported keys:
+                    image-spec(str) : [<pool-name>/[<namespace>/]]<image-name>
+                    expires-at(str) : time after which the image can be removed
+                    See rbd help trash mv for more supported keys
+        """
+        kw_copy = deepcopy(kw)
+        image_spec = kw_copy.pop("image-spec", "")
+        cmd = f"{self.base_cmd} mv {image_spec} {build_cmd_from_args(**kw_copy)}"
+
+        return self.execute_as_sudo(cmd=cmd)
+
+    def ls(self, **kw):
+        """
+        Lists the images in the trash.
+        Args:
+            kw(dict): Key/value pairs that needs to be provided to the installer
+                Example::
+                Supported keys:
+                    pool-spec(str) : <pool-name>[/<namespace>]
+                    format(str) : output format, json or plain
+                    See rbd help trash ls for more supported keys
+        """
+        kw_copy = deepcopy(kw)
+        pool_spec = kw_copy.pop("pool-spec", "")
+        cmd = f"{self.base_cmd} ls {pool_spec} {build_cmd_from_args(**kw_copy)}"
+
+        return self.execute(cmd=cmd)
+
+    def restore(self, **kw):
+        """
+        Restores an image from the trash.
+        Args:
+            kw(dict): Key/value pairs that needs to be provided to the installer
+                Example::
+                Supported keys:
+                    image-id-spec(str) : [<pool-name>/[<namespace>/]]<image-id>
+                    image(str) : name of the restored image
+                    See rbd help trash restore for more supported keys
+        """
+        kw_copy = deepcopy(kw)
+        image_id_spec = kw_copy.pop("image-id-spec", "")
+        cmd = (
+            f"{self.base_cmd} restore {image_id_spec} {build_cmd_from_args(**kw_copy)}"
+        )
+
+        return self.execute_as_sudo(cmd=cmd)
+
+    def rm(self, **kw):
+        """
+        Removes an image from the trash.
+        Args:
+            kw(dict): Key/value pairs that needs to be provided to the installer
+                Example::
+                Supported keys:
+                    image-id-spec(str) : [<pool-name>/[<namespace>/]]<image-id>
+                    force(bool) : remove the image even if it has not expired
+                    See rbd help trash rm for more supported keys
+        """
+        kw_copy = deepcopy(kw)
+        image_id_spec = kw_copy.pop("image-id-spec", "")
+        cmd = f"{self.base_cmd} rm {image_id_spec} {build_cmd_from_args(**kw_copy)}"
+
+        return self.execute_as_sudo(cmd=cmd)
+
+    def purge(self, **kw):
+        """
+        Removes all the expired images from the trash.
+        Args:
+            kw(dict): Key/value pairs that needs to be provided to the installer
+                Example::
+                Supported keys:
+                    pool-spec(str) : <pool-name>[/<namespace>]
+                    expired-before(str) : purges images that expired before the date
+                    See rbd help trash purge for more supported keys
+        """
+        kw_copy = deepcopy(kw)
+        pool_spec = kw_copy.pop("pool-spec", "")
+        cmd = f"{self.base_cmd} purge {pool_spec} {build_cmd_from_args(**kw_copy)}"
+
+        return self.execute_as_sudo(cmd=cmd)
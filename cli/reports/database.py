@@ -2,6 +2,8 @@ import psycopg
 
 from cli.exceptions import ConfigError
 
+BATCH_SIZE = 500
+
 
 class Database:
     def __init__(self, **creds):
@@ -39,6 +41,24 @@ class Database:
         insert_query = f"""INSERT INTO {table} ({cols}) VALUES ({data})"""
         self._execute(insert_query)
 
+    def insert_many(self, table, cols, rows, batch_size=BATCH_SIZE):
+        """Insert the rows using one parameterized statement per batch
+
+        Args:
+            table(str): db Table name
+            cols(list): Column names
+            rows(list): Tuples of the column values
+            batch_size(int): Rows sent and committed together
+        """
+        placeholders = ", ".join(["%s"] * len(cols))
+        insert_query = (
+            f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders})"
+        )
+        with self.conn.cursor() as cursor:
+            for i in range(0, len(rows), batch_size):
+                cursor.executemany(insert_query, rows[i : i + batch_size])
+                self.conn.commit()
+
     def update(self):
         update_query = """<cmd here>"""
         self._execute(update_query)
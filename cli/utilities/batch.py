@@ -0,0 +1,127 @@
+"""Execution of a batch of commands on a node in a single remote invocation.
+
+The commands are uploaded to the node as a JSON document and executed there by a
+python3 runner using the requested concurrency. The runner returns the exit code,
+duration and output of every command at once, hence thousands of short commands
+cost one round trip instead of one SSH exec each.
+
+Example::
+
+    results = run_batch(client, [f"rbd flatten pool/clone{i}" for i in range(1000)])
+    failed = [r for r in results if r.rc]
+"""
+
+import json
+import os
+import shlex
+import tempfile
+import uuid
+from collections import namedtuple
+from time import monotonic
+from typing import List, Optional
+
+from utility.log import Log
+
+log = Log(__name__)
+
+BatchResult = namedtuple("BatchResult", ["cmd", "rc", "duration", "out", "err"])
+
+BATCH_CONCURRENCY = 10
+# Trailing characters of the output kept per command, 0 keeps all of it
+BATCH_MAX_OUTPUT = 4096
+# Exit code of the commands exceeding the per command timeout, as coreutils timeout
+BATCH_TIMEOUT_RC = 124
+
+# Executed with python3 on the node, arguments are the path of the commands file,
+# the concurrency, the per command timeout and the output limit. Python 3.6 compatible.
+BATCH_SCRIPT = r"""
+import json, os, subprocess, sys, time
+from concurrent.futures import ThreadPoolExecutor
+
+path, workers, timeout, max_output = sys.argv[1], int(sys.argv[2]), float(sys.argv[3]), int(sys.argv[4])
+with open(path) as fh:
+    commands = json.load(fh)
+os.remove(path)
+
+def run(cmd):
+    start = time.time()
+    try:
+        proc = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              universal_newlines=True, timeout=timeout or None)
+        rc, out, err = proc.returncode, proc.stdout, proc.stderr
+    except subprocess.TimeoutExpired:
+        rc, out, err = TIMEOUT_RC, "", "timed out after %ss" % timeout
+    return [rc, round(time.time() - start, 3), out[-max_output:], err[-max_output:]]
+
+with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+    results = list(executor.map(run, commands))
+
+json.dump(results, sys.stdout, separators=(",", ":"))
+""".replace(
+    "TIMEOUT_RC", str(BATCH_TIMEOUT_RC)
+)
+
+
+def run_batch(
+    node,
+    commands: List[str],
+    concurrency: int = BATCH_CONCURRENCY,
+    sudo: bool = True,
+    op_timeout: Optional[int] = None,
+    max_output: int = BATCH_MAX_OUTPUT,
+    timeout: int = 3600,
+) -> List[BatchResult]:
+    """
+    Execute the commands on the node in a single remote invocation.
+
+    Args:
+        node: Node supporting exec_command and upload_file
+        commands: Shell commands, executed in any order
+        concurrency: Number of commands executed at the same time on the node
+        sudo: Execute the commands with root access
+        op_timeout: Seconds allowed per command, BATCH_TIMEOUT_RC is returned on expiry
+        max_output: Trailing characters of stdout and stderr kept per command
+        timeout: Seconds allowed for the whole batch
+
+    Returns:
+        BatchResult of every command, in the order of the commands
+
+    Raises:
+        CommandFailed: when the batch could not be executed
+    """
+    if not commands:
+        return []
+
+    remote_path = f"/tmp/cephci-batch-{uuid.uuid4().hex}.json"
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as fh:
+        json.dump(list(commands), fh)
+    try:
+        node.upload_file(src=fh.name, dst=remote_path)
+    finally:
+        os.remove(fh.name)
+
+    cmd = " ".join(
+        [
+            "python3 -c",
+            shlex.quote(BATCH_SCRIPT),
+            remote_path,
+            str(concurrency),
+            str(op_timeout or 0),
+            str(max_output),
+        ]
+    )
+    start = monotonic()
+    out, _ = node.exec_command(sudo=sudo, cmd=cmd, timeout=timeout)
+    elapsed = monotonic() - start
+
+    results = [BatchResult(c, *r) for c, r in zip(commands, json.loads(out))]
+    failed = [r for r in results if r.rc]
+    log.info(
+        f"Executed {len(results)} commands on {node.hostname} in {elapsed:.1f}s "
+        f"with concurrency {concurrency}, {len(failed)} failed, slowest took "
+        f"{max(r.duration for r in results)}s"
+    )
+    for result in failed[:10]:
+        log.error(f"{result.cmd} returned {result.rc}: {result.err.strip()[-500:]}")
+
+    return results
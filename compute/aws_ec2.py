@@ -11,6 +11,7 @@ import yaml
 from utility.log import Log
 
 from .exceptions import NodeDeleteFailure, NodeError
+from .rate_limiter import get_rate_limiter
 
 LOG = Log(__name__)
 
@@ -495,7 +496,7 @@ class CephVMNodeAWS:
                     type(run_kwargs["SecurityGroupIds"]).__name__,
                 )
 
-            resp = self.client.run_instances(**run_kwargs)
+            resp = get_rate_limiter("aws").call(self.client.run_instances, **run_kwargs)
             instances = resp.get("Instances", [])
             if not instances:
                 raise NodeError("run_instances returned no instances")
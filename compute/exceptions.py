@@ -23,3 +23,7 @@ class NodeError(Exception):
 
 class NodeDeleteFailure(Exception):
     pass
+
+
+class RateLimitExceeded(NodeError):
+    pass
@@ -28,6 +28,7 @@ from .exceptions import (
     ResourceNotFound,
     VolumeOpFailure,
 )
+from .rate_limiter import get_rate_limiter
 
 LOG = Log(__name__)
 
@@ -604,7 +605,9 @@ class CephVMNodeIBM:
 
             # Set up parameter values
             instance_prototype = instance_prototype_model
-            response = self.service.create_instance(instance_prototype)
+            response = get_rate_limiter("ibmc").call(
+                self.service.create_instance, instance_prototype
+            )
 
             instance_id = response.get_result()["id"]
             self._wait_until_vm_state(instance_id, target_state="running")
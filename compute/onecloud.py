@@ -1,16 +1,22 @@
 """OneCloud provider implementation for CephVMNode."""
 
+import functools
 import ipaddress
 import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from ceph.waiter import WaitUntil
 from utility.log import Log
 
 from .exceptions import NodeDeleteFailure, NodeError
@@ -21,7 +27,20 @@ VM_READY_STATES = ("on", "running")
 VM_POLL_INTERVAL = 30
 VM_POLL_TIMEOUT = 1800  # 30 minutes
 CLEANUP_VERIFY_INTERVAL = 5
+CLEANUP_VERIFY_MAX_INTERVAL = 30
 CLEANUP_VERIFY_TIMEOUT = 900  # 15 minutes max to wait for deletion to complete
+CLEANUP_MAX_WORKERS = 10  # VM deletions in flight per cluster
+
+# Connection pool and retries of the API client. Only idempotent methods are
+# retried on 5xx/429, POST /clusters is retried by the onecloud rate limiter.
+HTTP_POOL_SIZE = 32
+HTTP_RETRIES = 5
+HTTP_BACKOFF_FACTOR = 1
+HTTP_RETRY_STATUS = (429, 500, 502, 503, 504)
+HTTP_RETRY_METHODS = ("GET", "PUT", "DELETE", "HEAD", "OPTIONS")
+
+# Seconds for which the image and project resolved for a site are reused
+SITE_CACHE_TTL = 1800
 
 # VM name fields the API may return (OpenAPI uses vmname; some implementations use camelCase)
 VM_NAME_KEYS = ("vmname", "vmName", "VMName", "name")
@@ -91,6 +110,33 @@ def get_vm_ip(vm: Dict) -> Optional[str]:
     return None
 
 
+_CLIENTS: Dict[tuple, Any] = dict()
+_CLIENTS_LOCK = threading.Lock()
+_SITE_CACHE: Dict[tuple, tuple] = dict()
+_SITE_CACHE_LOCK = threading.Lock()
+
+
+def _new_session() -> requests.Session:
+    """Return a keep-alive session retrying idempotent calls with backoff."""
+    retries = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUS,
+        allowed_methods=HTTP_RETRY_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def get_onecloud_client(
     api_key: str,
     base_url: str,
@@ -99,6 +145,11 @@ def get_onecloud_client(
     """
     Return a simple requests-based client for OneCloud API.
 
+    The client is shared by the process for the given credentials. It holds a
+    keep-alive session, so the TCP and TLS handshakes are done once per pooled
+    connection instead of once per call. Idempotent calls are retried with
+    exponential backoff on 5xx and 429 responses.
+
     Args:
         api_key: JWT Bearer token for authentication.
         base_url: API base URL from credentials (global_credentials / osp-cred).
@@ -113,6 +164,12 @@ def get_onecloud_client(
             "Set it in osp-cred (onecloud-credentials) or cephci.yaml."
         )
     base = base_url.rstrip("/")
+    key = (base, api_key, verify_ssl)
+    with _CLIENTS_LOCK:
+        if key in _CLIENTS:
+            return _CLIENTS[key]
+
+    session = _new_session()
 
     def _request(method: str, path: str, **kwargs) -> requests.Response:
         url = f"{base}{path}" if path.startswith("/") else f"{base}/{path}"
@@ -121,9 +178,11 @@ def get_onecloud_client(
         headers.setdefault("Content-Type", "application/json")
         headers.setdefault("Authorization", f"Bearer {api_key}")
         kwargs.setdefault("verify", verify_ssl)
-        return requests.request(method, url, headers=headers, timeout=120, **kwargs)
+        return session.request(method, url, headers=headers, timeout=120, **kwargs)
 
     class Client:
+        base_url = base
+
         def get(self, path: str, **kwargs) -> requests.Response:
             return _request("GET", path, **kwargs)
 
@@ -136,7 +195,44 @@ def get_onecloud_client(
         def delete(self, path: str, **kwargs) -> requests.Response:
             return _request("DELETE", path, **kwargs)
 
-    return Client()
+    with _CLIENTS_LOCK:
+        return _CLIENTS.setdefault(key, Client())
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def cached_per_site(func: Callable) -> Callable:
+    """
+    Reuse the value resolved for the same site and arguments for SITE_CACHE_TTL.
+
+    The first argument of the function must be the OneCloud client, the entries
+    are scoped to its API endpoint. Failures are not cached.
+    """
+
+    @functools.wraps(func)
+    def wrapper(client, *args, **kwargs):
+        key = (
+            func.__name__,
+            getattr(client, "base_url", id(client)),
+            _freeze(args),
+            tuple(sorted((k, _freeze(v)) for k, v in kwargs.items())),
+        )
+        with _SITE_CACHE_LOCK:
+            entry = _SITE_CACHE.get(key)
+        if entry and entry[0] > time.monotonic():
+            LOG.debug("OneCloud: reusing %s for %s", func.__name__, args[:1])
+            return entry[1]
+
+        value = func(client, *args, **kwargs)
+        with _SITE_CACHE_LOCK:
+            _SITE_CACHE[key] = (time.monotonic() + SITE_CACHE_TTL, value)
+        return value
+
+    return wrapper
 
 
 def process_onecloud_custom_config(custom_config: Optional[List[str]] = None) -> Dict:
@@ -384,6 +480,7 @@ def _sort_images_by_version_proximity(
     return [img for _, img in scored]
 
 
+@cached_per_site
 def resolve_image_for_site(
     client,
     site: str,
@@ -671,6 +768,7 @@ def _project_matches_site(proj: Dict, site: str) -> bool:
     return True  # If no site info, assume match
 
 
+@cached_per_site
 def resolve_project_for_site(
     client,
     site: str,
@@ -884,6 +982,118 @@ def get_vlan_for_site(
     return chosen
 
 
+def _active_vms(vm_list: List[Dict]) -> List[Dict]:
+    """Filter to VMs that appear active (not deleted/terminated)."""
+    terminal = {"deleted", "terminated", "off"}
+    return [
+        v
+        for v in vm_list
+        if (v.get("state") or v.get("status") or "").lower() not in terminal
+    ]
+
+
+def _list_cluster_vms(client, cluster_id) -> Optional[List[Dict]]:
+    """Return the VMs listed for the cluster, None if the listing failed."""
+    # Some API versions only honour the camel case parameter
+    for param in ("clusterID", "clusterid"):
+        resp = client.get(f"/vm?{param}={cluster_id}")
+        if resp.status_code == 200:
+            return parse_vm_list_from_response(resp.json())
+    return None
+
+
+def _delete_vm(client, vmid, cluster_name: str) -> bool:
+    """Delete the VM, return True if the API accepted the request."""
+    try:
+        del_resp = client.delete(f"/vm/{vmid}")
+        if del_resp.status_code in (200, 204):
+            LOG.info("Deleted VM %s (cluster %s)", vmid, cluster_name)
+            return True
+        LOG.warning("Failed to delete VM %s: %s", vmid, del_resp.status_code)
+    except Exception as e:
+        LOG.warning("Error deleting VM %s: %s", vmid, e)
+    return False
+
+
+def _cleanup_onecloud_cluster(client, cluster: Dict) -> None:
+    """Delete the VMs of the cluster, wait for them to be gone and delete the cluster."""
+    cluster_id = cluster.get("clusterid") or cluster.get("clusterID")
+    cluster_name = cluster.get("cluster_name", "?")
+    if not cluster_id:
+        return
+
+    # List VMs in cluster
+    vm_resp = client.get(f"/vm?clusterid={cluster_id}")
+    if vm_resp.status_code != 200:
+        LOG.warning(
+            "Failed to list VMs for cluster %s: %s", cluster_id, vm_resp.status_code
+        )
+        return
+
+    vm_data = vm_resp.json()
+    vms = vm_data.get("data", []) if isinstance(vm_data, dict) else vm_data
+    if not isinstance(vms, list):
+        vms = []
+
+    vmids = [vm.get("vmid") or vm.get("vmID") for vm in vms]
+    vmids = [vmid for vmid in vmids if vmid is not None]
+    if vmids:
+        workers = min(CLEANUP_MAX_WORKERS, len(vmids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda _id: _delete_vm(client, _id, cluster_name), vmids))
+
+    # Verify VMs are gone before proceeding (API may be eventually consistent)
+    remaining = []
+    for w in WaitUntil(
+        timeout=CLEANUP_VERIFY_TIMEOUT,
+        interval=CLEANUP_VERIFY_INTERVAL,
+        backoff=1.5,
+        max_interval=CLEANUP_VERIFY_MAX_INTERVAL,
+        name="onecloud_cleanup_verify",
+    ):
+        remaining = _active_vms(_list_cluster_vms(client, cluster_id) or [])
+        if not remaining:
+            break
+
+        LOG.info(
+            "OneCloud: cluster %s still has %d VM(s), waiting...",
+            cluster_name,
+            len(remaining),
+        )
+        w.progress(len(remaining))
+
+    if remaining:
+        LOG.warning(
+            "OneCloud: cluster %s still reports %d VM(s) after %ds; create may use stale data",
+            cluster_name,
+            len(remaining),
+            CLEANUP_VERIFY_TIMEOUT,
+        )
+    elif vmids:
+        LOG.info("OneCloud: cluster %s verified empty", cluster_name)
+
+    # Delete cluster after VMs (API may support DELETE /clusters/{id})
+    try:
+        cluster_del_resp = client.delete(f"/clusters/{cluster_id}")
+        if cluster_del_resp.status_code in (200, 204):
+            LOG.info("Deleted cluster %s (%s)", cluster_id, cluster_name)
+        elif cluster_del_resp.status_code in (404, 405, 501):
+            LOG.info(
+                "Cluster delete not supported (API %s), cluster %s may remain",
+                cluster_del_resp.status_code,
+                cluster_name,
+            )
+        else:
+            LOG.warning(
+                "Failed to delete cluster %s: %s %s",
+                cluster_id,
+                cluster_del_resp.status_code,
+                cluster_del_resp.text[:200],
+            )
+    except Exception as e:
+        LOG.warning("Error deleting cluster %s: %s", cluster_id, e)
+
+
 def cleanup_onecloud_ceph_nodes(
     onecloud_cred: Dict,
     pattern: str,
@@ -895,6 +1105,11 @@ def cleanup_onecloud_ceph_nodes(
     GET /clusters, filter by cluster_name containing pattern, then GET /vm?clusterid=X,
     DELETE /vm/{id} for each VM, and DELETE /clusters/{id} for the cluster (if supported).
 
+    The clusters are cleaned up concurrently and the VMs of a cluster are deleted
+    with up to CLEANUP_MAX_WORKERS requests in flight. The deletion is verified
+    with a single listing of the cluster per poll, so the teardown time does not
+    grow with the number of clusters or VMs.
+
     Args:
         onecloud_cred: Credentials with globals["onecloud-credentials"].
         pattern: Pattern to match cluster name (e.g. run id or prefix).
@@ -943,123 +1158,20 @@ def cleanup_onecloud_ceph_nodes(
         return
 
     LOG.info("Cleaning up %d clusters matching pattern", len(matching))
-
-    for cluster in matching:
-        cluster_id = cluster.get("clusterid") or cluster.get("clusterID")
-        cluster_name = cluster.get("cluster_name", "?")
-        if not cluster_id:
-            continue
-
-        # List VMs in cluster
-        vm_resp = client.get(f"/vm?clusterid={cluster_id}")
-        if vm_resp.status_code != 200:
-            LOG.warning(
-                "Failed to list VMs for cluster %s: %s", cluster_id, vm_resp.status_code
-            )
-            continue
-
-        vm_data = vm_resp.json()
-        vms = vm_data.get("data", []) if isinstance(vm_data, dict) else vm_data
-        if not isinstance(vms, list):
-            vms = []
-
-        for vm in vms:
-            vmid = vm.get("vmid") or vm.get("vmID")
-            if vmid is None:
-                continue
+    with ThreadPoolExecutor(max_workers=len(matching)) as executor:
+        futures = [
+            executor.submit(_cleanup_onecloud_cluster, client, cluster)
+            for cluster in matching
+        ]
+        for future, cluster in zip(futures, matching):
             try:
-                del_resp = client.delete(f"/vm/{vmid}")
-                if del_resp.status_code in (200, 204):
-                    LOG.info("Deleted VM %s (cluster %s)", vmid, cluster_name)
-                else:
-                    LOG.warning(
-                        "Failed to delete VM %s: %s", vmid, del_resp.status_code
-                    )
+                future.result()
             except Exception as e:
-                LOG.warning("Error deleting VM %s: %s", vmid, e)
-
-        # Verify VMs are gone before proceeding (API may be eventually consistent)
-        def _active_vms(vm_list: List[Dict]) -> List[Dict]:
-            """Filter to VMs that appear active (not deleted/terminated)."""
-            terminal = {"deleted", "terminated", "off"}
-            return [
-                v
-                for v in vm_list
-                if (v.get("state") or v.get("status") or "").lower() not in terminal
-            ]
-
-        vm_resp = client.get(f"/vm?clusterid={cluster_id}")
-        if vm_resp.status_code == 200:
-            try:
-                vm_resp_alt = client.get(f"/vm?clusterID={cluster_id}")
-                if vm_resp_alt.status_code == 200:
-                    vm_resp = vm_resp_alt
-            except Exception:
-                pass
-        all_vms = (
-            parse_vm_list_from_response(vm_resp.json())
-            if vm_resp.status_code == 200
-            else []
-        )
-        remaining = _active_vms(all_vms)
-        if remaining:
-            LOG.info(
-                "OneCloud: verifying deletion for cluster %s (%d VM(s) still listed), polling up to %ds",
-                cluster_name,
-                len(remaining),
-                CLEANUP_VERIFY_TIMEOUT,
-            )
-            deadline = time.time() + CLEANUP_VERIFY_TIMEOUT
-            while time.time() < deadline and remaining:
-                time.sleep(CLEANUP_VERIFY_INTERVAL)
-                vm_resp = client.get(f"/vm?clusterid={cluster_id}")
-                if vm_resp.status_code != 200:
-                    vm_resp = client.get(f"/vm?clusterID={cluster_id}")
-                all_vms = (
-                    parse_vm_list_from_response(vm_resp.json())
-                    if vm_resp.status_code == 200
-                    else []
-                )
-                remaining = _active_vms(all_vms)
-                if remaining:
-                    LOG.info(
-                        "OneCloud: cluster %s still has %d VM(s), waiting...",
-                        cluster_name,
-                        len(remaining),
-                    )
-            if remaining:
-                LOG.warning(
-                    "OneCloud: cluster %s still reports %d VM(s) after %ds; create may use stale data",
-                    cluster_name,
-                    len(remaining),
-                    CLEANUP_VERIFY_TIMEOUT,
-                )
-            else:
-                LOG.info("OneCloud: cluster %s verified empty", cluster_name)
-
-        # Delete cluster after VMs (API may support DELETE /clusters/{id})
-        try:
-            cluster_del_resp = client.delete(f"/clusters/{cluster_id}")
-            if cluster_del_resp.status_code in (200, 204):
-                LOG.info("Deleted cluster %s (%s)", cluster_id, cluster_name)
-            elif cluster_del_resp.status_code in (404, 405, 501):
-                LOG.info(
-                    "Cluster delete not supported (API %s), cluster %s may remain",
-                    cluster_del_resp.status_code,
-                    cluster_name,
-                )
-            else:
                 LOG.warning(
-                    "Failed to delete cluster %s: %s %s",
-                    cluster_id,
-                    cluster_del_resp.status_code,
-                    cluster_del_resp.text[:200],
+                    "Error cleaning up cluster %s: %s", cluster.get("cluster_name"), e
                 )
-        except Exception as e:
-            LOG.warning("Error deleting cluster %s: %s", cluster_id, e)
 
-    if matching:
-        time.sleep(5)  # allow backend to settle before create
+    time.sleep(5)  # allow backend to settle before create
     LOG.info("Done cleaning up OneCloud nodes with pattern %s", pattern)
 
 
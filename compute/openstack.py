@@ -2,11 +2,13 @@
 
 import ipaddress
 import socket
+import threading
 from datetime import datetime, timedelta
-from time import sleep
-from typing import List, Optional, Union
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, List, Optional, Union
 from uuid import UUID
 
+from libcloud.common.openstack_identity import OpenStackAuthenticationCache
 from libcloud.compute.base import Node, NodeDriver, NodeImage, NodeSize
 from libcloud.compute.drivers.openstack import (
     OpenStack_2_NodeDriver,
@@ -26,6 +28,7 @@ from .exceptions import (
     ResourceNotFound,
     VolumeOpFailure,
 )
+from .rate_limiter import get_rate_limiter
 
 LOG = Log(__name__)
 
@@ -37,11 +40,55 @@ LOG = Log(__name__)
 # exception and return a response
 socket.setdefaulttimeout(280)
 
+# Seconds for which the flavors, images and networks are served from the catalog
+CATALOG_TTL = 300
+
+# Seconds for which the IP availability of a network is reused
+IP_AVAILABILITY_TTL = 60
+
+# Free IPs left on a subnet to avoid failures, as the private IP is allocated
+# towards the end of the node creation workflow.
+FREE_IP_BUFFER = 3
+
+
+class MemoryAuthCache(OpenStackAuthenticationCache):
+    """Keystone tokens shared by all the drivers of the process."""
+
+    def __init__(self) -> None:
+        self._contexts: Dict = dict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._contexts.get(key)
+
+    def put(self, key, context) -> None:
+        with self._lock:
+            self._contexts[key] = context
+
+    def clear(self, key) -> None:
+        with self._lock:
+            self._contexts.pop(key, None)
+
+
+AUTH_CACHE = MemoryAuthCache()
+_DRIVERS = threading.local()
+_CATALOGS: Dict[tuple, "OpenStackCatalog"] = dict()
+_CATALOGS_LOCK = threading.Lock()
+
+
+def _creds_key(creds: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in creds.items()))
+
 
 def get_openstack_driver(**creds) -> Union[NodeDriver, OpenStack_2_NodeDriver]:
     """
     Return the client that can interact with the OpenStack cloud.
 
+    The libcloud connections are not thread safe, hence a driver is cached per
+    thread for the given credentials. The Keystone token and service catalog are
+    shared by all the drivers of the process, so the user is authenticated once.
+
     Args:
         **creds: Key-value pairs that are required to authenticate the user.
         Required keys are:
@@ -57,18 +104,120 @@ def get_openstack_driver(**creds) -> Union[NodeDriver, OpenStack_2_NodeDriver]:
         An instance of NodeDriver or OpenStack_2_NodeDriver that can be used to
         interact with the OpenStack cloud.
     """
-    openstack = get_driver(Provider.OPENSTACK)
-    return openstack(
-        creds["username"],
-        creds["password"],
-        api_version=creds.get("api_version", "2.2"),
-        ex_force_auth_url=creds["auth_url"],
-        ex_force_auth_version=creds["auth_version"],
-        ex_tenant_name=creds["tenant_name"],
-        ex_force_service_region=creds["service_region"],
-        ex_domain_name=creds["domain_name"],
-        ex_tenant_domain_id=creds["tenant_domain_id"],
-    )
+    drivers = _DRIVERS.__dict__.setdefault("drivers", dict())
+    key = _creds_key(creds)
+    if key not in drivers:
+        openstack = get_driver(Provider.OPENSTACK)
+        drivers[key] = openstack(
+            creds["username"],
+            creds["password"],
+            api_version=creds.get("api_version", "2.2"),
+            ex_force_auth_url=creds["auth_url"],
+            ex_force_auth_version=creds["auth_version"],
+            ex_tenant_name=creds["tenant_name"],
+            ex_force_service_region=creds["service_region"],
+            ex_domain_name=creds["domain_name"],
+            ex_tenant_domain_id=creds["tenant_domain_id"],
+            ex_auth_cache=AUTH_CACHE,
+        )
+
+    return drivers[key]
+
+
+class OpenStackCatalog:
+    """
+    Time bound index of the flavors, images and networks of an OpenStack cloud.
+
+    The index is shared by all the nodes created using the same credentials, hence
+    a cluster issues the catalog queries once instead of once per node. Concurrent
+    lookups of the same resource wait for the first one to complete.
+
+    The IP addresses handed out to the nodes are reserved locally against the IP
+    availability of the subnet, so that concurrent creations do not pick a subnet
+    which has just enough addresses for one of them.
+    """
+
+    def __init__(self, ttl: float = CATALOG_TTL) -> None:
+        """
+        Initialize the catalog.
+
+        Args:
+            ttl:    Seconds for which a resource is served from the catalog.
+        """
+        self.ttl = ttl
+        self._entries: Dict[tuple, tuple] = dict()
+        self._key_locks: Dict[tuple, threading.Lock] = dict()
+        self._reserved: Dict[str, Dict[str, int]] = dict()
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key: tuple) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _cached(self, key: tuple) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry and entry[0] > monotonic():
+            return entry
+        return None
+
+    def get(self, key: tuple, loader: Callable) -> Any:
+        """
+        Return the cached resource or the one returned by the loader.
+
+        Args:
+            key:    Identity of the resource.
+            loader: Retrieves the resource from the cloud, not cached when it raises.
+        """
+        with self._key_lock(key):
+            entry = self._cached(key)
+            if entry:
+                return entry[1]
+
+            value = loader()
+            self._entries[key] = (monotonic() + self.ttl, value)
+            return value
+
+    def reserve_ip(self, network_id: str, loader: Callable) -> Optional[str]:
+        """
+        Reserve an IP address on the first subnet of the network with free IPs.
+
+        Args:
+            network_id: The network to lease the IP address from.
+            loader:     Returns the IP availability of the subnets of the network.
+
+        Returns:
+            The CIDR of the subnet having an IP address reserved else None.
+        """
+        key = ("ip-availability", network_id)
+        with self._key_lock(key):
+            entry = self._cached(key)
+            if not entry:
+                # The refreshed availability accounts for the IPs leased so far
+                entry = (monotonic() + IP_AVAILABILITY_TTL, loader())
+                self._entries[key] = entry
+                self._reserved[network_id] = dict()
+
+            reserved = self._reserved[network_id]
+            for subnet in entry[1]:
+                cidr = subnet["cidr"]
+                free_ips = (
+                    subnet["total_ips"] - subnet["used_ips"] - reserved.get(cidr, 0)
+                )
+                if free_ips > FREE_IP_BUFFER:
+                    reserved[cidr] = reserved.get(cidr, 0) + 1
+                    return cidr
+
+        return None
+
+
+def get_openstack_catalog(creds: dict) -> OpenStackCatalog:
+    """Return the process wide catalog of the cloud referenced by the credentials."""
+    key = _creds_key(creds)
+    with _CATALOGS_LOCK:
+        if key not in _CATALOGS:
+            _CATALOGS[key] = OpenStackCatalog()
+
+        return _CATALOGS[key]
 
 
 class CephVMNodeV2:
@@ -164,7 +313,8 @@ class CephVMNodeV2:
 
             LOG.info(f"{node_name} networks: {[i.name for i in vm_network]}")
 
-            self.node = self.driver.create_node(
+            self.node = get_rate_limiter("openstack").call(
+                self.driver.create_node,
                 name=node_name,
                 image=image,
                 size=vm_size,
@@ -276,6 +426,11 @@ class CephVMNodeV2:
 
         self.driver = get_openstack_driver(**self._os_cred)
 
+    @property
+    def catalog(self) -> OpenStackCatalog:
+        """Return the catalog shared by the nodes of the cloud."""
+        return get_openstack_catalog(self._os_cred)
+
     # Private methods to the object
     def _get_node(self, name: str) -> Node:
         """
@@ -321,20 +476,25 @@ class CephVMNodeV2:
         """
         try:
             if UUID(hex=name):
-                return self.driver.get_image(name)
+                return self.catalog.get(
+                    ("image", name), lambda: self.driver.get_image(name)
+                )
         except ValueError:
             pass
 
-        url = f"/v2/images?name={name}"
-        object_ = self.driver.image_connection.request(url).object
-        images = self.driver._to_images(object_, ex_only_active=False)
+        def _load():
+            url = f"/v2/images?name={name}"
+            object_ = self.driver.image_connection.request(url).object
+            images = self.driver._to_images(object_, ex_only_active=False)
 
-        if len(images) != 1:
-            raise ExactMatchFailed(
-                f"Found none or more than one image resource with name: {name}"
-            )
+            if len(images) != 1:
+                raise ExactMatchFailed(
+                    f"Found none or more than one image resource with name: {name}"
+                )
 
-        return images[0]
+            return images[0]
+
+        return self.catalog.get(("image", name), _load)
 
     def _get_vm_size(self, name: str) -> NodeSize:
         """
@@ -352,7 +512,7 @@ class CephVMNodeV2:
             ResourceNotFound - when the named vm size resource does not exist in the
                                given OpenStack Cloud.
         """
-        for flavor in self.driver.list_sizes():
+        for flavor in self.catalog.get(("sizes",), self.driver.list_sizes):
             if flavor.name == name:
                 return flavor
 
@@ -372,14 +532,18 @@ class CephVMNodeV2:
             ResourceNotFound: when the named network resource does not exist in the
                               given OpenStack cloud
         """
-        url = f"{self.driver._networks_url_prefix}?name={name}"
-        object_ = self.driver.network_connection.request(url).object
-        networks = self.driver._to_networks(object_)
 
-        if not networks:
-            raise ResourceNotFound(f"No network resource with name {name} found.")
+        def _load():
+            url = f"{self.driver._networks_url_prefix}?name={name}"
+            object_ = self.driver.network_connection.request(url).object
+            networks = self.driver._to_networks(object_)
+
+            if not networks:
+                raise ResourceNotFound(f"No network resource with name {name} found.")
+
+            return networks[0]
 
-        return networks[0]
+        return self.catalog.get(("network", name), _load)
 
     def _has_free_ip_addresses(self, net: OpenStackNetwork) -> bool:
         """
@@ -390,7 +554,8 @@ class CephVMNodeV2:
         of the workflow.
 
         When a subnet with free IPs is identified then it's CIDR information is
-        assigned to self.subnet attribute on this object.
+        assigned to self.subnet attribute on this object. The IP address is reserved
+        in the catalog, so that the nodes created concurrently account for it.
 
         Arguments:
             net:    The OpenStackNetwork instance to be checked for IP availability.
@@ -398,18 +563,18 @@ class CephVMNodeV2:
         Returns:
             True on success else False
         """
-        url = f"/v2.0/network-ip-availabilities/{net.id}"
-        resp = self.driver.network_connection.request(url)
-        subnets = resp.object["network_ip_availability"]["subnet_ip_availability"]
 
-        for subnet in subnets:
-            free_ips = subnet["total_ips"] - subnet["used_ips"]
+        def _load():
+            url = f"/v2.0/network-ip-availabilities/{net.id}"
+            resp = self.driver.network_connection.request(url)
+            return resp.object["network_ip_availability"]["subnet_ip_availability"]
 
-            if free_ips > 3:
-                self._subnet.append(subnet["cidr"])
-                return True
+        cidr = self.catalog.reserve_ip(net.id, _load)
+        if not cidr:
+            return False
 
-        return False
+        self._subnet.append(cidr)
+        return True
 
     def get_network(
         self,
@@ -521,7 +686,9 @@ class CephVMNodeV2:
 
         for item in range(0, no_of_volumes):
             vol_name = f"{self.node.name}-vol-{item}"
-            volume = self.driver.create_volume(size_of_disk, vol_name)
+            volume = get_rate_limiter("openstack").call(
+                self.driver.create_volume, size_of_disk, vol_name
+            )
 
             if not volume:
                 raise VolumeOpFailure(f"Failed to create volume with name {vol_name}")
@@ -0,0 +1,282 @@
+"""Concurrent cleanup of the OpenStack resources of a test run.
+
+The volumes and the nodes matching the run pattern are listed once. The volumes are
+detached and destroyed concurrently, followed by the nodes. Every mutating call is
+passed through the shared openstack rate limiter and the engine waits for the
+resources to reach the expected state instead of sleeping for a fixed duration.
+
+Each resource has a timeline of the cleanup events with the seconds elapsed since
+the start of the cleanup, which is written to the log at the end.
+
+Example::
+
+    cleanup = OpenStackCleanup(lambda: get_openstack_driver(osp_cred), "-cephci-")
+    cleanup.run()
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from typing import Callable, Dict, List, Optional
+
+from libcloud.compute.types import StorageVolumeState
+
+from ceph.waiter import WaitUntil
+from utility.log import Log
+
+from .rate_limiter import get_rate_limiter
+
+LOG = Log(__name__)
+
+MAX_WORKERS = 10
+DETACH_TIMEOUT = 200
+STATE_INTERVAL = 1
+STATE_MAX_INTERVAL = 10
+ATTACHED_STATES = (StorageVolumeState.INUSE, StorageVolumeState.ATTACHING)
+NOT_FOUND = 404
+# Cinder and Nova reject calls on a resource in a transitional state using 400 or 409
+RETRYABLE_STATUS_CODES = (400, 408, 409, 429)
+
+
+class CleanupEvent:
+    """Names of the events recorded in the resource timelines."""
+
+    LISTED = "listed"
+    DETACH = "detach"
+    DETACHED = "detached"
+    DESTROY = "destroy"
+    GONE = "gone"
+    FAILED = "failed"
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """Return the HTTP status code reported by the libcloud exception, if any."""
+    for attr in ("code", "status_code", "http_status_code"):
+        code = getattr(exc, attr, None)
+        if isinstance(code, int):
+            return code
+
+    return None
+
+
+def is_permanent(exc: BaseException) -> bool:
+    """Return True if the call failed with a client error that a retry won't fix."""
+    code = status_code(exc)
+    return code is not None and 400 <= code < 500 and code not in RETRYABLE_STATUS_CODES
+
+
+class OpenStackCleanup:
+    """Destroys the volumes and nodes whose name contains the given pattern."""
+
+    def __init__(
+        self,
+        driver_factory: Callable,
+        pattern: str,
+        timeout: int = 300,
+        max_workers: int = MAX_WORKERS,
+    ) -> None:
+        """
+        Initialize the cleanup.
+
+        Args:
+            driver_factory: Returns a libcloud OpenStack driver. The drivers are not
+                            thread safe, hence one is created per worker thread.
+            pattern:        Resources whose name contains the pattern are removed.
+            timeout:        Seconds allowed for the cleanup of every phase.
+            max_workers:    Maximum number of resources processed concurrently.
+        """
+        self.driver_factory = driver_factory
+        self.pattern = pattern
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.limiter = get_rate_limiter("openstack")
+        self.timelines: Dict[str, Dict] = dict()
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._start = monotonic()
+
+    @property
+    def driver(self):
+        """Return the driver of the calling thread."""
+        if getattr(self._local, "driver", None) is None:
+            self._local.driver = self.driver_factory()
+        return self._local.driver
+
+    def _record(self, kind: str, resource, event: str, detail: str = None) -> None:
+        key = f"{kind}/{resource.id}"
+        with self._lock:
+            timeline = self.timelines.setdefault(
+                key, {"kind": kind, "name": resource.name, "events": []}
+            )
+            entry = (event, round(monotonic() - self._start, 3))
+            timeline["events"].append(entry + ((detail,) if detail else ()))
+
+    def _matches(self, resource) -> bool:
+        if resource.name is None:
+            LOG.info("%s has no name, skipping", resource.id)
+            return False
+        return self.pattern in resource.name
+
+    def _concurrently(self, func: Callable, resources: List) -> List:
+        if not resources:
+            return []
+        workers = min(self.max_workers, len(resources))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, resources))
+
+    def _retry(self, kind: str, resource, func: Callable, *args) -> bool:
+        """
+        Invoke the API until it succeeds or the phase timeout is reached.
+
+        A resource which is not found is already removed, hence the call succeeds.
+        Client errors other than the transitional state conflicts are not retried.
+        """
+        error, name = None, getattr(func, "__name__", kind)
+        for w in WaitUntil(
+            timeout=self.timeout,
+            interval=STATE_INTERVAL,
+            backoff=2,
+            max_interval=STATE_MAX_INTERVAL,
+            name=f"openstack_cleanup_{name}",
+        ):
+            try:
+                self.limiter.call(func, *args)
+                return True
+            except Exception as e:  # noqa
+                if status_code(e) == NOT_FOUND:
+                    LOG.debug("%s %s is already removed", kind, resource.name)
+                    return True
+
+                error = e
+                LOG.debug("%s of %s failed: %s", name, resource.name, e)
+                if is_permanent(e):
+                    break
+
+        self._record(kind, resource, CleanupEvent.FAILED, str(error))
+        LOG.error("Error in %s of %s %s: %s", name, kind, resource.name, error)
+        return False
+
+    def _wait_detached(self, volume) -> bool:
+        for w in WaitUntil(
+            timeout=DETACH_TIMEOUT,
+            interval=STATE_INTERVAL,
+            backoff=1.5,
+            max_interval=STATE_MAX_INTERVAL,
+            name="openstack_cleanup_detach",
+        ):
+            try:
+                current = self.driver.ex_get_volume(volume.id)
+            except Exception as e:  # noqa
+                if status_code(e) != NOT_FOUND:
+                    raise
+                return True
+
+            if current is None or current.state not in ATTACHED_STATES:
+                return True
+            w.progress(current.state)
+
+        return False
+
+    def _cleanup_volume(self, volume) -> bool:
+        if volume.state in ATTACHED_STATES or volume.extra.get("attachments"):
+            self._record("volume", volume, CleanupEvent.DETACH)
+            if not self._retry("volume", volume, self.driver.detach_volume, volume):
+                return False
+            if not self._wait_detached(volume):
+                self._record("volume", volume, CleanupEvent.FAILED, "still attached")
+                return False
+            self._record("volume", volume, CleanupEvent.DETACHED)
+
+        self._record("volume", volume, CleanupEvent.DESTROY)
+        return self._retry("volume", volume, self.driver.destroy_volume, volume)
+
+    def _destroy_node(self, node) -> bool:
+        self._record("node", node, CleanupEvent.DESTROY)
+        return self._retry("node", node, self.driver.destroy_node, node)
+
+    def _wait_gone(self, kind: str, resources: List, list_func: Callable) -> List:
+        """Poll the listing of the resources once per attempt until all are gone."""
+        pending = {r.id: r for r in resources}
+        for w in WaitUntil(
+            timeout=self.timeout,
+            interval=STATE_INTERVAL,
+            backoff=1.5,
+            max_interval=STATE_MAX_INTERVAL,
+            name=f"openstack_cleanup_{kind}_gone",
+        ):
+            present = {r.id for r in list_func()}
+            for _id in list(pending):
+                if _id not in present:
+                    self._record(kind, pending.pop(_id), CleanupEvent.GONE)
+
+            if not pending:
+                break
+            w.progress(len(pending))
+
+        return list(pending.values())
+
+    def cleanup_volumes(self, volumes: List) -> List:
+        """Detach and destroy the volumes, returns the volumes that remain."""
+        results = self._concurrently(self._cleanup_volume, volumes)
+        destroyed = [v for v, ok in zip(volumes, results) if ok]
+        remaining = [v for v, ok in zip(volumes, results) if not ok]
+        if destroyed:
+            remaining += self._wait_gone("volume", destroyed, self.driver.list_volumes)
+
+        return remaining
+
+    def cleanup_nodes(self, nodes: List) -> List:
+        """Destroy the nodes, returns the nodes that remain."""
+        results = self._concurrently(self._destroy_node, nodes)
+        destroyed = [n for n, ok in zip(nodes, results) if ok]
+        remaining = [n for n, ok in zip(nodes, results) if not ok]
+        if destroyed:
+            remaining += self._wait_gone("node", destroyed, self.driver.list_nodes)
+
+        return remaining
+
+    def run(self) -> Dict[str, List]:
+        """
+        Remove the volumes and the nodes matching the pattern.
+
+        Returns:
+            The volumes and nodes that could not be removed, keyed by kind.
+        """
+        self._start = monotonic()
+        volumes = [v for v in self.driver.list_volumes() if self._matches(v)]
+        nodes = [n for n in self.driver.list_nodes() if self._matches(n)]
+        for volume in volumes:
+            self._record("volume", volume, CleanupEvent.LISTED)
+        for node in nodes:
+            self._record("node", node, CleanupEvent.LISTED)
+
+        LOG.info(
+            "Removing %d volumes and %d nodes matching %s",
+            len(volumes),
+            len(nodes),
+            self.pattern,
+        )
+        remaining = {
+            "volumes": self.cleanup_volumes(volumes),
+            "nodes": self.cleanup_nodes(nodes),
+        }
+        self.log_timeline()
+        return remaining
+
+    def log_timeline(self, timelines: Optional[Dict] = None) -> None:
+        """Write the events of every resource to the log."""
+        timelines = self.timelines if timelines is None else timelines
+        if not timelines:
+            return
+
+        lines = [f"OpenStack cleanup timeline of {self.pattern}:"]
+        for timeline in sorted(
+            timelines.values(), key=lambda _t: (_t["kind"], _t["events"][-1][1])
+        ):
+            events = ", ".join(
+                f"{_e[0]}@{_e[1]:.1f}s" + (f" ({_e[2]})" if len(_e) > 2 else "")
+                for _e in timeline["events"]
+            )
+            lines.append(f"  {timeline['kind']} {timeline['name']}: {events}")
+        LOG.info("\n".join(lines))
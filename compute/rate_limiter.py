@@ -0,0 +1,274 @@
+"""Rate limiting of cloud provider API calls.
+
+The provisioning workflows spawn one thread per node and every thread talks to the
+same cloud endpoint. Instead of staggering the threads with a linear sleep, the
+calls are passed through a shared limiter which
+
+  - allows a burst of requests and then refills at a steady rate (token bucket)
+  - bounds the number of calls that are in flight at any point in time
+  - backs off exponentially with jitter when the provider reports throttling or
+    quota errors (HTTP 429, RequestLimitExceeded, Quota exceeded etc.)
+
+Example::
+
+    limiter = get_rate_limiter("openstack")
+    node = limiter.call(driver.create_node, name=name, image=image, size=size)
+"""
+
+import random
+import re
+import threading
+from contextlib import contextmanager
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, Optional
+
+from utility.log import Log
+
+from .exceptions import RateLimitExceeded
+
+LOG = Log(__name__)
+
+THROTTLE_STATUS_CODES = (429,)
+THROTTLE_ERROR_CODES = (
+    "Throttling",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "TooManyRequests",
+    "RateLimitExceeded",
+)
+THROTTLE_PATTERN = re.compile(
+    r"too many requests|rate.?limit|quota exceeded|over.?limit|throttl",
+    re.IGNORECASE,
+)
+
+# Default limits per provider, can be overridden via get_rate_limiter kwargs.
+PROVIDER_LIMITS = {
+    "openstack": {"rate": 1.0, "burst": 5, "max_concurrent": 10},
+    "aws": {"rate": 2.0, "burst": 5, "max_concurrent": 10},
+    "ibmc": {"rate": 0.5, "burst": 3, "max_concurrent": 5},
+    "onecloud": {"rate": 1.0, "burst": 3, "max_concurrent": 5},
+}
+
+_LIMITERS: Dict[str, "CloudRateLimiter"] = dict()
+_LIMITERS_LOCK = threading.Lock()
+
+
+def is_throttled(exc: BaseException) -> bool:
+    """
+    Return True if the exception indicates that the provider throttled the call.
+
+    Args:
+        exc:    The exception raised by the cloud SDK.
+    """
+    for attr in ("code", "status_code", "http_status_code"):
+        if getattr(exc, attr, None) in THROTTLE_STATUS_CODES:
+            return True
+
+    # botocore.exceptions.ClientError
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        if response.get("Error", {}).get("Code") in THROTTLE_ERROR_CODES:
+            return True
+
+    return bool(THROTTLE_PATTERN.search(str(exc)))
+
+
+def is_throttled_response(resp: Any) -> bool:
+    """Return True if the given HTTP response object reports throttling."""
+    return getattr(resp, "status_code", None) in THROTTLE_STATUS_CODES
+
+
+class TokenBucket:
+    """Thread safe token bucket."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        """
+        Initialize the bucket in full state.
+
+        Args:
+            rate:       Number of tokens added per second.
+            capacity:   Maximum number of tokens the bucket can hold.
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def acquire(self, tokens: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the requested tokens are available.
+
+        Args:
+            tokens:     Number of tokens to consume.
+            timeout:    Maximum seconds to wait, None waits forever.
+
+        Returns:
+            True when the tokens are consumed else False on timeout.
+        """
+        end_time = None if timeout is None else monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+
+                wait = (tokens - self._tokens) / self.rate
+
+            if end_time is not None:
+                remaining = end_time - monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+
+            sleep(wait)
+
+    def drain(self) -> None:
+        """Empty the bucket, used to slow down every caller after throttling."""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+
+class CloudRateLimiter:
+    """Token bucket with bounded concurrency and backoff for a cloud provider."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 1.0,
+        burst: int = 5,
+        max_concurrent: int = 10,
+        tries: int = 6,
+        delay: float = 5.0,
+        backoff: float = 2.0,
+        max_delay: float = 120.0,
+    ) -> None:
+        """
+        Initialize the limiter.
+
+        Args:
+            name:           Name of the provider, used in logs.
+            rate:           Sustained number of calls per second.
+            burst:          Number of calls allowed back to back.
+            max_concurrent: Maximum number of calls in flight.
+            tries:          Number of attempts when the provider throttles.
+            delay:          Initial backoff delay in seconds.
+            backoff:        Backoff multiplier.
+            max_delay:      Upper bound of the backoff delay in seconds.
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.tries = tries
+        self.delay = delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+
+        self._bucket = TokenBucket(rate=rate, capacity=burst)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "throttled": 0, "wait_time": 0.0}
+
+    @property
+    def stats(self) -> dict:
+        """Return the number of calls, throttled calls and time spent waiting."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _record(self, **kwargs) -> None:
+        with self._lock:
+            for key, value in kwargs.items():
+                self._stats[key] += value
+
+    @contextmanager
+    def slot(self):
+        """Wait for a token and a free concurrency slot."""
+        start = monotonic()
+        self._bucket.acquire()
+        self._slots.acquire()
+        self._record(calls=1, wait_time=monotonic() - start)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Execute the function once a slot is available, backing off on throttling.
+
+        Args:
+            func:       The cloud API method to be invoked.
+            args:       Positional arguments of the method.
+            kwargs:     Keyword arguments of the method.
+
+        Returns:
+            The value returned by the function.
+
+        Raises:
+            RateLimitExceeded   when the provider throttles every attempt.
+        """
+        mdelay = self.delay
+        for attempt in range(1, self.tries + 1):
+            try:
+                with self.slot():
+                    result = func(*args, **kwargs)
+
+                if not is_throttled_response(result):
+                    return result
+
+                reason = f"HTTP {result.status_code}"
+            except Exception as e:  # noqa
+                if not is_throttled(e):
+                    raise
+                reason = str(e)
+
+            self._record(throttled=1)
+            self._bucket.drain()
+            if attempt == self.tries:
+                break
+
+            _delay = min(mdelay, self.max_delay) * random.uniform(0.5, 1.5)
+            LOG.warning(
+                "%s throttled %s: %s. Retrying in %.1f seconds (Attempt %d/%d)",
+                self.name,
+                getattr(func, "__name__", func),
+                reason,
+                _delay,
+                attempt,
+                self.tries,
+            )
+            sleep(_delay)
+            mdelay *= self.backoff
+
+        raise RateLimitExceeded(
+            f"{self.name}: {getattr(func, '__name__', func)} throttled "
+            f"after {self.tries} attempts"
+        )
+
+
+def get_rate_limiter(provider: str, **kwargs) -> CloudRateLimiter:
+    """
+    Return the process wide limiter of the given cloud provider.
+
+    The limiter is created on first use with the provider defaults which can be
+    overridden using kwargs. Subsequent calls return the same instance.
+
+    Args:
+        provider:   Name of the provider (openstack, aws, ibmc or onecloud).
+        kwargs:     Arguments supported by CloudRateLimiter.
+    """
+    with _LIMITERS_LOCK:
+        if provider not in _LIMITERS:
+            config = dict(PROVIDER_LIMITS.get(provider, {}))
+            config.update(kwargs)
+            _LIMITERS[provider] = CloudRateLimiter(name=provider, **config)
+
+        return _LIMITERS[provider]
@@ -18,7 +18,7 @@ from docopt import docopt
 from libcloud.common.types import LibcloudError
 
 import init_suite
-from ceph.ceph import Ceph, CephNode
+from ceph.ceph import Ceph, CephNode, connect_nodes, gather_node_facts
 from ceph.clients import WinNode
 from ceph.utils import (
     cleanup_ceph_nodes,
@@ -29,6 +29,7 @@ from ceph.utils import (
     create_ibmc_ceph_nodes,
     create_onecloud_ceph_nodes,
 )
+from ceph.waiter import log_wait_summary
 from cephci.cluster_info import collect_ceph_coredumps, get_ceph_var_logs
 from cephci.utils.build_info import CephTestManifest
 from cli.performance.memory_and_cpu_utils import (
@@ -39,6 +40,7 @@ from cli.performance.memory_and_cpu_utils import (
 from compute.aws_ec2 import cleanup_aws_ceph_nodes
 from compute.onecloud import cleanup_onecloud_ceph_nodes, expand_private_key_path
 from utility import sosreport
+from utility.command_cache import get_command_cache
 from utility.log import Log
 from utility.polarion import post_to_polarion
 from utility.retry import retry
@@ -410,12 +412,9 @@ def create_nodes(
         log.info("Sleeping 15 Seconds")
         time.sleep(15)
 
-    for cluster_name, cluster in ceph_cluster_dict.items():
-        for instance in cluster:
-            try:
-                instance.connect()
-            except BaseException:
-                raise
+    connect_nodes(
+        [instance for cluster in ceph_cluster_dict.values() for instance in cluster]
+    )
 
     return ceph_cluster_dict, clients
 
@@ -711,6 +710,17 @@ def run(args):
     if "collect-ceph-logs" in custom_config_dict.keys():
         collect_ceph_logs = bool(custom_config_dict["collect-ceph-logs"])
 
+    # Write the test logs from a background thread, disabled by default.
+    if "async-logging" in custom_config_dict.keys():
+        log.enable_queue_logging()
+
+    # Serve repeated read-only ceph queries from a cache, disabled by default.
+    # Changes not made by a command on the cluster nodes, e.g. a crashed daemon,
+    # are only reflected once the entries expire.
+    command_cache = get_command_cache()
+    if "command-cache-ttl" in custom_config_dict.keys():
+        command_cache.enable(ttl=float(custom_config_dict["command-cache-ttl"]))
+
     # load config, suite and inventory yaml files
     conf = load_file(glb_file)
     suite = init_suite.load_suites(suite_files)
@@ -873,6 +883,11 @@ def run(args):
             for node in cluster:
                 node.reconnect()
 
+        # States stored before the facts were cached do not have them
+        gather_node_facts(
+            [node for cluster in ceph_cluster_dict.values() for node in cluster]
+        )
+
     if store:
         ceph_clusters_file = f"rerun/{instances_name}-{run_id}"
         if not os.path.exists(os.path.dirname(ceph_clusters_file)):
@@ -925,6 +940,9 @@ def run(args):
     download_path = run_dir if not log_directory else log_directory
     cluster_info = []
 
+    for cluster in ceph_cluster_dict.values():
+        command_cache.register_cluster(cluster)
+
     for test in tests:
         test = test.get("test")
         tc = fetch_test_details(test)
@@ -1152,6 +1170,9 @@ def run(args):
         if _object:
             _object._log_errors = []
 
+        # Write the queued records of the test before its results are reported
+        log.flush()
+
         if rc == 0:
             tc["status"] = "Pass"
             msg = "Test {} passed".format(test_mod)
@@ -1208,6 +1229,9 @@ def run(args):
                 enable_eus=enable_eus,
                 platform=platform,
             )
+            command_cache.clear()
+            for cluster in ceph_cluster_dict.values():
+                command_cache.register_cluster(cluster)
 
         tcs.append(tc)
 
@@ -1216,6 +1240,8 @@ def run(args):
         if "/ceph/cephci-jenkins" in run_dir
         else run_dir
     )
+    command_cache.log_stats()
+    log_wait_summary()
     log.info("\nAll test logs located here: {base}".format(base=url_base))
 
     log.close_and_remove_filehandlers()
@@ -1276,7 +1302,7 @@ def run(args):
             "\n\nPreserving core-dump directory due to failures in testcase or user instructed"
         )
         for cluster in ceph_cluster_dict.keys():
-            # method to collect coredumps from ceph nodes
+            # method to collect coredumps from all ceph nodes concurrently
             collect_ceph_coredumps(ceph_cluster_dict[cluster], run_dir)
         log.info(f"Generated coredump location : {url_base}/ceph_coredumps\n")
 
@@ -1305,8 +1331,14 @@ def run(args):
             "\n\nCopying Ceph cluster logs due to failures in testcase or user instructed"
         )
         for cluster in ceph_cluster_dict.keys():
-            # method to collect logs from ceph nodes
-            get_ceph_var_logs(ceph_cluster_dict[cluster], run_dir)
+            # method to collect logs from all ceph nodes concurrently
+            manifest = get_ceph_var_logs(ceph_cluster_dict[cluster], run_dir)
+            for entry in manifest:
+                if entry["status"] != "complete":
+                    log.warning(
+                        f"Ceph logs of {entry['node']} are {entry['status']}, "
+                        f"collected {entry['size']} bytes in {entry['duration']}s"
+                    )
 
         log.info(f"Generated cluster log location : {url_base}/ceph_logs\n")
 
@@ -18,7 +18,7 @@ import subprocess
 import time
 import traceback
 from json import JSONDecodeError
-from threading import Thread
+from threading import Lock, Thread
 from time import sleep
 
 import paramiko
@@ -31,11 +31,69 @@ from cli.cephadm.cephadm import CephAdm
 from cli.utilities.filesys import Mount
 from compute.openstack import get_openstack_driver
 from tests.cephfs.exceptions import ValueMismatchError
+from utility.checksum_manifest import diff_manifests, get_checksum_manifest
 from utility.log import Log
 from utility.retry import retry
 
 log = Log(__name__)
 
+CLIENT_PKGS = [
+    "python3",
+    "python3-pip",
+    "fio",
+    "fuse",
+    "ceph-fuse",
+    "attr",
+    "gcc",
+    "python3-devel",
+    "git",
+    "lua",
+    "acl",
+]
+LEGACY_CLIENT_PKGS = [
+    "@development",
+    "rh-python36",
+    "rh-python36-numpy",
+    "rh-python36-scipy",
+    "rh-test-python-tools",
+    "rh-python36-python-six",
+    "libffi",
+    "libffi-devel",
+]
+# Legacy packages installed by get_clients, which prepare_clients extends with
+# rh-test-python-tools instead of rh-python36-python-tools
+GET_CLIENTS_LEGACY_PKGS = [
+    "@development",
+    "rh-python36",
+    "rh-python36-numpy",
+    "rh-python36-scipy",
+    "rh-python36-python-tools",
+    "rh-python36-python-six",
+    "libffi",
+    "libffi-devel",
+]
+CLIENT_PIP_MODULES = ["xattr", "numpy", "scipy"]
+CLIENT_TOOLS = {
+    "smallfile": "/home/cephuser/smallfile/smallfile_cli.py",
+    "iozone": "/home/cephuser/iozone3_506/src/current/iozone",
+    "Crefi": "/home/cephuser/Crefi",
+}
+SMALLFILE_CLONE_CMD = (
+    "git clone https://github.com/distributed-system-analysis/smallfile.git"
+)
+IOZONE_CMD_LIST = [
+    "cd /home/cephuser;wget http://www.iozone.org/src/current/iozone3_506.tar;",
+    "cd /home/cephuser;tar xvf iozone3_506.tar",
+    "sudo yum install make -y --nogpgcheck",
+    "cd /home/cephuser/iozone3_506/src/current/;make;make linux",
+    "export PATH=$PATH:/home/cephuser/iozone3_506/src/current/",
+]
+
+# Fingerprint of the packages, python modules and tools of the client nodes, it is
+# kept for the whole run as every test module of a suite prepares the same clients.
+_CLIENT_FINGERPRINTS = dict()
+_CLIENT_FINGERPRINTS_LOCK = Lock()
+
 
 def function_execution_time(func):
     """
@@ -89,66 +147,172 @@ class FsUtils(object):
                     client=self.clients[0]
                 )  # daemons_value will use the default value
 
-    def prepare_clients(self, clients, build):
+    @staticmethod
+    def _fingerprint_key(client):
+        node = getattr(client, "node", client)
+        return getattr(node, "ip_address", None) or node.hostname
+
+    @staticmethod
+    def get_client_fingerprint(client, pkgs=(), modules=(), tools=(), refresh=False):
         """
-        Installs all the required rpms and clones the tools required for running Tests on clients
+        Returns the packages, python modules and tools which are present on the client.
+        The result is cached per node for the run and the items which are not known yet
+        are probed using a single remote command.
         Args:
-            clients:
-            build:
+            client: client object or node
+            pkgs: rpm packages or capabilities, groups (@name) are not probed
+            modules: python3 modules
+            tools: names of the tools in CLIENT_TOOLS
+            refresh: probe all the items again
         Returns:
+            set of the present items, as pkg:<name>, pip:<name> and tool:<name>
+        """
+        node = getattr(client, "node", client)
+        key = FsUtils._fingerprint_key(client)
+        items = (
+            [f"pkg:{p}" for p in pkgs if not p.startswith("@")]
+            + [f"pip:{m}" for m in modules]
+            + [f"tool:{t}" for t in tools]
+        )
+        with _CLIENT_FINGERPRINTS_LOCK:
+            known = dict(_CLIENT_FINGERPRINTS.get(key, {}))
+
+        unknown = [i for i in items if refresh or i not in known]
+        if unknown:
+            probes = []
+            for item in unknown:
+                kind, name = item.split(":", 1)
+                if kind == "pkg":
+                    probe = f"rpm -q --quiet --whatprovides {name}"
+                elif kind == "pip":
+                    probe = f"python3 -c 'import {name}' 2>/dev/null"
+                else:
+                    probe = f"test -e {CLIENT_TOOLS[name]}"
+                probes.append(f"{probe} && echo {item}")
+            out, _ = node.exec_command(
+                sudo=True, cmd="; ".join(probes) + "; true", check_ec=False
+            )
+            present = set(out.split())
+            found = {i: i in present for i in unknown}
+            with _CLIENT_FINGERPRINTS_LOCK:
+                _CLIENT_FINGERPRINTS.setdefault(key, {}).update(found)
+            known.update(found)
+
+        return {i for i in items if known[i]}
 
+    @staticmethod
+    def update_client_fingerprint(client, items, present=True):
         """
-        for client in clients:
-            pkgs = [
-                "python3",
-                "python3-pip",
-                "fio",
-                "fuse",
-                "ceph-fuse",
-                "attr",
-                "gcc",
-                "python3-devel",
-                "git",
-                "lua",
-                "acl",
-            ]
-            if build.endswith("7") or build.startswith("3"):
-                pkgs.extend(
-                    [
-                        "@development",
-                        "rh-python36",
-                        "rh-python36-numpy rh-python36-scipy",
-                        "rh-test-python-tools rh-python36-python-six",
-                        "libffi libffi-devel",
-                    ]
-                )
-            cmd = "yum install -y --nogpgcheck " + " ".join(pkgs)
-            client.node.exec_command(sudo=True, cmd=cmd, long_running=True)
-            client.node.exec_command(
-                sudo=True, cmd="pip3 install xattr numpy scipy", long_running=True
+        Records the result of an installation step in the client fingerprint.
+        Args:
+            client: client object or node
+            items: fingerprint items, as pkg:<name>, pip:<name> and tool:<name>
+            present: True when the step succeeded, else the items are probed again
+        """
+        key = FsUtils._fingerprint_key(client)
+        with _CLIENT_FINGERPRINTS_LOCK:
+            fingerprint = _CLIENT_FINGERPRINTS.setdefault(key, {})
+            for item in items:
+                if present:
+                    fingerprint[item] = True
+                else:
+                    fingerprint.pop(item, None)
+
+    @staticmethod
+    def run_on_clients(func, clients, *args, **kwargs):
+        """
+        Runs the function for every client concurrently and reports the time taken.
+        Args:
+            func: function invoked with the client followed by args and kwargs
+            clients: client objects or nodes
+        Returns:
+            dict of the seconds taken per client hostname
+        """
+
+        def timed(client):
+            start = time.monotonic()
+            func(client, *args, **kwargs)
+            return getattr(client, "node", client).hostname, time.monotonic() - start
+
+        with parallel() as p:
+            for client in clients:
+                p.spawn(timed, client)
+
+        timings = dict(p.results)
+        log.info(
+            f"{func.__name__} completed in {p.stats['elapsed']:.1f}s: "
+            + ", ".join(f"{host}={secs:.1f}s" for host, secs in sorted(timings.items()))
+        )
+        return timings
+
+    def ensure_client_tools(self, client, tools):
+        """
+        Clones or builds the IO tools which are missing on the client.
+        Args:
+            client: client object
+            tools: names of the tools in CLIENT_TOOLS
+        """
+        present = self.get_client_fingerprint(client, tools=tools)
+        node = getattr(client, "node", client)
+        if "smallfile" in tools and "tool:smallfile" not in present:
+            node.exec_command(cmd=SMALLFILE_CLONE_CMD)
+            self.update_client_fingerprint(client, ["tool:smallfile"])
+        if "iozone" in tools and "tool:iozone" not in present:
+            for cmd in IOZONE_CMD_LIST:
+                node.exec_command(cmd=cmd)
+            self.update_client_fingerprint(client, ["tool:iozone"])
+
+    def _prepare_client(self, client, pkgs, baremetal=False):
+        present = self.get_client_fingerprint(
+            client, pkgs=pkgs, modules=CLIENT_PIP_MODULES, tools=["smallfile", "iozone"]
+        )
+        groups = [p for p in pkgs if p.startswith("@")]
+        missing = [p for p in pkgs if p not in groups and f"pkg:{p}" not in present]
+        if missing:
+            rc = client.node.exec_command(
+                sudo=True,
+                cmd="yum install -y --nogpgcheck " + " ".join(groups + missing),
+                long_running=True,
             )
-            out, rc = client.node.exec_command(sudo=True, cmd="ls /home/cephuser")
-            if "smallfile" not in out:
-                client.node.exec_command(
-                    cmd="git clone https://github.com/distributed-system-analysis/smallfile.git"
-                )
-            if "iozone" not in out:
-                cmd_list = [
-                    "cd /home/cephuser;wget http://www.iozone.org/src/current/iozone3_506.tar;",
-                    "cd /home/cephuser;tar xvf iozone3_506.tar",
-                    "sudo yum install make -y --nogpgcheck",
-                    "cd /home/cephuser/iozone3_506/src/current/;make;make linux",
-                    "export PATH=$PATH:/home/cephuser/iozone3_506/src/current/",
-                ]
-                for cmd in cmd_list:
-                    client.node.exec_command(cmd=cmd)
-        if (
+            self.update_client_fingerprint(
+                client, [f"pkg:{p}" for p in missing], present=rc == 0
+            )
+
+        modules = [m for m in CLIENT_PIP_MODULES if f"pip:{m}" not in present]
+        if modules:
+            rc = client.node.exec_command(
+                sudo=True, cmd="pip3 install " + " ".join(modules), long_running=True
+            )
+            self.update_client_fingerprint(
+                client, [f"pip:{m}" for m in modules], present=rc == 0
+            )
+
+        self.ensure_client_tools(client, ["smallfile", "iozone"])
+        if baremetal:
+            cmd = "dnf clean all;dnf -y install ceph-common --nogpgcheck;dnf -y update ceph-common --nogpgcheck"
+            client.exec_command(sudo=True, cmd=cmd)
+
+    def prepare_clients(self, clients, build):
+        """
+        Installs all the required rpms and clones the tools required for running Tests on clients.
+        The clients are prepared concurrently and the steps which are already done, as per
+        the fingerprint of the client cached for the run, are skipped.
+        Args:
+            clients: client objects
+            build: ceph build version
+        Returns:
+            dict of the seconds taken per client hostname
+        """
+        pkgs = list(CLIENT_PKGS)
+        if build.endswith("7") or build.startswith("3"):
+            pkgs.extend(LEGACY_CLIENT_PKGS)
+        baremetal = (
             hasattr(clients[0].node, "vm_node")
             and clients[0].node.vm_node.node_type == "baremetal"
-        ):
-            cmd = "dnf clean all;dnf -y install ceph-common --nogpgcheck;dnf -y update ceph-common --nogpgcheck"
-            for client in clients:
-                client.exec_command(sudo=True, cmd=cmd)
+        )
+        return self.run_on_clients(
+            self._prepare_client, clients, pkgs, baremetal=baremetal
+        )
 
     @staticmethod
     def nfs_ganesha_install(ceph_demon):
@@ -2562,17 +2726,26 @@ os.system('sudo systemctl start  network')
         :param directory:
         :return:
         """
-        out, rc = client.exec_command(
-            sudo=True, cmd=f"find {directory} -maxdepth 1 -type f -printf '%f\n'"
-        )
+        manifest = self.get_checksum_manifest(client, directory, maxdepth=1)
+        return {file: entry.hash for file, entry in manifest.items()}
 
-        file_list = out.strip().split()
-        file_dict = {}
-        for file in file_list:
-            out, rc = client.exec_command(sudo=True, cmd=f"md5sum {directory}/{file}")
-            md5sum = out.strip().split()
-            file_dict[file] = md5sum[0]
-        return file_dict
+    def get_checksum_manifest(self, client, directory, maxdepth=None, **kwargs):
+        """
+        Collects the size, mtime and checksum of the files under the directory in a
+        single remote invocation, the files are hashed in parallel on the client.
+        :param client: client having the file system mounted
+        :param directory: absolute path of the directory
+        :param maxdepth: levels of directories to descend, None for the whole tree
+        :return: dict mapping the relative path of the files to their ManifestEntry
+        """
+        return get_checksum_manifest(client, directory, maxdepth=maxdepth, **kwargs)
+
+    def diff_checksum_manifests(self, before, after, **kwargs):
+        """
+        Compares two manifests returned by get_checksum_manifest
+        :return: dict with the paths which are added, removed and modified
+        """
+        return diff_manifests(before, after, **kwargs)
 
     def set_xattrs(
         self,
@@ -3006,6 +3179,7 @@ os.system('sudo systemctl start  network')
 
     def run_ios(self, client, mounting_dir, io_tools=["dd", "smallfile"], file_name=""):
         def smallfile():
+            self.ensure_client_tools(client, ["smallfile"])
             operations = [
                 "create",
                 "read",
@@ -3467,77 +3641,7 @@ os.system('sudo systemctl start  network')
         self.clients = self.ceph_cluster.get_ceph_objects("client")
         self.mon_node_ip = self.get_mon_node_ips()
         # self.mon_node_ip = ",".join(self.mon_node_ip_list)
-        for client in self.clients:
-            node = client.node
-            if node.pkg_type == "rpm":
-                out, rc = node.exec_command(
-                    sudo=True, cmd="rpm -qa | grep -w 'attr\\|xattr'"
-                )
-                if "attr" not in out:
-                    node.exec_command(sudo=True, cmd="yum install -y attr")
-                node.exec_command(
-                    sudo=True, cmd="yum install -y gcc python3-devel", check_ec=False
-                )
-
-                if "xattr" not in out:
-                    pkgs = [
-                        "@development",
-                        "rh-python36",
-                        "rh-python36-numpy rh-python36-scipy",
-                        "rh-python36-python-tools rh-python36-python-six",
-                        "libffi libffi-devel",
-                    ]
-                    if build.endswith("7") or build.startswith("3"):
-                        cmd = "yum install -y " + " ".join(pkgs)
-                        node.exec_command(sudo=True, cmd=cmd, timeout=3600)
-
-                    node.exec_command(sudo=True, cmd="pip3 install xattr", timeout=3600)
-
-                out, rc = node.exec_command(sudo=True, cmd="ls /home/cephuser")
-                log.info("ls /home/cephuser : {}".format(out))
-
-                if "Crefi" not in out:
-                    self._setup_crefi(node)
-
-                if "smallfile" not in out:
-                    node.exec_command(
-                        cmd="git clone https://github.com/distributed-system-analysis/smallfile.git"
-                    )
-
-                out, rc = node.exec_command(sudo=True, cmd="rpm -qa")
-                if "fio" not in out:
-                    node.exec_command(sudo=True, cmd="yum install -y fio")
-                if "fuse-2" not in out:
-                    node.exec_command(sudo=True, cmd="yum install -y fuse")
-                if "ceph-fuse" not in out:
-                    node.exec_command(
-                        sudo=True, cmd="yum install -y --nogpgcheck ceph-fuse"
-                    )
-
-            elif node.pkg_type == "deb":
-                node.exec_command(sudo=True, cmd="pip3 install --upgrade pip3")
-                out, rc = node.exec_command(sudo=True, cmd="apt list libattr1-dev")
-                out = out.split()
-                if "libattr1-dev/xenial,now" not in out:
-                    node.exec_command(sudo=True, cmd="apt-get install -y libattr1-dev")
-                out, rc = node.exec_command(sudo=True, cmd="apt list attr")
-                out = out.split()
-                if "attr/xenial,now" not in out:
-                    node.exec_command(sudo=True, cmd="apt-get install -y attr")
-                out, rc = node.exec_command(sudo=True, cmd="apt list fio")
-                out = out.split()
-                if "fio/xenial,now" not in out:
-                    node.exec_command(sudo=True, cmd="apt-get install -y fio")
-                out, rc = node.exec_command(sudo=True, cmd="pip3 list")
-                if "crefi" not in out:
-                    node.exec_command(sudo=True, cmd="pip3 install crefi")
-
-                out, rc = node.exec_command(sudo=True, cmd="ls /home/cephuser")
-                if "smallfile" not in out:
-                    node.exec_command(
-                        cmd="git clone "
-                        "https://github.com/distributed-system-analysis/smallfile.git"
-                    )
+        self.run_on_clients(self._setup_client, self.clients, build)
         self.mounting_dir = "".join(
             random.choice(string.ascii_lowercase + string.digits)
             for _ in list(range(10))
@@ -3558,6 +3662,79 @@ os.system('sudo systemctl start  network')
 
         return self.result_vals, 0
 
+    def _setup_client(self, client, build):
+        node = client.node
+        if node.pkg_type == "rpm":
+            self._setup_rpm_client(node, build)
+        elif node.pkg_type == "deb":
+            self._setup_deb_client(node)
+
+    def _setup_rpm_client(self, node, build):
+        pkgs = ["attr", "gcc", "python3-devel", "fio", "fuse", "ceph-fuse"]
+        present = self.get_client_fingerprint(
+            node, pkgs=pkgs, modules=["xattr"], tools=["Crefi", "smallfile"]
+        )
+        log.info(f"Fingerprint of {node.hostname} : {sorted(present)}")
+        if "pkg:attr" not in present:
+            node.exec_command(sudo=True, cmd="yum install -y attr")
+            self.update_client_fingerprint(node, ["pkg:attr"])
+
+        devel = [p for p in ["gcc", "python3-devel"] if f"pkg:{p}" not in present]
+        if devel:
+            _, _, rc, _ = node.exec_command(
+                sudo=True,
+                cmd="yum install -y " + " ".join(devel),
+                check_ec=False,
+                verbose=True,
+            )
+            self.update_client_fingerprint(
+                node, [f"pkg:{p}" for p in devel], present=rc == 0
+            )
+
+        if "pip:xattr" not in present:
+            if build.endswith("7") or build.startswith("3"):
+                cmd = "yum install -y " + " ".join(GET_CLIENTS_LEGACY_PKGS)
+                node.exec_command(sudo=True, cmd=cmd, timeout=3600)
+
+            node.exec_command(sudo=True, cmd="pip3 install xattr", timeout=3600)
+            self.update_client_fingerprint(node, ["pip:xattr"])
+
+        if "tool:Crefi" not in present:
+            self._setup_crefi(node)
+            self.update_client_fingerprint(node, ["tool:Crefi"])
+
+        self.ensure_client_tools(node, ["smallfile"])
+        for pkg in ["fio", "fuse", "ceph-fuse"]:
+            if f"pkg:{pkg}" not in present:
+                node.exec_command(sudo=True, cmd=f"yum install -y --nogpgcheck {pkg}")
+                self.update_client_fingerprint(node, [f"pkg:{pkg}"])
+
+    @staticmethod
+    def _setup_deb_client(node):
+        node.exec_command(sudo=True, cmd="pip3 install --upgrade pip3")
+        out, rc = node.exec_command(sudo=True, cmd="apt list libattr1-dev")
+        out = out.split()
+        if "libattr1-dev/xenial,now" not in out:
+            node.exec_command(sudo=True, cmd="apt-get install -y libattr1-dev")
+        out, rc = node.exec_command(sudo=True, cmd="apt list attr")
+        out = out.split()
+        if "attr/xenial,now" not in out:
+            node.exec_command(sudo=True, cmd="apt-get install -y attr")
+        out, rc = node.exec_command(sudo=True, cmd="apt list fio")
+        out = out.split()
+        if "fio/xenial,now" not in out:
+            node.exec_command(sudo=True, cmd="apt-get install -y fio")
+        out, rc = node.exec_command(sudo=True, cmd="pip3 list")
+        if "crefi" not in out:
+            node.exec_command(sudo=True, cmd="pip3 install crefi")
+
+        out, rc = node.exec_command(sudo=True, cmd="ls /home/cephuser")
+        if "smallfile" not in out:
+            node.exec_command(
+                cmd="git clone "
+                "https://github.com/distributed-system-analysis/smallfile.git"
+            )
+
     @staticmethod
     def _setup_crefi(node):
         """
@@ -19,6 +19,7 @@ from cli.utilities.filesys import FuseMount, Mount, MountFailedError, Unmount
 from cli.utilities.utils import check_coredump_generated, get_ip_from_node, reboot_node
 from tests.cephfs.cephfs_utilsV1 import FsUtils
 from utility.log import Log
+from utility.log_scanner import scan_daemon_logs
 from utility.retry import retry
 
 log = Log(__name__)
@@ -1720,7 +1721,15 @@ def get_ganesha_info_from_container(installer, nfs_service_name, nfs_host_node):
         return (None, None)
 
 
-def nfs_log_parser(client, nfs_node, nfs_name, expect_list=None, expect_quiet=False):
+def nfs_log_parser(
+    client,
+    nfs_node,
+    nfs_name,
+    expect_list=None,
+    expect_quiet=False,
+    since=None,
+    regex=False,
+):
     """
     This method parses the nfs debug log for given list of strings and returns 0 on Success
     and 1 on failure
@@ -1728,31 +1737,37 @@ def nfs_log_parser(client, nfs_node, nfs_name, expect_list=None, expect_quiet=Fa
     client : for ceph cmds
     nfs_node : Node object where nfs_daemon is hosted
     nfs_name : Name of nfs cluster
-    expect_list : List of strings to be parsed
+    expect_list : List of strings to be parsed. The strings are matched literally,
+                  not as grep patterns, unless regex is set
+    since : Parse the log entries on or newer than the date, e.g. "2024-03-17 06:16:24"
+    regex : Treat expect_list entries as python regular expressions
     """
-    results = {"expect": {}}
     if expect_list:
         cmd = f"ceph orch ps | grep {nfs_name}"
         out = list(client.exec_command(sudo=True, cmd=cmd))[0]
         nfs_daemon_name = out.split()[0]
-        for search_str in expect_list:
-            cmd = f"cephadm logs --name {nfs_daemon_name} > nfs_log"
-            nfs_node.exec_command(sudo=True, cmd=cmd)
-            try:
-                cmd = f'grep "{search_str}" nfs_log'
-                out = nfs_node.exec_command(sudo=True, cmd=cmd)
-                if len(out) > 0:
-                    log.info(
-                        f"Found {search_str} in {nfs_daemon_name} log on {nfs_node.hostname}:\n {out}"
-                    )
-                    results["expect"].update({search_str: nfs_node})
-            except BaseException as ex:
-                log.info(ex)
-
-        expect_not_found = []
-        for exp_str in expect_list:
-            if exp_str not in results["expect"]:
-                expect_not_found.append(exp_str)
+        try:
+            result = scan_daemon_logs(
+                nfs_node,
+                nfs_daemon_name,
+                expect_list,
+                since=since,
+                regex=regex,
+                context=2,
+            )
+        except BaseException as ex:
+            log.info(ex)
+            result = None
+
+        expect_not_found = list(expect_list)
+        if result:
+            for search_str in result.found:
+                hits = "\n".join(hit.line for hit in result.hits[search_str])
+                log.info(
+                    f"Found {search_str} in {nfs_daemon_name} log on {nfs_node.hostname}:\n {hits}"
+                )
+            expect_not_found = result.missing
+
         if len(expect_not_found):
             msg = (
                 f"Some of expected strings not found in debug logs for "
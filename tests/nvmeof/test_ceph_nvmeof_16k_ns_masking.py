@@ -5,6 +5,7 @@ with supported entities like subsystems, namespaces, etc.
 
 import json
 from collections import defaultdict
+from contextlib import ExitStack, nullcontext
 from copy import deepcopy
 
 from ceph.ceph import Ceph
@@ -22,6 +23,18 @@ from utility.utils import generate_unique_id
 LOG = Log(__name__)
 
 
+def bulk_provisioning(_cls):
+    """Provision the NVMe CLI calls of the entity in bulk when the CLI supports it.
+
+    Within the block the NVMe CLI calls only record their command, the parallel
+    workers spawned in it merely collect the commands which are executed one
+    after the other through a single cephadm shell when the block exits. The
+    parallel workers execute the calls when bulk is not supported by the CLI.
+    """
+    cli = getattr(_cls, "base", _cls)
+    return cli.bulk() if hasattr(cli, "bulk") else nullcontext()
+
+
 def configure_subsystems(config, _cls, command):
     max_ns = config["args"].pop("max-namespaces")
 
@@ -38,7 +51,7 @@ def configure_subsystems(config, _cls, command):
         subsystem_func(**{"args": args_copy})
 
     # Create subsystems in parallel
-    with parallel() as p:
+    with bulk_provisioning(_cls), parallel() as p:
         for num in range(1, config["args"].pop("subsystems") + 1):
             p.spawn(configure_subsystem, num)
 
@@ -69,9 +82,10 @@ def configure_listeners(config, nvme_service, command, ceph_cluster):
         listener_func(**{"args": args_copy})
 
     # Configure listeners in parallel
-    with parallel() as p:
+    with ExitStack() as stack, parallel() as p:
         for node in nvme_service.gateways:
             _cls = fetch_method(node, "listener")
+            stack.enter_context(bulk_provisioning(_cls))
             listener_node = get_node_by_id(ceph_cluster, node.node.id)
             for num in range(1, subsystems + 1):
                 p.spawn(configure_listener, num, listener_node, _cls)
@@ -99,7 +113,7 @@ def configure_hosts(config, _cls, command):
         host_access_func(**{"args": args_copy})
 
     # Configure hosts for subsystems in parallel
-    with parallel() as p:
+    with bulk_provisioning(_cls), parallel() as p:
         for num in range(1, subsystems + 1):
             p.spawn(configure_host, num)
 
@@ -120,27 +134,28 @@ def configure_namespaces(config, _cls, command, rbd_obj):
         return
 
     namespace_func = fetch_method(_cls, command)
-    for sub_num in range(1, subsystems + 1):
-        LOG.info("Subsystem %s", sub_num)
-        name = generate_unique_id(length=4)
-        subnqn = f"nqn.2016-06.io.spdk:cnode{sub_num}{f'.{group}' if group else ''}"
-
-        def _add_namespace(num):
-            rbd_obj.create_image(pool, f"{name}-image{num}", image_size)
-            ns_config = {
-                "base_cmd_args": {"format": "json"},
-                "args": {
-                    "rbd_image_name": f"{name}-image{num}",
-                    "rbd_pool": pool,
-                    "nqn": subnqn,
-                    "force": True,
-                },
-            }
-            namespace_func(**ns_config)
+    with bulk_provisioning(_cls):
+        for sub_num in range(1, subsystems + 1):
+            LOG.info("Subsystem %s", sub_num)
+            name = generate_unique_id(length=4)
+            subnqn = f"nqn.2016-06.io.spdk:cnode{sub_num}{f'.{group}' if group else ''}"
+
+            def _add_namespace(num):
+                rbd_obj.create_image(pool, f"{name}-image{num}", image_size)
+                ns_config = {
+                    "base_cmd_args": {"format": "json"},
+                    "args": {
+                        "rbd_image_name": f"{name}-image{num}",
+                        "rbd_pool": pool,
+                        "nqn": subnqn,
+                        "force": True,
+                    },
+                }
+                namespace_func(**ns_config)
 
-        with parallel() as p:
-            for num in range(1, namespaces_sub + 1):
-                p.spawn(_add_namespace, num)
+            with parallel() as p:
+                for num in range(1, namespaces_sub + 1):
+                    p.spawn(_add_namespace, num)
 
 
 def change_visibility(_cls):
@@ -149,24 +164,20 @@ def change_visibility(_cls):
     out, _ = fetch_method(_cls, "list")(**list_config)
     namespaces = json.loads(out)
     change_visibility_func = fetch_method(_cls, "change_visibility")
-    for namespace in namespaces["namespaces"]:
-        subsystem_nqn = namespace["ns_subsystem_nqn"]
-        namespace_id = namespace["nsid"]
-        change_visibility_func(
-            **{
-                "args": {
-                    "nqn": subsystem_nqn,
-                    "nsid": namespace_id,
-                    "auto_visible": "false",
-                    "force": "",
+    with bulk_provisioning(_cls):
+        for namespace in namespaces["namespaces"]:
+            subsystem_nqn = namespace["ns_subsystem_nqn"]
+            namespace_id = namespace["nsid"]
+            change_visibility_func(
+                **{
+                    "args": {
+                        "nqn": subsystem_nqn,
+                        "nsid": namespace_id,
+                        "auto_visible": "false",
+                        "force": "",
+                    }
                 }
-            }
-        )
-        LOG.info(
-            "Changed visibility of namespace %s in subsystem %s",
-            namespace_id,
-            subsystem_nqn,
-        )
+            )
 
 
 def _add_hosts_for_subsystem_namespaces(
@@ -185,12 +196,6 @@ def _add_hosts_for_subsystem_namespaces(
                     }
                 }
             )
-            LOG.info(
-                "Added host nqn %s to namespace %s in subsystem %s",
-                host_nqn,
-                namespace_id,
-                subsystem_nqn,
-            )
 
 
 def add_host(config, _cls, nvmegwcli, ceph_cluster, init_config):
@@ -227,7 +232,7 @@ def add_host(config, _cls, nvmegwcli, ceph_cluster, init_config):
     all_subsystem_nqns = set(by_subsystem.keys())
 
     # Configure hosts for subsystems in parallel
-    with parallel() as p:
+    with bulk_provisioning(_cls), parallel() as p:
         for subsystem_nqn, ns_list in by_subsystem.items():
             p.spawn(
                 _add_hosts_for_subsystem_namespaces,
@@ -11,7 +11,7 @@ from time import sleep
 
 from ceph.ceph import CommandFailed
 from ceph.parallel import parallel
-from utility.log import LOG_FORMAT, Log
+from utility.log import QUEUE_SIZE, Log, QueueBridge
 from utility.utils import magna_url
 
 parallel_log = Log(__name__)
@@ -51,13 +51,16 @@ def run(**kwargs):
         cancel_pending = kwargs.get("config", {}).get("cancel_pending", False)
         parallel_log.info(kwargs)
 
-        with parallel(
+        # The test processes send their records to this process, which writes them
+        # to the log file of every test.
+        log_queue = manager.Queue(QUEUE_SIZE)
+        with QueueBridge(log_queue), parallel(
             thread_pool=False,
             timeout=max_time,
             shutdown_cancel_pending=cancel_pending,
         ) as p:
             for test in parallel_tests:
-                p.spawn(execute, test, kwargs, results, parallel_tcs)
+                p.spawn(execute, test, kwargs, results, parallel_tcs, log_queue)
                 sleep(1)  # Avoid overloading processes
 
         # Convert results to a regular dictionary to inspect
@@ -76,7 +79,7 @@ def run(**kwargs):
         return list(parallel_tcs), test_rc
 
 
-def execute(test, args, results, parallel_tcs):
+def execute(test, args, results, parallel_tcs, log_queue):
     """
     Executes the test in parallel.
 
@@ -85,6 +88,7 @@ def execute(test, args, results, parallel_tcs):
         args: Arguments passed to the test.
         results: Shared dictionary to store test results.
         parallel_tcs: Shared list to store test case details.
+        log_queue: Queue of the log bridge of the parent process.
     """
     test = test.get("test")
     test_name = test.get("name", "unknown_test")
@@ -111,25 +115,10 @@ def execute(test, args, results, parallel_tcs):
     log_file = os.path.join(run_dir, f"{file_name}.log")
     parallel_log.info(f"Log File location for test {test_name}: {log_url}")
 
-    # Configure logger for this test
+    # Configure logger for this test, the .log and .err files are written by the
+    # bridge of the parent process.
     test_logger = Log(module_name)
-    for handler in logging.getLogger().handlers[:]:
-        logging.getLogger().removeHandler(handler)
-    logging.basicConfig(
-        handlers=[logging.FileHandler(log_file)], level=logging.INFO, format=LOG_FORMAT
-    )
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter(test_logger.log_format))
-    if not any(
-        isinstance(h, logging.StreamHandler) for h in test_logger.logger.handlers
-    ):
-        test_logger.logger.addHandler(console_handler)
-    err_logfile = os.path.join(run_dir, f"{file_name}.err")
-    error_handler = logging.FileHandler(err_logfile)
-    error_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-    error_handler.setLevel(logging.ERROR)  # This ensures only errors are logged
-    test_logger.logger.addHandler(error_handler)
+    QueueBridge.attach(log_queue, log_file)
 
     test_logger.info(f"Starting test: {test_name}")
     try:
@@ -191,5 +180,4 @@ def execute(test, args, results, parallel_tcs):
         # Always append tc to results, even if test failed with exception
         parallel_tcs.append(tc)
         # Reset root logger configuration to avoid conflicts
-        for handler in logging.getLogger().handlers[:]:
-            logging.getLogger().removeHandler(handler)
+        QueueBridge.detach()
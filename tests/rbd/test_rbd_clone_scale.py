@@ -1,5 +1,6 @@
 from ceph.rbd.initial_config import initial_rbd_config
 from ceph.rbd.utils import getdict, random_string
+from ceph.rbd.workflows.batch import batch_failures, rbd_batch
 from ceph.rbd.workflows.cleanup import cleanup
 from ceph.rbd.workflows.krbd_io_handler import krbd_io_handler
 from utility.log import Log
@@ -46,15 +47,18 @@ def rbd_clone_scale(rbd_obj, **kw):
                 if err:
                     return 1
 
-                create_clone_at_scale(rbd, snap_spec, clone_spec, clone_format, **kw)
+                if create_clone_at_scale(
+                    rbd, snap_spec, clone_spec, clone_format, **kw
+                ):
+                    return 1
 
                 # Flatten Clone
-                for i in range(1, 101):
-                    out, err = rbd.flatten(pool=pool, image=clone_spec + str(i))
-                    if "100% complete...done" not in out + err:
-                        log.error(
-                            f"Flatten clone failed for {pool}/{clone_spec + str(i)} with error {err}"
-                        )
+                ops = [
+                    ("flatten", {"image-spec": clone_spec + str(i)})
+                    for i in range(1, clone_count(**kw) + 1)
+                ]
+                results = rbd_batch(rbd, ops, concurrency=batch_concurrency(**kw))
+                batch_failures(results, expect="100% complete...done")
 
                 # unprotect and delete the snap and verify snap deletion
                 out, err = rbd.snap.unprotect(**snap_config)
@@ -71,19 +75,29 @@ def rbd_clone_scale(rbd_obj, **kw):
     return 0
 
 
+def clone_count(**kw):
+    return kw.get("config", {}).get("clone_count", 100)
+
+
+def batch_concurrency(**kw):
+    return kw.get("config", {}).get("batch_concurrency", 10)
+
+
 def create_clone_at_scale(rbd, snap_spec, clone_spec, clone_format, **kw):
-    for i in range(1, 101):
+    ops = []
+    for i in range(1, clone_count(**kw) + 1):
         clone_config = {
             "source-snap-spec": snap_spec,
             "dest-image-spec": clone_spec + str(i),
         }
         if kw.get("clone_format"):
             clone_config.update({"rbd-default-clone-format": clone_format})
+        ops.append(("clone", clone_config))
 
-        out, err = rbd.clone(**clone_config)
-        if out or err:
-            log.error(f"Clone creation failed for {clone_spec}")
-            return 1
+    results = rbd_batch(rbd, ops, concurrency=batch_concurrency(**kw))
+    if batch_failures(results):
+        log.error(f"Clone creation failed for {clone_spec}")
+        return 1
 
 
 def run_IO(rbd, pool, image, **kw):
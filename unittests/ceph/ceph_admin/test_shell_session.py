@@ -0,0 +1,187 @@
+import socket
+import subprocess
+import threading
+
+import pytest
+
+from ceph.ceph import CommandFailed
+from ceph.ceph_admin import shell_session
+from ceph.ceph_admin.shell_session import (
+    CephadmShellSession,
+    ShellSessionBusy,
+    ShellSessionError,
+    get_shell_session,
+)
+
+
+class LocalChannel:
+    """Paramiko channel look alike backed by a local bash process."""
+
+    def __init__(self):
+        self.closed = False
+        self._proc = None
+        self._timeout = None
+
+    def get_pty(self, **kwargs):
+        pass
+
+    def exec_command(self, cmd):
+        self._proc = subprocess.Popen(
+            ["bash", "--norc", "--noprofile"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+
+    def settimeout(self, timeout):
+        self._timeout = timeout
+
+    def send(self, data):
+        self._proc.stdin.write(data)
+        self._proc.stdin.flush()
+        return len(data)
+
+    def recv(self, size):
+        result = []
+        reader = threading.Thread(
+            target=lambda: result.append(self._proc.stdout.read1(size)), daemon=True
+        )
+        reader.start()
+        reader.join(self._timeout)
+        if reader.is_alive():
+            raise socket.timeout()
+        return result[0]
+
+    def exit_status_ready(self):
+        return self._proc.poll() is not None
+
+    def close(self):
+        self.closed = True
+        self._proc.kill()
+
+
+class MockNode:
+    hostname = "installer"
+    ip_address = "10.0.0.1"
+
+    def __init__(self):
+        self.channels = []
+
+    def rssh(self):
+        return self
+
+    def get_transport(self):
+        return self
+
+    def open_session(self):
+        channel = LocalChannel()
+        self.channels.append(channel)
+        return channel
+
+
+@pytest.fixture
+def session():
+    _session = CephadmShellSession(MockNode())
+    yield _session
+    _session.close()
+
+
+def test_execute_frames_output(session):
+    out, err, rc = session.execute('echo \'{"health": "HEALTH_OK"}\'')
+
+    assert out.strip() == '{"health": "HEALTH_OK"}'
+    assert err == ""
+    assert rc == 0
+
+
+def test_execute_separates_stderr_and_exit_code(session):
+    out, err, rc = session.execute("echo out; echo err >&2; false")
+
+    assert out.strip() == "out"
+    assert err.strip() == "err"
+    assert rc == 1
+
+
+def test_session_is_reused(session):
+    before = shell_session.get_session_stats()
+    for _ in range(5):
+        session.execute("true")
+    after = shell_session.get_session_stats()
+
+    assert len(session.node.channels) == 1
+    assert after["warm"] - before["warm"] == 5
+
+
+def test_session_restarts_after_death(session):
+    session.execute("true")
+    with pytest.raises(ShellSessionError):
+        session.execute("exit 3")
+
+    out, _, _ = session.execute("echo alive")
+    assert out.strip() == "alive"
+    assert len(session.node.channels) == 2
+
+
+def test_execute_timeout(session):
+    with pytest.raises(CommandFailed):
+        session.execute("sleep 5", timeout=0.5)
+
+
+def test_busy_session_does_not_block(session):
+    worker = threading.Thread(target=session.execute, args=("sleep 0.5",))
+    worker.start()
+    try:
+        while not session.busy:
+            pass
+        with pytest.raises(ShellSessionBusy):
+            session.execute("true")
+    finally:
+        worker.join()
+
+    assert session.execute("echo idle")[0].strip() == "idle"
+
+
+def test_concurrent_callers_get_their_own_session():
+    node = MockNode()
+    node.ip_address = "10.0.0.2"
+    results = []
+
+    def run():
+        results.append(get_shell_session(node).execute("sleep 0.3; echo ok"))
+
+    try:
+        workers = [threading.Thread(target=run) for _ in range(3)]
+        for count, worker in enumerate(workers, start=1):
+            worker.start()
+            # Wait for the worker to hold its session before starting the next
+            while len(node.channels) < count:
+                pass
+        for worker in workers:
+            worker.join()
+    finally:
+        shell_session.close_shell_sessions()
+
+    assert [out.strip() for out, _, _ in results] == ["ok"] * 3
+    assert len(node.channels) == 3
+
+
+def test_execute_stream_in_order(session):
+    cmds = [f"echo {i}; test $(( {i} % 3 )) -ne 0" for i in range(100)]
+
+    results = list(session.execute_stream(cmds, window=8))
+
+    assert [out.strip() for out, _, _ in results] == [str(i) for i in range(100)]
+    assert [rc for _, _, rc in results] == [int(i % 3 == 0) for i in range(100)]
+    assert len(session.node.channels) == 1
+    # The session serves single commands after the stream
+    assert session.execute("echo after")[0].strip() == "after"
+
+
+def test_execute_stream_closed_early(session):
+    stream = session.execute_stream(["echo 1", "sleep 5", "echo 3"], window=3)
+
+    assert next(stream)[0].strip() == "1"
+    stream.close()
+
+    assert session.execute("echo fresh")[0].strip() == "fresh"
+    assert len(session.node.channels) == 2
@@ -0,0 +1,166 @@
+# -*- code: utf-8 -*-
+"""Unit testing of the NVMeoF bulk provisioning over a persistent shell."""
+
+import os
+import subprocess
+
+import pytest
+
+from ceph.ceph import CommandFailed
+from ceph.ceph_admin import shell_session
+from ceph.nvmeof.cli.v2 import NVMeGWCLIV2
+from ceph.nvmeof.cli.v2.base_cli import (
+    BULK_TIMEOUT_RC,
+    BULK_UNKNOWN_RC,
+    summarize_bulk,
+)
+from unittests.ceph.ceph_admin.test_shell_session import MockNode
+
+# "slow" hangs and "die" kills the persistent shell, never the per call shell
+FAKE_CEPH = """#!/bin/bash
+case "$*" in
+    *slow*) sleep 3 ;;
+    *die*) ps -o args= -p $PPID | grep -q -- --norc && kill -9 $PPID ;;
+    *fail*) echo "Failure adding namespace: $*" >&2; exit 22 ;;
+    *) echo "$*" ;;
+esac
+"""
+
+
+class Gateway:
+    hostname = "gateway"
+    ip_address = "10.0.0.10"
+
+
+class MockCephAdm:
+    """Cephadm shell look alike executing the commands locally."""
+
+    def __init__(self, config):
+        self.config = config
+        self.installer = type("Installer", (), {"node": MockNode()})()
+        self.calls = []
+
+    def shell(self, args, timeout=600, check_status=True, **kwargs):
+        self.calls.append(args)
+        proc = subprocess.run(
+            ["bash", "-c", " ".join(args)], capture_output=True, text=True
+        )
+        if check_status and proc.returncode:
+            raise CommandFailed(proc.stderr)
+        return proc.stdout, proc.stderr
+
+
+@pytest.fixture
+def cephadm(tmp_path, monkeypatch, request):
+    path = tmp_path / "ceph"
+    path.write_text(FAKE_CEPH)
+    path.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    yield MockCephAdm(getattr(request, "param", {}))
+    shell_session.close_shell_sessions()
+
+
+@pytest.fixture
+def gateway(cephadm):
+    cli = NVMeGWCLIV2(Gateway(), shell=cephadm.shell)
+    cli.gateway_group = "group1"
+    cli.ceph_version = "20.1.0-200"
+    return cli
+
+
+def provision(gateway, count, check_status=True):
+    with gateway.bulk(window=8, check_status=check_status) as results:
+        gateway.subsystem.add(args={"subsystem": "nqn.cnode1", "no-group-append": True})
+        for num in range(1, count + 1):
+            assert gateway.namespace.add(
+                args={"subsystem": "nqn.cnode1", "rbd-image": f"image{num}"}
+            ) == ("", "")
+            gateway.namespace.add_host(
+                args={"subsystem": "nqn.cnode1", "nsid": num, "host": "'*'"}
+            )
+    return results
+
+
+def test_bulk_over_one_session(gateway, cephadm):
+    before = shell_session.get_session_stats()
+
+    results = provision(gateway, 50)
+
+    after = shell_session.get_session_stats()
+    assert len(results) == 101
+    assert after["warm"] - before["warm"] == 101
+    assert len(cephadm.installer.node.channels) == 1
+    # The dedicated stream session is closed, the shared pool is not used
+    assert cephadm.installer.node.channels[0].closed
+    assert shell_session._SESSIONS == {}
+    assert cephadm.calls == []
+    assert results[1].out.strip() == (
+        "nvmeof ns add --nqn nqn.cnode1 --rbd_image_name image1 "
+        "--gw_group group1 --server_address 10.0.0.10"
+    )
+    assert [r.action for r in results[:3]] == ["add", "add", "add_host"]
+
+    summary = summarize_bulk(results)
+    assert summary["total"] == 101 and summary["failed"] == 0
+    assert summary["actions"]["ns add_host"] == {"total": 50, "failed": 0}
+
+
+def test_bulk_reports_failures(gateway):
+    with gateway.bulk(check_status=False) as results:
+        gateway.namespace.add(args={"subsystem": "nqn.cnode1", "rbd-image": "fail"})
+        gateway.namespace.add(args={"subsystem": "nqn.cnode1", "rbd-image": "ok"})
+
+    assert [r.rc for r in results] == [22, 0]
+    assert "Failure adding namespace" in results[0].err
+
+    with pytest.raises(CommandFailed):
+        with gateway.bulk():
+            gateway.namespace.add(args={"rbd-image": "fail"})
+
+
+@pytest.mark.parametrize("cephadm", [{"persistent_shell": False}], indirect=True)
+def test_bulk_without_session(gateway, cephadm):
+    results = provision(gateway, 5)
+
+    assert len(cephadm.calls) == 11
+    assert all(r.rc == 0 for r in results)
+    assert cephadm.installer.node.channels == []
+
+
+def test_bulk_can_not_be_nested(gateway):
+    with pytest.raises(RuntimeError):
+        with gateway.bulk():
+            with gateway.bulk():
+                pass
+
+
+def add_namespaces(gateway, images, **kwargs):
+    with gateway.bulk(window=3, check_status=False, **kwargs) as results:
+        for image in images:
+            gateway.namespace.add(args={"subsystem": "nqn.cnode1", "rbd-image": image})
+    return results
+
+
+def test_bulk_timeout_fails_the_operation_only(gateway, cephadm):
+    images = ["a", "slow", "b", "c", "d", "e"]
+
+    results = add_namespaces(gateway, images, timeout=1)
+
+    unknown = [BULK_UNKNOWN_RC] * 2
+    assert [r.rc for r in results] == [0, BULK_TIMEOUT_RC, *unknown, 0, 0]
+    # The operations after the window are executed in a new session
+    assert len(cephadm.installer.node.channels) == 2
+    assert cephadm.calls == []
+
+
+def test_bulk_written_ahead_not_executed_again(gateway, cephadm):
+    images = ["a", "die", "b", "c", "d", "e"]
+
+    results = add_namespaces(gateway, images)
+
+    assert [r.rc for r in results] == [0] + [BULK_UNKNOWN_RC] * 3 + [0, 0]
+    # Only the operations not written to the failed session are executed again
+    assert len(cephadm.calls) == 2
+    assert all("die" not in " ".join(call) for call in cephadm.calls)
+    summary = summarize_bulk(results)
+    assert summary["unknown"] == 3 and summary["failed"] == 3
@@ -0,0 +1,243 @@
+# -*- code: utf-8 -*-
+"""Unit testing and micro benchmarking of CephNode command execution.
+
+A paramiko SSH server is started on the localhost which executes the requested
+commands using a local shell. The polling based channel reader used earlier is
+retained in this module as the reference for the benchmark.
+"""
+
+import pickle
+import socket
+import subprocess
+import threading
+from time import monotonic, sleep
+
+import paramiko
+import pytest
+
+from ceph.ceph import (
+    CephNode,
+    CommandFailed,
+    SSHConnectionManager,
+    TimeoutException,
+    get_connection_manager,
+)
+from ceph.parallel import parallel
+
+USERNAME = "cephuser"
+PASSWORD = "cephpasswd"
+
+
+class LocalServer(paramiko.ServerInterface):
+    """SSH server interface executing commands using a local shell."""
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (USERNAME, PASSWORD):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OPEN_REQUEST
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(
+            target=self._execute, args=(channel, command), daemon=True
+        ).start()
+        return True
+
+    @staticmethod
+    def _execute(channel, command):
+        proc = subprocess.Popen(
+            command.decode(),
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        out, err = proc.communicate()
+        channel.sendall(out)
+        channel.sendall_stderr(err)
+        channel.send_exit_status(proc.returncode)
+        channel.shutdown_write()
+        channel.close()
+
+
+@pytest.fixture(scope="module")
+def ssh_server():
+    host_key = paramiko.RSAKey.generate(2048)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(10)
+
+    def _serve():
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(host_key)
+            transport.start_server(server=LocalServer())
+
+    threading.Thread(target=_serve, daemon=True).start()
+    yield sock.getsockname()
+    sock.close()
+
+
+@pytest.fixture(scope="module")
+def node(ssh_server):
+    connection = SSHConnectionManager(
+        ssh_server[0], USERNAME, PASSWORD, port=ssh_server[1], max_channels=2
+    )
+
+    _node = CephNode.__new__(CephNode)
+    _node.hostname = "localhost"
+    _node.ip_address = ssh_server[0]
+    _node.run_once = False
+    _node.connection = _node.root_connection = connection
+    _node.ssh = _node.rssh = connection.get_client
+    yield _node
+    connection.close()
+
+
+def legacy_exec(node, cmd):
+    """Polling based reader used by CephNode.long_running earlier."""
+    channel = node.ssh().get_transport().open_session()
+    channel.exec_command(cmd)
+    _out = bytearray()
+    while not channel.exit_status_ready():
+        sleep(1)
+        while channel.recv_ready():
+            _out.extend(channel.recv(2048))
+
+    while True:
+        _data = channel.recv(2048)
+        if not _data:
+            break
+        _out.extend(_data)
+
+    return _out.decode(), channel.recv_exit_status()
+
+
+def test_exec_command(node):
+    out, err = node.exec_command(cmd="echo hello; echo world >&2")
+
+    assert out == "hello\n"
+    assert err == "world\n"
+
+
+def test_exec_command_exit_status(node):
+    with pytest.raises(CommandFailed):
+        node.exec_command(cmd="exit 3")
+
+    out, err, rc, _ = node.exec_command(cmd="exit 3", verbose=True, check_ec=False)
+    assert rc == 3
+
+
+def test_exec_command_large_output(node):
+    out, _ = node.exec_command(cmd="seq 1 200000")
+
+    assert out.splitlines()[-1] == "200000"
+
+
+def test_exec_command_line_callback(node):
+    lines = []
+    node.exec_command(
+        cmd="printf 'a\\nb\\n'; printf 'c' >&2",
+        line_callback=lambda ln, stderr: lines.append((ln, stderr)),
+    )
+
+    assert lines == [("a", False), ("b", False), ("c", True)]
+
+
+def test_exec_command_timeout(node):
+    with pytest.raises(CommandFailed):
+        node.exec_command(cmd="sleep 3", timeout=1)
+
+
+def test_benchmark_exec_command(node):
+    """Compare the polling based reader with the event based reader."""
+    runs = 3
+
+    start = monotonic()
+    for _ in range(runs):
+        assert legacy_exec(node, "echo ok") == ("ok\n", 0)
+    legacy = (monotonic() - start) / runs
+
+    start = monotonic()
+    for _ in range(runs):
+        assert node.exec_command(cmd="echo ok") == ("ok\n", "")
+    current = (monotonic() - start) / runs
+
+    assert legacy >= 1.0
+    assert current < 0.5
+
+
+def test_channel_pool_bounds_concurrency(node):
+    before = node.connection.stats
+    with parallel() as p:
+        for _ in range(4):
+            p.spawn(node.exec_command, cmd="sleep 0.3")
+
+    stats = node.connection.stats
+    assert stats["channels"] - before["channels"] == 4
+    assert stats["in_use"] == 0
+    assert stats["max_channel_wait_time"] >= 0.2
+
+
+def test_channel_wait_times_out(node):
+    before = node.connection.stats
+    with node.connection.open_channel(), node.connection.open_channel():
+        with pytest.raises(TimeoutException):
+            with node.connection.open_channel(timeout=0.2):
+                pass
+
+        # Long running channels are not counted against the cap
+        with node.connection.open_channel(long_running=True) as channel:
+            channel.exec_command("true")
+            assert channel.recv_exit_status() == 0
+
+    stats = node.connection.stats
+    assert stats["channel_wait_timeouts"] - before["channel_wait_timeouts"] == 1
+    assert stats["channel_wait_time"] - before["channel_wait_time"] >= 0.2
+    assert stats["in_use"] == 0 and stats["long_running"] == 0
+
+
+def test_connection_reestablished(node):
+    node.connection.close()
+    assert not node.connection.healthy
+
+    assert node.exec_command(cmd="echo ok") == ("ok\n", "")
+    assert node.connection.healthy
+
+
+def test_connection_manager_is_shared(ssh_server):
+    first = get_connection_manager(ssh_server[0], "user", "pass", port=ssh_server[1])
+    second = get_connection_manager(
+        ssh_server[0], "user", "new-pass", port=ssh_server[1], look_for_keys=False
+    )
+
+    assert first is second
+    assert first.password == "new-pass"
+    assert get_connection_manager(ssh_server[0], "root", "pass") is not first
+    keys = get_connection_manager(
+        ssh_server[0], "user", "pass", port=ssh_server[1], look_for_keys=True
+    )
+    assert keys is not first
+    assert keys.look_for_keys
+
+
+def test_connection_manager_pickle(node):
+    copy = pickle.loads(pickle.dumps(node.connection))
+
+    assert copy.port == node.connection.port
+    assert copy.stats["in_use"] == 0
+    with copy.open_channel() as channel:
+        channel.exec_command("true")
+        assert channel.recv_exit_status() == 0
+    copy.close()
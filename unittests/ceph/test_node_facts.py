@@ -0,0 +1,91 @@
+# -*- code: utf-8 -*-
+"""Unit testing of the CephNode fact gathering."""
+
+import pickle
+import subprocess
+import threading
+import time
+
+import mock
+import pytest
+
+from ceph.ceph import CephNode, connect_nodes, gather_node_facts
+
+
+class LocalNode(CephNode):
+    """CephNode executing the commands on the local host with a fixed latency."""
+
+    def __init__(self, name, home, latency=0.2):
+        self.vmname = self.hostname = self.shortname = name
+        self.username = "cephuser"
+        self.ip_address = "127.0.0.1"
+        self.home = home
+        self.latency = latency
+        self.commands = []
+
+    def exec_command(self, cmd, **kw):
+        threading.Event().wait(self.latency)
+        self.commands.append(cmd)
+        # sudo tee would change the keepalive settings of the local host
+        cmd = cmd.replace("_sudo='sudo'", "_sudo='true'", 1)
+        proc = subprocess.run(
+            ["bash", "-c", cmd],
+            capture_output=True,
+            text=True,
+            env={"HOME": str(self.home), "PATH": "/usr/sbin:/usr/bin:/sbin:/bin"},
+        )
+        return proc.stdout, proc.stderr
+
+    def __getstate__(self):
+        return dict(self.__dict__)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+
+@pytest.fixture
+def nodes(tmp_path):
+    return [LocalNode(f"node{i}", tmp_path) for i in range(5)]
+
+
+def test_gather_facts_single_invocation(nodes):
+    node = nodes[0]
+    facts = node.gather_facts()
+
+    assert len(node.commands) == 1
+    assert facts["hostname"] == node.hostname
+    assert node.shortname == facts["hostname"].split(".")[0]
+    assert node.pkg_type in ("rpm", "deb")
+    assert facts["kernel"] and facts["distro"]["id"]
+    assert set(facts["keepalive"]) == {"time", "intvl", "probes"}
+    bashrc = (node.home / ".bashrc").read_text()
+    assert bashrc.count("TMOUT=600") == 1
+
+    node.gather_facts()
+    assert (node.home / ".bashrc").read_text() == bashrc
+
+
+def test_gather_node_facts_is_concurrent_and_cached(nodes):
+    start = time.monotonic()
+    gather_node_facts(nodes)
+    assert time.monotonic() - start < 0.2 * len(nodes)
+    assert all(len(n.commands) == 1 for n in nodes)
+
+    # A stored state has the facts, hence a reused node skips them
+    restored = [pickle.loads(pickle.dumps(n)) for n in nodes]
+    for node in restored:
+        node.commands = []
+    gather_node_facts(restored)
+    assert not any(n.commands for n in restored)
+    assert [n.facts for n in restored] == [n.facts for n in nodes]
+
+
+def test_connect_nodes(nodes):
+    for node in nodes:
+        node.rssh_transport = node.ssh_transport = mock.Mock()
+        node.password = node.root_passwd = ""
+
+    connect_nodes(nodes)
+
+    assert all(n.run_once and n.internal_ip is not None for n in nodes)
+    assert all(len(n.commands) == 1 for n in nodes)
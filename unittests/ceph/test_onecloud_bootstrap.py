@@ -0,0 +1,55 @@
+# -*- code: utf-8 -*-
+"""Unit testing of the OneCloud node bootstrap script."""
+
+import subprocess
+
+import mock
+
+from ceph.ceph import ONECLOUD_BOOTSTRAP_STEPS, CephNode
+
+# Runs the script locally, sudo only echoes the privileged commands
+LOCAL_SSH = [
+    "bash",
+    "-c",
+    'sudo() { echo "sudo $*"; }; export -f sudo; eval "$1"',
+    "bash",
+]
+KEY = "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAIDcephci cephuser@example.com"
+
+
+def _node():
+    node = CephNode.__new__(CephNode)
+    node.ip_address = "10.0.0.1"
+    return node
+
+
+def test_bootstrap_single_session_per_step_results():
+    run = mock.Mock(side_effect=subprocess.run)
+    with mock.patch("ceph.ceph.subprocess.run", run):
+        steps = _node().onecloud_bootstrap(LOCAL_SSH, KEY)
+
+    assert run.call_count == 1
+    assert [s["step"] for s in steps] == [n for n, _ in ONECLOUD_BOOTSTRAP_STEPS]
+    assert all(s["rc"] == 0 and s["duration"] >= 0 for s in steps)
+    root_keys = next(s for s in steps if s["step"] == "root_authorized_keys")
+    assert f"sudo grep -qxF {KEY} /root/.ssh/authorized_keys" in root_keys["output"]
+
+
+def test_bootstrap_retries_until_reachable():
+    unreachable = subprocess.CompletedProcess([], 255, "", "Connection refused")
+    calls, real_run = [], subprocess.run
+
+    def _run(*args, **kwargs):
+        calls.append(args)
+        if len(calls) < 3:
+            return unreachable
+        return real_run(*args, **kwargs)
+
+    with mock.patch("ceph.ceph.subprocess.run", side_effect=_run), mock.patch(
+        "ceph.ceph.sleep"
+    ) as sleep:
+        steps = _node().onecloud_bootstrap(LOCAL_SSH, KEY, retry_interval=1)
+
+    assert len(calls) == 3
+    assert sleep.call_count == 2
+    assert len(steps) == len(ONECLOUD_BOOTSTRAP_STEPS)
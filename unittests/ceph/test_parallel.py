@@ -0,0 +1,107 @@
+# -*- code: utf-8 -*-
+"""Unit testing module for the parallel context manager."""
+
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from time import monotonic, sleep
+
+import pytest
+
+from ceph import parallel as parallel_module
+from ceph.parallel import parallel
+
+
+def _echo(value, delay=0.0):
+    sleep(delay)
+    return value
+
+
+def _fail(delay=0.0):
+    sleep(delay)
+    raise ValueError("failed")
+
+
+def test_results_in_submission_order():
+    with parallel() as p:
+        for i in range(5):
+            p.spawn(_echo, i, delay=(5 - i) * 0.01)
+
+    assert p.results == [0, 1, 2, 3, 4]
+
+
+def test_exit_does_not_poll():
+    start = monotonic()
+    with parallel() as p:
+        p.spawn(_echo, 1)
+
+    assert monotonic() - start < 1.0
+
+
+def test_iterate_results():
+    with parallel() as p:
+        for i in range(3):
+            p.spawn(_echo, i)
+
+        assert [r for r in p] == [0, 1, 2]
+
+
+def test_as_completed_streams_results():
+    with parallel() as p:
+        p.spawn(_echo, "slow", delay=0.3)
+        p.spawn(_echo, "fast")
+
+        assert list(p.as_completed()) == ["fast", "slow"]
+
+
+def test_exception_is_raised_on_exit():
+    with pytest.raises(ValueError):
+        with parallel() as p:
+            p.spawn(_echo, 1)
+            p.spawn(_fail)
+
+
+def test_fail_fast_cancels_siblings():
+    start = monotonic()
+    with pytest.raises(ValueError):
+        with parallel(max_workers=1, fail_fast=True) as p:
+            p.spawn(_fail)
+            for _ in range(5):
+                p.spawn(_echo, 1, delay=0.5)
+
+    assert monotonic() - start < 1.0
+    assert p.stats["cancelled"] >= 4
+
+
+def test_deadline():
+    with pytest.raises(FutureTimeoutError):
+        with parallel(timeout=0.2) as p:
+            p.spawn(_echo, 1, delay=1)
+
+
+def test_untimed_block_waits_for_completion(monkeypatch):
+    monkeypatch.setattr(parallel_module, "DEFAULT_TIMEOUT", 0.1)
+    with parallel() as p:
+        p.spawn(_echo, 1, delay=0.5)
+
+    assert p.results == [1]
+
+
+def test_deadline_with_failure_keeps_pending():
+    with pytest.raises(FutureTimeoutError):
+        with parallel(timeout=0.3, max_workers=1) as p:
+            p.spawn(_fail)
+            p.spawn(_echo, 1, delay=1)
+            p.spawn(_echo, 2)
+
+    assert p.stats["cancelled"] == 0
+
+
+def test_stats():
+    with parallel() as p:
+        p.spawn(_echo, 1, delay=0.1)
+        p.spawn(_echo, 2)
+
+    stats = p.stats
+    assert stats["total"] == 2
+    assert stats["completed"] == 2
+    assert stats["max"] >= 0.1
+    assert [t["name"] for t in stats["tasks"]] == ["_echo", "_echo"]
@@ -0,0 +1,119 @@
+# -*- code: utf-8 -*-
+"""Unit testing of the RadosBench metrics capture."""
+
+import threading
+
+import mock
+import pytest
+
+from ceph.rados.rados_bench import RadosBench, parse_bench_output, percentile
+
+WRITE_OUTPUT = """hints = 1
+Maintaining 16 concurrent writes of 4194304 bytes to objects of size 4194304
+  sec Cur ops   started  finished  avg MB/s  cur MB/s last lat(s)  avg lat(s)
+    0       0         0         0         0         0           -           0
+    1      16       118       102   407.948       408    0.116434    0.145337
+Total time run:         10.0524
+Total writes made:      1080
+Write size:             4194304
+Object size:            4194304
+Bandwidth (MB/sec):     {bandwidth}
+Stddev Bandwidth:       20.7389
+Max bandwidth (MB/sec): 460
+Min bandwidth (MB/sec): 392
+Average IOPS:           {iops}
+Stddev IOPS:            5.18473
+Max IOPS:               115
+Min IOPS:               98
+Average Latency(s):     0.148
+Stddev Latency(s):      0.0456
+Max latency(s):         0.412
+Min latency(s):         0.0311
+"""
+
+
+class FakeClient:
+    """Client whose rados bench bandwidth grows with every write."""
+
+    def __init__(self, shortname):
+        self.shortname = shortname
+        self.commands = []
+        self.writes = 0
+
+    def exec_command(self, cmd, **kwargs):
+        threading.Event().wait(0.01)
+        self.commands.append(cmd)
+        if " write" in cmd:
+            self.writes += 1
+            bandwidth = 400 + self.writes * 10
+            return WRITE_OUTPUT.format(bandwidth=bandwidth, iops=bandwidth / 4), ""
+        if " seq" in cmd:
+            return WRITE_OUTPUT.format(bandwidth=800, iops=200), ""
+        return "", ""
+
+
+def test_parse_bench_output():
+    metrics = parse_bench_output(WRITE_OUTPUT.format(bandwidth=429.75, iops=107))
+
+    assert metrics == {
+        "duration": 10.0524,
+        "ops": 1080,
+        "bandwidth": 429.75,
+        "iops": 107,
+        "latency": 0.148,
+        "latency_max": 0.412,
+        "latency_min": 0.0311,
+    }
+    assert parse_bench_output("") == {}
+
+
+def test_percentile():
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([1, 2, 3, 4], 90) == pytest.approx(3.7)
+    assert percentile([5], 99) == 5
+
+
+def test_run_records_metrics_and_reports_percentiles():
+    clients = [FakeClient("client1"), FakeClient("client2")]
+    mon = mock.Mock()
+    database = mock.Mock()
+    bench = RadosBench(mon_node=mon, clients=clients, database=database)
+    schedule = [{"for": 0.2, "concurrent-ios": 4}, {"concurrent-ios": 16}]
+
+    bench.run(
+        {
+            "duration": 5,
+            "pg_num": 16,
+            "pool_per_client": True,
+            "schedule": schedule,
+            "batch_size": 2,
+        }
+    )
+    threading.Event().wait(0.5)
+    summary = bench.teardown()
+
+    assert all(f.exception() is None for f in bench.tasks)
+    for client in clients:
+        samples = bench.metrics[client.shortname]
+        writes = [s for s in samples if s["mode"] == "write"]
+        assert len(writes) == client.writes
+        assert [s["bandwidth"] for s in writes] == [
+            400 + i * 10 for i in range(1, client.writes + 1)
+        ]
+        assert {s["concurrent_ios"] for s in samples} == {4, 16}
+        assert "--concurrent-ios 16" in client.commands[-3]
+
+    # A pool per client
+    assert (
+        len({s["pool"] for s in bench.metrics["client1"] + bench.metrics["client2"]})
+        == 2
+    )
+
+    stats = summary["all"]["write"]["bandwidth"]
+    assert stats["count"] == sum(c.writes for c in clients)
+    assert stats["min"] == 410
+    assert stats["p50"] <= stats["p90"] <= stats["p99"] <= stats["max"]
+    assert summary["client1"]["seq"]["iops"]["p99"] == 200
+
+    pushed = [row for call in database.insert_many.call_args_list for row in call[0][2]]
+    assert len(pushed) == sum(len(s) for s in bench.metrics.values())
@@ -0,0 +1,91 @@
+# -*- code: utf-8 -*-
+"""Unit testing module for the waiter."""
+
+import pytest
+
+from ceph import waiter
+from ceph.waiter import WaitUntil, get_wait_records, wait_until
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(waiter.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(waiter.time, "sleep", clock.sleep)
+    waiter.clear_wait_records()
+    return clock
+
+
+def test_fixed_interval(clock):
+    for w in WaitUntil(timeout=10, interval=2):
+        pass
+
+    assert w.expired
+    assert clock.sleeps == [2, 2, 2, 2, 2]
+    assert w.attempts == 6
+
+
+def test_backoff_is_capped(clock):
+    for w in WaitUntil(timeout=100, interval=1, backoff=2, max_interval=10):
+        if w.attempts == 7:
+            break
+
+    assert clock.sleeps == [1, 2, 4, 8, 10, 10]
+    assert not w.expired
+
+
+def test_last_sleep_ends_at_deadline(clock):
+    for w in WaitUntil(timeout=10, interval=4):
+        pass
+
+    assert clock.sleeps == [4, 4, 2]
+
+
+def test_progress_resets_backoff(clock):
+    markers = iter([1, 1, 2, 2, 2])
+    for w in WaitUntil(timeout=100, interval=1, backoff=2):
+        if w.attempts == 6:
+            break
+        w.progress(next(markers))
+
+    # The marker changes on the first and third attempt
+    assert clock.sleeps == [1, 2, 1, 2, 4]
+
+
+def test_parent_deadline(clock):
+    parent = WaitUntil(timeout=5, name="parent")
+    for w in WaitUntil(timeout=60, interval=1, deadline=parent):
+        pass
+
+    assert w.expired
+    assert clock.now == 5
+
+
+def test_wait_until(clock):
+    values = iter([None, None, "done"])
+    assert wait_until(lambda: next(values), timeout=10, interval=1) == "done"
+    assert not wait_until(lambda: False, timeout=3, interval=1, name="never")
+
+    records = get_wait_records()
+    assert records[0]["name"] == "test_wait_until"
+    assert records[0]["attempts"] == 3
+    assert records[1] == {
+        "name": "never",
+        "timeout": 3,
+        "attempts": 4,
+        "elapsed": 3.0,
+        "expired": True,
+    }
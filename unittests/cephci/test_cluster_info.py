@@ -0,0 +1,49 @@
+import os
+from time import monotonic, sleep
+
+import yaml
+
+from ceph.ceph import TimeoutException
+from cephci.cluster_info import get_ceph_var_logs
+
+
+class MockNode:
+    def __init__(self, hostname, timeout=False):
+        self.hostname = hostname
+        self.timeout = timeout
+
+    def download_command_output(self, cmd, dst, sudo=False, timeout=600):
+        sleep(0.2)
+        with open(dst, "wb") as fh:
+            fh.write(b"x" * 10)
+
+        if self.timeout:
+            raise TimeoutException(f"{cmd} exceeded {timeout}s")
+
+        return 10, 0, ""
+
+
+class MockCluster:
+    name = "ceph"
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def get_nodes(self):
+        return self.nodes
+
+
+def test_get_ceph_var_logs(tmp_path):
+    nodes = [MockNode(f"node{i}") for i in range(5)] + [MockNode("node5", True)]
+
+    start = monotonic()
+    manifest = get_ceph_var_logs(MockCluster(nodes), str(tmp_path))
+
+    assert monotonic() - start < 1.0
+    assert [e["node"] for e in manifest] == [n.hostname for n in nodes]
+    assert [e["status"] for e in manifest].count("complete") == 5
+    assert manifest[-1]["status"] == "timeout"
+    assert manifest[0]["size"] == 10
+
+    with open(os.path.join(tmp_path, "ceph_logs", "ceph-cephlog-manifest.yaml")) as fh:
+        assert len(yaml.safe_load(fh)["archives"]) == 6
@@ -0,0 +1,107 @@
+import os
+import sys
+
+import mock
+import pytest
+
+XUNIT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="{suite}" tests="2">
+    <testcase name="Install cluster" time="10">
+      <properties><property name="polarion-testcase-id" value="CEPH-1"/></properties>
+    </testcase>
+    <testcase name="Write objects" time="20">
+      <properties><property name="polarion-testcase-id" value="CEPH-2"/></properties>
+      {failure}
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+@pytest.fixture
+def reports(monkeypatch):
+    """The reports module is executed as a script from the cephci directory."""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    monkeypatch.syspath_prepend(os.path.join(root, "cephci"))
+    from cephci import reports
+
+    return reports
+
+
+def _xunit(tmp_path, suite, failed):
+    path = tmp_path / f"{suite}.xml"
+    failure = '<failure message="error"/>' if failed else ""
+    path.write_text(XUNIT.format(suite=suite, failure=failure))
+    return str(path)
+
+
+def test_records_keep_the_worst_result(reports, tmp_path):
+    xunits = [
+        _xunit(tmp_path, "tier-0", failed=False),
+        _xunit(tmp_path, "tier-1", failed=True),
+        _xunit(tmp_path, "tier-2", failed=False),
+        str(tmp_path / "missing.xml"),
+    ]
+
+    records = reports.collect_test_records(xunits, "cephci")
+
+    results = {r["test_case_id"]: r["test_result"] for r in records}
+    assert results == {"CEPH-1": "passed", "CEPH-2": "failed"}
+    assert records[1]["duration"] == "20"
+
+
+class SharedSessionTestRun:
+    """pylero TestRun look alike having the class level session of BasePolarion.
+
+    Every record update is a transaction of the shared session, a transaction
+    started while another one is in progress fails like interleaved updates do.
+    """
+
+    session = mock.Mock(in_transaction=False)
+    instances = []
+    calls = []
+
+    def __init__(self, test_run_id, project_id):
+        self.instances.append(self)
+
+    def update_test_record_by_fields(self, **record):
+        session = self.session
+        if session.in_transaction:
+            raise RuntimeError("Transaction of another update is in progress")
+
+        session.in_transaction = True
+        try:
+            self.calls.append(record["test_case_id"])
+            if record["test_case_id"] == "CEPH-7":
+                raise ValueError("update failed")
+        finally:
+            session.in_transaction = False
+
+
+def test_update_over_shared_session(reports, monkeypatch):
+    monkeypatch.setattr("utility.retry.time.sleep", lambda _: None)
+    monkeypatch.setitem(
+        sys.modules, "pylero.test_run", mock.Mock(TestRun=SharedSessionTestRun)
+    )
+    monkeypatch.setitem(sys.modules, "pylero", mock.Mock())
+
+    records = [
+        dict(
+            test_case_id=f"CEPH-{i}",
+            test_result="passed",
+            test_comment="test",
+            executed_by="cephci",
+            executed=None,
+            duration="1",
+        )
+        for i in range(10)
+    ]
+    failed = reports.update_test_records("run-1", records)
+
+    assert failed == ["CEPH-7"]
+    assert len(SharedSessionTestRun.instances) == 1
+    # The failing record is tried 3 times, the others once and in order
+    assert SharedSessionTestRun.calls == (
+        [f"CEPH-{i}" for i in range(7)] + ["CEPH-7"] * 3 + ["CEPH-8", "CEPH-9"]
+    )
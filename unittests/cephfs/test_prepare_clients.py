@@ -0,0 +1,106 @@
+# -*- code: utf-8 -*-
+"""Unit testing of the concurrent preparation of the CephFS clients."""
+
+import re
+import threading
+import time
+
+import pytest
+
+from tests.cephfs import cephfs_utilsV1
+from tests.cephfs.cephfs_utilsV1 import (
+    CLIENT_PKGS,
+    GET_CLIENTS_LEGACY_PKGS,
+    FsUtils,
+)
+
+
+class FakeNode:
+    """Client node having the given items installed, every command takes latency."""
+
+    def __init__(self, hostname, installed=(), latency=0.1):
+        self.hostname = hostname
+        self.ip_address = f"10.0.0.{hostname[-1]}"
+        self.installed = set(installed)
+        self.latency = latency
+        self.commands = []
+
+    def exec_command(self, cmd, sudo=False, long_running=False, **kwargs):
+        threading.Event().wait(self.latency)
+        self.commands.append(cmd)
+        if "&& echo " in cmd:
+            probed = re.findall(r"echo ([^\s;]+)", cmd)
+            out = "\n".join(i for i in probed if i in self.installed)
+            return out, ""
+        if cmd.startswith("yum install"):
+            self.installed.update(f"pkg:{p}" for p in cmd.split()[4:])
+        elif cmd.startswith("pip3 install"):
+            self.installed.update(f"pip:{m}" for m in cmd.split()[2:])
+        elif "smallfile.git" in cmd:
+            self.installed.add("tool:smallfile")
+        elif "make linux" in cmd:
+            self.installed.add("tool:iozone")
+        if kwargs.get("verbose"):
+            return "", "", 0, self.latency
+        return 0 if long_running else ("", "")
+
+
+class FakeClient:
+    def __init__(self, node):
+        self.node = node
+
+    def exec_command(self, **kwargs):
+        return self.node.exec_command(**kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fingerprints():
+    cephfs_utilsV1._CLIENT_FINGERPRINTS.clear()
+    yield
+    cephfs_utilsV1._CLIENT_FINGERPRINTS.clear()
+
+
+def test_prepare_clients_is_concurrent_and_cached():
+    clients = [FakeClient(FakeNode(f"client{i}")) for i in range(6)]
+    fs_util = FsUtils.__new__(FsUtils)
+
+    start = time.monotonic()
+    timings = fs_util.prepare_clients(clients, "8.0")
+    elapsed = time.monotonic() - start
+
+    assert sorted(timings) == [f"client{i}" for i in range(6)]
+    # One probe, yum, pip, clone and the five iozone steps per client
+    assert all(len(c.node.commands) == 9 for c in clients)
+    assert elapsed < 9 * 0.1 * 3
+
+    fs_util.prepare_clients(clients, "8.0")
+    assert all(len(c.node.commands) == 9 for c in clients)
+
+
+def test_prepare_clients_skips_installed_items():
+    installed = [f"pkg:{p}" for p in CLIENT_PKGS] + ["pip:xattr", "tool:smallfile"]
+    client = FakeClient(FakeNode("client1", installed=installed, latency=0))
+    fs_util = FsUtils.__new__(FsUtils)
+
+    fs_util.prepare_clients([client], "8.0")
+
+    commands = client.node.commands
+    assert not any(c.startswith("yum install") for c in commands)
+    assert "pip3 install numpy scipy" in commands
+    assert not any("smallfile.git" in c for c in commands)
+    assert any("make linux" in c for c in commands)
+
+
+def test_setup_rpm_client_legacy_build():
+    node = FakeNode("client1", latency=0)
+    fs_util = FsUtils.__new__(FsUtils)
+
+    fs_util._setup_rpm_client(node, "3.3")
+
+    assert "yum install -y " + " ".join(GET_CLIENTS_LEGACY_PKGS) in node.commands
+    assert "rh-python36-python-tools" in GET_CLIENTS_LEGACY_PKGS
+
+    # The devel packages are recorded once installed, hence not installed again
+    node.commands.clear()
+    fs_util._setup_rpm_client(node, "3.3")
+    assert not any("python3-devel" in c for c in node.commands)
@@ -0,0 +1,94 @@
+from time import monotonic, sleep
+
+import pytest
+
+from ceph.ceph import CommandFailed
+from cli import Cli
+from cli.exceptions import MultiNodeExecutionError
+
+
+class MockNode:
+    def __init__(self, shortname, delay=0.1, fail=False):
+        self.shortname = shortname
+        self.delay = delay
+        self.fail = fail
+        self.executed = False
+
+    def exec_command(self, cmd, **kwargs):
+        self.executed = True
+        sleep(self.delay)
+        if self.fail:
+            raise CommandFailed(f"{cmd} failed on {self.shortname}")
+        return f"{self.shortname}: {cmd}", ""
+
+
+def test_execute_single_node():
+    assert Cli(MockNode("node1")).execute(cmd="uptime") == ("node1: uptime", "")
+
+
+def test_execute_nodes_concurrently():
+    nodes = [MockNode(f"node{i}") for i in range(10)]
+
+    start = monotonic()
+    out = Cli(nodes, parallel=True).execute(cmd="uptime")
+
+    assert monotonic() - start < 0.5
+    assert list(out.keys()) == [n.shortname for n in nodes]
+    assert out["node3"] == ("node3: uptime", "")
+
+
+def test_execute_nodes_serially_by_default():
+    nodes = [MockNode(f"node{i}", delay=0.05) for i in range(4)]
+    cli = Cli(nodes)
+
+    start = monotonic()
+    cli.execute(cmd="uptime")
+
+    assert monotonic() - start >= 0.2
+    assert set(cli.durations.keys()) == {n.shortname for n in nodes}
+
+
+def test_execute_serially_stops_at_first_failure():
+    nodes = [MockNode("node1"), MockNode("node2", fail=True), MockNode("node3")]
+
+    with pytest.raises(CommandFailed):
+        Cli(nodes).execute(cmd="uptime")
+
+    assert not nodes[2].executed
+
+
+def test_execute_parallel_per_call():
+    nodes = [MockNode(f"node{i}", delay=0.2) for i in range(4)]
+
+    start = monotonic()
+    Cli(nodes).execute(cmd="uptime", parallel=True)
+
+    assert monotonic() - start < 0.6
+
+
+def test_execute_single_failure_raises_original_error():
+    nodes = [MockNode("node1"), MockNode("node2", fail=True)]
+
+    with pytest.raises(CommandFailed):
+        Cli(nodes, parallel=True).execute(cmd="uptime")
+
+
+def test_execute_aggregates_failures():
+    nodes = [MockNode("node1", fail=True), MockNode("node2", fail=True)]
+
+    with pytest.raises(MultiNodeExecutionError) as err:
+        Cli(nodes, parallel=True).execute(cmd="uptime")
+
+    assert set(err.value.failures.keys()) == {"node1", "node2"}
+
+
+def test_execute_fail_fast():
+    Cli.max_workers, _max_workers = 1, Cli.max_workers
+    try:
+        nodes = [MockNode("node1", fail=True), MockNode("node2"), MockNode("node3")]
+        with pytest.raises(CommandFailed):
+            Cli(nodes, parallel=True, fail_fast=True).execute(cmd="uptime")
+    finally:
+        Cli.max_workers = _max_workers
+
+    assert not nodes[2].executed
@@ -0,0 +1,80 @@
+# -*- code: utf-8 -*-
+"""Unit testing module for the memory and cpu collector."""
+
+import csv
+import os
+from time import monotonic
+
+from cli.performance import memory_and_cpu_utils as utils
+from cli.performance.utilities.memory_and_cpu_logger import (
+    COLLECTOR,
+    Collector,
+    parse_stat,
+)
+
+
+class MockNode:
+    def __init__(self, hostname):
+        self.hostname = hostname
+
+
+def _own_name():
+    with open("/proc/self/stat") as _file:
+        return parse_stat(_file.read())[0]
+
+
+def test_single_pass_samples_all_processes():
+    collector = Collector([_own_name()])
+    collector.sample()
+    rows = collector.sample()
+
+    pids = [row[2] for row in rows if row[1] != COLLECTOR]
+    assert str(os.getpid()) in pids
+    own = [row for row in rows if row[2] == str(os.getpid())][0]
+    assert own[4] > 0
+
+    # The collector reports its own usage and sampling time
+    assert rows[-1][1] == COLLECTOR
+    assert collector.samples == 2
+    assert "samples=2" in collector.summary()
+
+
+def test_sampling_overhead():
+    collector = Collector(["ceph-osd", "ceph-mon", "ceph-mgr", _own_name()])
+    start = monotonic()
+    for _ in range(20):
+        collector.sample()
+
+    # A pass over /proc must not take more than a fraction of a second
+    assert (monotonic() - start) / 20 < 0.5
+    assert collector.max_sample_time < 0.5
+
+
+def test_samples_are_merged_per_run(tmp_path):
+    node1, node2 = MockNode("node1"), MockNode("node2")
+    for test_name, offset in (("test1", 0), ("test2", 100)):
+        tracker = {
+            "test_name": test_name,
+            "samples": {node1: [], node2: []},
+            "overhead": {},
+            "files": {},
+        }
+        for node, stamp in ((node1, 2), (node2, 1), (node1, 3)):
+            utils._collect_sample(
+                tracker, node, "timestamp,daemon,pid,cpu_percent,rss_mb", False
+            )
+            utils._collect_sample(
+                tracker, node, f"{stamp + offset},osd.1,10,1.5,100.0", False
+            )
+        utils._collect_sample(tracker, node1, "# overhead samples=2", False)
+        utils.download_logger_data_from_nodes(str(tmp_path), tracker)
+
+        assert tracker["overhead"][node1] == "samples=2"
+
+    with open(tmp_path / "performance-metrics" / utils.MERGED_FILE) as _file:
+        rows = list(csv.reader(_file))
+
+    assert rows[0] == utils.MERGED_HEADER
+    assert len(rows) == 7
+    assert [row[2] for row in rows[1:4]] == ["node2", "node1", "node1"]
+    assert [row[1] for row in rows[4:]] == ["test2"] * 3
@@ -0,0 +1,105 @@
+# -*- code: utf-8 -*-
+"""Unit testing of the batched execution of rbd operations."""
+
+from time import monotonic
+
+import pytest
+
+from ceph.rbd.workflows.batch import batch_failures, rbd_batch
+from cli import Cli
+from cli.rbd.rbd import Rbd
+
+FAKE_RBD = """#!/bin/bash
+sleep 0.2
+case "$*" in
+    *fail*) echo "rbd: error opening image $2" >&2; exit 2 ;;
+    flatten*) echo "Image flatten: 100% complete...done." >&2 ;;
+    *) echo "$*" ;;
+esac
+"""
+
+
+@pytest.fixture
+def rbd(tmp_path, local_node):
+    path = tmp_path / "rbd"
+    path.write_text(FAKE_RBD)
+    path.chmod(0o755)
+    return Rbd(local_node, base_cmd=f"{tmp_path}/")
+
+
+def test_rbd_batch_single_invocation(rbd):
+    ops = [("snap.create", {"snap-spec": "pool/image@snap"})]
+    ops += [
+        ("clone", {"source-snap-spec": "pool/image@snap", "dest-image-spec": f"c{i}"})
+        for i in range(20)
+    ]
+    ops += [("trash.mv", {"image-spec": "pool/c0"})]
+
+    results = rbd_batch(rbd, ops, concurrency=20)
+
+    assert len(rbd.ctx.commands) == 1
+    assert len(results) == 22
+    assert results[0].out.strip() == "snap create pool/image@snap"
+    assert results[1].out.strip() == "clone pool/image@snap c0"
+    assert results[-1].out.strip() == "trash mv pool/c0"
+    assert all(r.rc == 0 and r.duration >= 0.2 for r in results)
+    assert batch_failures(results) == []
+
+
+def test_rbd_batch_concurrency(rbd):
+    ops = [("flatten", {"image-spec": f"pool/c{i}"}) for i in range(10)]
+
+    start = monotonic()
+    results = rbd_batch(rbd, ops, concurrency=10)
+
+    # Every operation sleeps 0.2s, executed at once they finish well under 2s
+    assert sum(r.duration for r in results) >= 2
+    assert monotonic() - start < 1.5
+    assert batch_failures(results, expect="100% complete...done") == []
+
+
+def test_rbd_batch_failures(rbd):
+    ops = [("flatten", {"image-spec": f"pool/c{i}"}) for i in range(3)]
+    ops.append(("flatten", {"image-spec": "pool/fail"}))
+
+    results = rbd_batch(rbd, ops, concurrency=4)
+
+    [failed] = batch_failures(results, expect="100% complete...done")
+    assert failed.rc == 2
+    assert "error opening image pool/fail" in failed.err
+    assert len(batch_failures(results, expect="not logged")) == 4
+
+
+def test_batch_allows_methods_not_reading_output(rbd):
+    with rbd.batch() as batch:
+        with pytest.raises(ValueError):
+            batch.add("snap.ls", **{"image-spec": "pool/image"})
+        # Calls outside the batch are executed within the block
+        out, _ = rbd.snap.ls(**{"image-spec": "pool/image"})
+        assert out.strip() == "snap ls pool/image"
+        batch.add("flatten", **{"image-spec": "pool/c1"})
+
+    assert len(batch.results) == 1
+    assert rbd.ctx.sudo == [False, True]
+
+
+class EchoCli(Cli):
+    BATCH_METHODS = ("echo", "echo_as_root")
+
+    def echo(self, text):
+        return self.execute(cmd=f"echo {text}")
+
+    def echo_as_root(self, text):
+        return self.execute_as_sudo(cmd=f"echo {text}")
+
+
+def test_batch_split_by_sudo(local_node):
+    cli = EchoCli(local_node)
+    with cli.batch() as batch:
+        batch.add("echo_as_root", text="root1")
+        batch.add("echo", text="user")
+        batch.add("echo_as_root", text="root2")
+
+    # One invocation as the user and one as root, results in the order added
+    assert cli.ctx.sudo == [False, True]
+    assert [r.out.strip() for r in batch.results] == ["root1", "user", "root2"]
@@ -0,0 +1,220 @@
+# -*- code: utf-8 -*-
+"""In memory OpenStack libcloud driver used for offline benchmarks.
+
+The driver implements the subset of the OpenStack_2_NodeDriver interface that is
+consumed by compute.openstack and ceph.utils. Every API call sleeps for the given
+latency to emulate the round trip to the cloud. When max_concurrent is set, the
+mutating calls exceeding the limit raise RateLimitReachedError (HTTP 429). Volumes
+are detached asynchronously after detach_time and destroying an attached volume
+fails like it does in Cinder.
+"""
+
+import threading
+from itertools import count
+from time import sleep
+
+from libcloud.common.exceptions import BaseHTTPError, RateLimitReachedError
+from libcloud.compute.base import Node, NodeImage, NodeSize, StorageVolume
+from libcloud.compute.drivers.openstack import OpenStackNetwork
+from libcloud.compute.types import StorageVolumeState
+
+
+class _Response:
+    def __init__(self, obj):
+        self.object = obj
+
+
+class _Connection:
+    def __init__(self, driver, handler):
+        self._driver = driver
+        self._handler = handler
+
+    def request(self, url, **kwargs):
+        return self._driver._api(self._handler, url)
+
+
+class FakeOpenStackDriver:
+    """Fake libcloud OpenStack driver."""
+
+    _networks_url_prefix = "/v2.0/networks"
+    _subnets_url_prefix = "/v2.0/subnets"
+
+    def __init__(
+        self,
+        latency=0.0,
+        boot_time=0.0,
+        max_concurrent=None,
+        networks=("provider_net_cci_16",),
+        detach_time=0.0,
+    ):
+        self.latency = latency
+        self.detach_time = detach_time
+        self.boot_time = boot_time
+        self.max_concurrent = max_concurrent
+        self.networks = list(networks)
+        self.nodes = dict()
+        self.volumes = dict()
+        self.calls = dict()
+        self.throttled = 0
+
+        self._ids = count(1)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        self.connection = _Connection(self, self._servers)
+        self.image_connection = _Connection(self, self._images)
+        self.network_connection = _Connection(self, self._networks)
+
+    # Helpers
+    def _api(self, handler, *args, **kwargs):
+        with self._lock:
+            name = getattr(handler, "__name__", str(handler))
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+        sleep(self.latency)
+        return handler(*args, **kwargs)
+
+    def _mutating(self, handler, *args, **kwargs):
+        with self._lock:
+            if self.max_concurrent and self._in_flight >= self.max_concurrent:
+                self.throttled += 1
+                raise RateLimitReachedError()
+            self._in_flight += 1
+
+        try:
+            return self._api(handler, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _servers(self, url):
+        name = url.split("name=")[-1]
+        return _Response(
+            {"servers": [{"id": n.id} for n in self.nodes.values() if n.name == name]}
+        )
+
+    def _images(self, url):
+        name = url.split("name=")[-1]
+        return _Response([{"id": "image-1", "name": name}])
+
+    def _networks(self, url):
+        if "network-ip-availabilities" in url:
+            return _Response(
+                {
+                    "network_ip_availability": {
+                        "subnet_ip_availability": [
+                            {"cidr": "10.0.0.0/22", "total_ips": 1021, "used_ips": 10}
+                        ]
+                    }
+                }
+            )
+
+        name = url.split("name=")[-1]
+        return _Response([n for n in self.networks if n == name])
+
+    def _to_images(self, obj, ex_only_active=True):
+        return [NodeImage(id=i["id"], name=i["name"], driver=self) for i in obj]
+
+    def _to_networks(self, obj):
+        return [OpenStackNetwork(id=n, name=n, cidr=None, driver=self) for n in obj]
+
+    # NodeDriver interface
+    def list_sizes(self):
+        return self._api(
+            lambda: [
+                NodeSize(
+                    id=str(i),
+                    name=n,
+                    ram=4096,
+                    disk=40,
+                    bandwidth=None,
+                    price=None,
+                    driver=self,
+                )
+                for i, n in enumerate(["ci.standard.small", "ci.standard.medium"])
+            ]
+        )
+
+    def get_image(self, image_id):
+        return self._api(lambda: NodeImage(id=image_id, name=image_id, driver=self))
+
+    def create_node(self, name, image, size, networks=None, **kwargs):
+        def _create():
+            node_id = f"node-{next(self._ids)}"
+            node = Node(
+                id=node_id,
+                name=name,
+                state="running",
+                public_ips=[],
+                private_ips=[f"10.0.0.{len(self.nodes) + 2}"],
+                driver=self,
+                extra={"volumes_attached": []},
+            )
+            self.nodes[node_id] = node
+            return node
+
+        node = self._mutating(_create)
+        sleep(self.boot_time)
+        return node
+
+    def ex_get_node_details(self, node_id):
+        return self._api(lambda: self.nodes.get(node_id))
+
+    def list_nodes(self):
+        return self._api(lambda: list(self.nodes.values()))
+
+    def destroy_node(self, node):
+        return self._mutating(lambda: self.nodes.pop(node.id, None) is not None)
+
+    def create_volume(self, size, name, **kwargs):
+        def _create():
+            vol_id = f"vol-{next(self._ids)}"
+            vol = StorageVolume(
+                id=vol_id,
+                name=name,
+                size=size,
+                driver=self,
+                state=StorageVolumeState.AVAILABLE,
+                extra={"attachments": []},
+            )
+            self.volumes[vol_id] = vol
+            return vol
+
+        return self._mutating(_create)
+
+    def ex_get_volume(self, volume_id):
+        return self._api(lambda: self.volumes.get(volume_id))
+
+    def list_volumes(self):
+        return self._api(lambda: list(self.volumes.values()))
+
+    def attach_volume(self, node, volume, **kwargs):
+        def _attach():
+            volume.state = StorageVolumeState.INUSE
+            volume.extra["attachments"] = [{"server_id": node.id}]
+            node.extra["volumes_attached"].append({"id": volume.id})
+            return True
+
+        return self._mutating(_attach)
+
+    def detach_volume(self, volume, **kwargs):
+        def _detached():
+            volume.state = StorageVolumeState.AVAILABLE
+            volume.extra["attachments"] = []
+
+        def _detach():
+            threading.Timer(self.detach_time, _detached).start()
+            return True
+
+        return self._mutating(_detach)
+
+    def destroy_volume(self, volume):
+        def _destroy():
+            if volume.state == StorageVolumeState.INUSE:
+                raise BaseHTTPError(400, f"Volume {volume.id} is attached")
+            return self.volumes.pop(volume.id, None) is not None
+
+        return self._mutating(_destroy)
+
+    def ex_detach_floating_ip_from_node(self, node, ip):
+        return self._api(lambda: True)
@@ -0,0 +1,137 @@
+# -*- code: utf-8 -*-
+"""Unit testing of the OneCloud API client and cleanup."""
+
+import threading
+import time
+
+import mock
+import pytest
+
+from compute import onecloud
+from compute.onecloud import (
+    cached_per_site,
+    cleanup_onecloud_ceph_nodes,
+    get_onecloud_client,
+)
+
+CREDS = {
+    "globals": {
+        "onecloud-credentials": {
+            "api_key": "token",
+            "base_url": "https://onecloud.example.com/api",
+        }
+    }
+}
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data
+        self.text = ""
+
+    def json(self):
+        return self._data
+
+
+class FakeClient:
+    """In memory OneCloud API with a fixed latency per call."""
+
+    base_url = "https://onecloud.example.com/api"
+
+    def __init__(self, clusters=4, vms=5, latency=0.05):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.calls = []
+        self.clusters = {
+            c: {v: "running" for v in range(c * 100, c * 100 + vms)}
+            for c in range(1, clusters + 1)
+        }
+
+    def _call(self, method, path):
+        # Not time.sleep, which the tests patch away
+        threading.Event().wait(self.latency)
+        with self.lock:
+            self.calls.append((method, path))
+
+    def get(self, path, **kwargs):
+        self._call("GET", path)
+        if path == "/clusters":
+            return FakeResponse(
+                data=[
+                    {"clusterid": c, "cluster_name": f"ceph-ci-run-{c}"}
+                    for c in self.clusters
+                ]
+            )
+
+        cluster_id = int(path.split("=")[1])
+        vms = self.clusters.get(cluster_id, {})
+        return FakeResponse(
+            data={"data": [{"vmid": v, "state": s} for v, s in vms.items()]}
+        )
+
+    def delete(self, path, **kwargs):
+        self._call("DELETE", path)
+        _, kind, _id = path.split("/")
+        if kind == "vm":
+            for vms in self.clusters.values():
+                vms.pop(int(_id), None)
+        else:
+            self.clusters.pop(int(_id), None)
+        return FakeResponse(204)
+
+
+@pytest.fixture(autouse=True)
+def caches():
+    onecloud._CLIENTS.clear()
+    onecloud._SITE_CACHE.clear()
+    yield
+    onecloud._CLIENTS.clear()
+    onecloud._SITE_CACHE.clear()
+
+
+def test_client_reuses_session():
+    with mock.patch("compute.onecloud.requests.Session") as session:
+        client = get_onecloud_client("token", "https://onecloud.example.com/api/")
+        assert (
+            get_onecloud_client("token", "https://onecloud.example.com/api") is client
+        )
+        client.get("/clusters")
+        client.delete("/vm/1")
+
+    assert session.call_count == 1
+    adapter = session.return_value.mount.call_args[0][1]
+    assert adapter.max_retries.total == onecloud.HTTP_RETRIES
+    assert 503 in adapter.max_retries.status_forcelist
+    assert "POST" not in adapter.max_retries.allowed_methods
+    method, url = session.return_value.request.call_args[0]
+    assert (method, url) == ("DELETE", "https://onecloud.example.com/api/vm/1")
+
+
+def test_site_lookups_are_cached():
+    resolve = mock.Mock(side_effect=[RuntimeError("no image"), 10, 20])
+    cached = cached_per_site(lambda client, site, **kw: resolve(site, **kw))
+    client = FakeClient()
+
+    with pytest.raises(RuntimeError):
+        cached(client, "site-a")
+    assert cached(client, "site-a") == 10
+    assert cached(client, "site-a") == 10
+    assert cached(client, "site-a", exclude_image_ids=[10]) == 20
+    assert resolve.call_count == 3
+
+
+def test_cleanup_is_concurrent(monkeypatch):
+    monkeypatch.setattr(onecloud.time, "sleep", lambda _: None)
+    client = FakeClient(clusters=8, vms=10, latency=0.05)
+    monkeypatch.setattr(onecloud, "get_onecloud_client", lambda *a, **kw: client)
+
+    start = time.monotonic()
+    cleanup_onecloud_ceph_nodes(CREDS, "ceph-ci-run")
+    elapsed = time.monotonic() - start
+
+    assert not client.clusters
+    deletes = [path for method, path in client.calls if method == "DELETE"]
+    assert len(deletes) == 8 * 10 + 8
+    # Sequentially the 185 calls take over 9 seconds
+    assert elapsed < 2
@@ -0,0 +1,102 @@
+# -*- code: utf-8 -*-
+"""Unit testing of the OpenStack driver and catalog caches."""
+
+import threading
+
+import mock
+import pytest
+
+from compute import openstack, rate_limiter
+from compute.openstack import AUTH_CACHE, OpenStackCatalog, get_openstack_driver
+from compute.rate_limiter import get_rate_limiter
+from unittests.compute.fake_libcloud import FakeOpenStackDriver
+from unittests.compute.test_rate_limiter import NODE_COUNT, _provision
+
+CREDS = {
+    "username": "user",
+    "password": "password",
+    "auth_url": "https://rhos-d.example.com:13000",
+    "auth_version": "3.x_password",
+    "tenant_name": "ceph-ci",
+    "service_region": "regionOne",
+    "domain_name": "redhat.com",
+    "tenant_domain_id": "domain-id",
+}
+
+
+@pytest.fixture(autouse=True)
+def caches():
+    """Provide fresh process wide catalogs and limiters for every test."""
+    openstack._CATALOGS.clear()
+    rate_limiter._LIMITERS.clear()
+    yield
+    openstack._CATALOGS.clear()
+    rate_limiter._LIMITERS.clear()
+
+
+def test_driver_is_cached_per_thread():
+    with mock.patch("compute.openstack.get_driver") as get_driver:
+        get_driver.return_value.side_effect = lambda *a, **kw: mock.Mock()
+        driver = get_openstack_driver(**CREDS)
+        assert get_openstack_driver(**CREDS) is driver
+        assert get_openstack_driver(**dict(CREDS, tenant_name="other")) is not driver
+
+        drivers = []
+        thread = threading.Thread(
+            target=lambda: drivers.append(get_openstack_driver(**CREDS))
+        )
+        thread.start()
+        thread.join()
+
+    assert drivers[0] is not driver
+    for _, kwargs in get_driver.return_value.call_args_list:
+        assert kwargs["ex_auth_cache"] is AUTH_CACHE
+
+
+def test_catalog_is_queried_once_per_cluster():
+    get_rate_limiter("openstack", rate=50, burst=NODE_COUNT)
+    driver = FakeOpenStackDriver(latency=0.01)
+    driver.list_sizes = mock.Mock(wraps=driver.list_sizes)
+
+    nodes, _ = _provision(driver)
+
+    assert len(nodes) == NODE_COUNT
+    assert driver.list_sizes.call_count == 1
+    assert driver.calls["_images"] == 1
+    # Network lookup and its IP availability
+    assert driver.calls["_networks"] == 2
+
+
+def test_catalog_entries_expire():
+    catalog = OpenStackCatalog(ttl=0)
+    loader = mock.Mock(return_value="flavors")
+
+    assert catalog.get(("sizes",), loader) == "flavors"
+    assert catalog.get(("sizes",), loader) == "flavors"
+    assert loader.call_count == 2
+
+
+def test_failed_lookups_are_not_cached():
+    catalog = OpenStackCatalog()
+    loader = mock.Mock(side_effect=[openstack.ResourceNotFound("net"), "net"])
+
+    with pytest.raises(openstack.ResourceNotFound):
+        catalog.get(("network", "net"), loader)
+    assert catalog.get(("network", "net"), loader) == "net"
+
+
+def test_free_ips_are_reserved_locally():
+    catalog = OpenStackCatalog()
+    loader = mock.Mock(
+        return_value=[
+            {"cidr": "10.0.0.0/29", "total_ips": 8, "used_ips": 6},
+            {"cidr": "10.0.1.0/29", "total_ips": 8, "used_ips": 3},
+        ]
+    )
+
+    cidrs = [catalog.reserve_ip("net-1", loader) for _ in range(3)]
+
+    # The first subnet has 2 free IPs which are kept as buffer, the second one
+    # has 5 of which 2 are leased before reaching the buffer.
+    assert cidrs == ["10.0.1.0/29", "10.0.1.0/29", None]
+    assert loader.call_count == 1
@@ -0,0 +1,131 @@
+# -*- code: utf-8 -*-
+"""Unit testing and benchmarking of the OpenStack cleanup.
+
+The benchmark removes the resources of a run through ceph.utils.cleanup_ceph_nodes
+using the in memory libcloud driver, hence it can be executed offline.
+"""
+
+from time import monotonic
+
+import mock
+import pytest
+from libcloud.common.exceptions import BaseHTTPError
+from libcloud.compute.base import Node
+
+from ceph.utils import cleanup_ceph_nodes
+from compute import rate_limiter
+from compute.openstack_cleanup import CleanupEvent, OpenStackCleanup
+from compute.rate_limiter import get_rate_limiter
+from unittests.compute.fake_libcloud import FakeOpenStackDriver
+
+NODE_COUNT = 10
+VOLUMES_PER_NODE = 3
+
+
+@pytest.fixture(autouse=True)
+def limiters():
+    rate_limiter._LIMITERS.clear()
+    get_rate_limiter("openstack", rate=500, burst=50, max_concurrent=20)
+    yield
+    rate_limiter._LIMITERS.clear()
+
+
+def _run_resources(driver, name="ceph-r1", nodes=NODE_COUNT):
+    """Create attached volumes and nodes of a run in the fake driver."""
+    for i in range(nodes):
+        node = driver.create_node(f"{name}-node{i}", None, None)
+        for j in range(VOLUMES_PER_NODE):
+            volume = driver.create_volume(10, f"{name}-node{i}-vol{j}")
+            driver.attach_volume(node, volume)
+
+    driver.calls.clear()
+
+
+def test_benchmark_cleanup_ceph_nodes():
+    """All the resources of a run are removed concurrently."""
+    driver = FakeOpenStackDriver(latency=0.01, detach_time=0.2)
+    _run_resources(driver)
+    _run_resources(driver, name="ceph-r2", nodes=1)
+    driver.list_volumes = mock.Mock(wraps=driver.list_volumes)
+    driver.list_nodes = mock.Mock(wraps=driver.list_nodes)
+
+    with mock.patch("ceph.utils.get_openstack_driver", return_value=driver):
+        start = monotonic()
+        cleanup_ceph_nodes({}, "ceph-r1")
+        elapsed = monotonic() - start
+
+    assert sorted(n.name for n in driver.nodes.values()) == ["ceph-r2-node0"]
+    assert len(driver.volumes) == VOLUMES_PER_NODE
+    # Listed once and then once per verification poll, not once per resource
+    assert driver.list_volumes.call_count == 2
+    assert driver.list_nodes.call_count == 2
+    # Previously a 1s stagger per volume, 40s per volume and 5s per node
+    assert elapsed < 10
+
+
+def test_timeline_and_failures():
+    driver = FakeOpenStackDriver()
+    _run_resources(driver, nodes=2)
+    driver.destroy_node = mock.Mock(side_effect=Exception("Conflict"))
+
+    cleanup = OpenStackCleanup(lambda: driver, "ceph-r1", timeout=1)
+    remaining = cleanup.run()
+
+    assert not remaining["volumes"]
+    assert sorted(n.name for n in remaining["nodes"]) == [
+        "ceph-r1-node0",
+        "ceph-r1-node1",
+    ]
+    volume = next(t for t in cleanup.timelines.values() if t["kind"] == "volume")
+    assert [e[0] for e in volume["events"]] == [
+        CleanupEvent.LISTED,
+        CleanupEvent.DETACH,
+        CleanupEvent.DETACHED,
+        CleanupEvent.DESTROY,
+        CleanupEvent.GONE,
+    ]
+    node = next(t for t in cleanup.timelines.values() if t["kind"] == "node")
+    assert node["events"][-1] == (CleanupEvent.FAILED, mock.ANY, "Conflict")
+
+
+def test_not_found_is_removed():
+    driver = FakeOpenStackDriver()
+    _run_resources(driver, nodes=2)
+    destroy_node = driver.destroy_node
+
+    def _destroy_node(node):
+        destroy_node(node)
+        raise BaseHTTPError(404, "Instance could not be found")
+
+    driver.destroy_node = _destroy_node
+    cleanup = OpenStackCleanup(lambda: driver, "ceph-r1", timeout=30)
+
+    start = monotonic()
+    remaining = cleanup.run()
+
+    assert remaining == {"volumes": [], "nodes": []}
+    assert monotonic() - start < 5
+
+
+def test_client_errors_are_not_retried():
+    driver = FakeOpenStackDriver()
+    _run_resources(driver, nodes=1)
+    driver.destroy_node = mock.Mock(side_effect=BaseHTTPError(403, "Forbidden"))
+    cleanup = OpenStackCleanup(lambda: driver, "ceph-r1", timeout=30)
+
+    start = monotonic()
+    remaining = cleanup.run()
+
+    assert [n.name for n in remaining["nodes"]] == ["ceph-r1-node0"]
+    assert driver.destroy_node.call_count == 1
+    assert monotonic() - start < 5
+
+
+def test_cleanup_ceph_nodes_raises_on_remaining_nodes():
+    driver = FakeOpenStackDriver()
+    driver.nodes["n1"] = Node("n1", "ceph-r1-node1", "running", [], [], driver)
+    driver.destroy_node = mock.Mock(side_effect=Exception("Conflict"))
+
+    with mock.patch("ceph.utils.get_openstack_driver", return_value=driver):
+        with pytest.raises(RuntimeError, match="ceph-r1-node1"):
+            cleanup_ceph_nodes({}, "ceph-r1", timeout=1)
@@ -0,0 +1,171 @@
+# -*- code: utf-8 -*-
+"""Unit testing and benchmarking of cloud API rate limiting.
+
+The benchmark provisions a cluster through ceph.utils.create_ceph_nodes using an
+in memory libcloud driver, hence it can be executed without an OpenStack cloud.
+"""
+
+from time import monotonic
+
+import mock
+import pytest
+from libcloud.common.exceptions import RateLimitReachedError
+
+from ceph.utils import create_ceph_nodes
+from compute import rate_limiter
+from compute.exceptions import RateLimitExceeded
+from compute.rate_limiter import (
+    CloudRateLimiter,
+    TokenBucket,
+    get_rate_limiter,
+    is_throttled,
+)
+from unittests.compute.fake_libcloud import FakeOpenStackDriver
+
+NODE_COUNT = 10
+
+
+@pytest.fixture(autouse=True)
+def limiters():
+    """Provide fresh process wide limiters for every test."""
+    rate_limiter._LIMITERS.clear()
+    yield rate_limiter._LIMITERS
+    rate_limiter._LIMITERS.clear()
+
+
+def _cluster_conf(count):
+    conf = {"ceph-cluster": {"name": "ceph"}}
+    for i in range(1, count + 1):
+        conf["ceph-cluster"][f"node{i}"] = {"role": ["mon", "osd"]}
+
+    return conf
+
+
+def _osp_cred():
+    return {
+        "globals": {
+            "openstack-credentials": {
+                "username": "user",
+                "password": "password",
+                "auth-url": "https://rhos-d.example.com:13000",
+                "auth-version": "3.x_password",
+                "tenant-name": "ceph-ci",
+                "service-region": "regionOne",
+                "domain": "redhat.com",
+                "tenant-domain-id": "domain-id",
+            }
+        }
+    }
+
+
+def _inventory():
+    return {
+        "instance": {
+            "setup": "#cloud-config",
+            "create": {
+                "image-name": "RHEL-9",
+                "vm-size": "ci.standard.small",
+                "vm-network": None,
+            },
+        }
+    }
+
+
+def _provision(driver, count=NODE_COUNT):
+    with mock.patch(
+        "compute.openstack.get_openstack_driver", return_value=driver
+    ), mock.patch("compute.openstack.sleep"), mock.patch(
+        "ceph.utils.os.getlogin", return_value="cephci"
+    ):
+        start = monotonic()
+        nodes = create_ceph_nodes(_cluster_conf(count), _inventory(), _osp_cred(), "r1")
+        return nodes, monotonic() - start
+
+
+def test_token_bucket_burst_then_rate():
+    bucket = TokenBucket(rate=20, capacity=5)
+    start = monotonic()
+    for _ in range(10):
+        bucket.acquire()
+
+    # 5 tokens are available immediately, remaining 5 refill at 20/s
+    assert 0.2 <= monotonic() - start < 1.0
+
+
+def test_token_bucket_timeout():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.05)
+
+
+def test_is_throttled():
+    assert is_throttled(RateLimitReachedError())
+    assert is_throttled(Exception("Quota exceeded for instances"))
+    assert not is_throttled(Exception("Image not found"))
+
+
+def test_call_backs_off_on_throttling():
+    limiter = CloudRateLimiter("test", rate=100, burst=10, delay=0.01)
+    attempts = []
+
+    def _create():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitReachedError()
+        return "node"
+
+    assert limiter.call(_create) == "node"
+    assert limiter.stats["throttled"] == 2
+
+
+def test_call_gives_up():
+    limiter = CloudRateLimiter("test", rate=100, burst=10, tries=2, delay=0.01)
+
+    def _create():
+        raise RateLimitReachedError()
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.call(_create)
+
+
+def test_call_does_not_retry_other_errors():
+    limiter = CloudRateLimiter("test", rate=100, burst=10, delay=0.01)
+
+    def _create():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        limiter.call(_create)
+
+    assert limiter.stats["calls"] == 1
+
+
+def test_get_rate_limiter_is_shared():
+    assert get_rate_limiter("openstack") is get_rate_limiter("openstack")
+    assert get_rate_limiter("openstack") is not get_rate_limiter("aws")
+
+
+def test_benchmark_create_ceph_nodes():
+    """Provision a cluster concurrently against a driver with API latency."""
+    get_rate_limiter("openstack", rate=50, burst=NODE_COUNT)
+    driver = FakeOpenStackDriver(latency=0.01, boot_time=0.2)
+
+    nodes, elapsed = _provision(driver)
+
+    # The linear stagger used to take 10 * n(n+1)/2 seconds before the last
+    # node creation request was sent.
+    assert len(nodes) == NODE_COUNT
+    assert elapsed < 0.2 * NODE_COUNT
+    assert driver.calls
+
+
+def test_benchmark_create_ceph_nodes_throttled():
+    """Provisioning completes when the cloud rejects concurrent requests."""
+    limiter = get_rate_limiter("openstack", rate=50, burst=NODE_COUNT, delay=0.01)
+    driver = FakeOpenStackDriver(latency=0.01, boot_time=0.05, max_concurrent=2)
+
+    nodes, _ = _provision(driver)
+
+    assert len(nodes) == NODE_COUNT
+    assert driver.throttled
+    assert driver.throttled == limiter.stats["throttled"]
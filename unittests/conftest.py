@@ -0,0 +1,50 @@
+# -*- code: utf-8 -*-
+"""Fixtures shared by the unit tests."""
+
+import shutil
+import subprocess
+
+import pytest
+
+
+class LocalNode:
+    """Node look alike executing the commands on the local host using bash.
+
+    The commands executed and their sudo flag are recorded. The rewrite hook,
+    when set, changes the command before it is executed, e.g. to replace a
+    remote only tool by a local equivalent.
+    """
+
+    hostname = "localhost"
+    shortname = "localhost"
+
+    def __init__(self):
+        self.commands = []
+        self.sudo = []
+        self.rewrite = None
+
+    @property
+    def calls(self):
+        return len(self.commands)
+
+    def upload_file(self, src, dst, sudo=False):
+        shutil.copy(src, dst)
+
+    def exec_command(self, cmd, sudo=False, timeout=600, **kwargs):
+        self.commands.append(cmd)
+        self.sudo.append(sudo)
+        if self.rewrite:
+            cmd = self.rewrite(cmd)
+
+        proc = subprocess.run(
+            ["bash", "-c", cmd], capture_output=True, text=True, timeout=timeout
+        )
+        if proc.returncode:
+            raise RuntimeError(proc.stderr)
+        return proc.stdout, proc.stderr
+
+
+@pytest.fixture
+def local_node():
+    """Node executing the commands on the local host."""
+    return LocalNode()
@@ -0,0 +1,58 @@
+# -*- code: utf-8 -*-
+"""Unit testing module for the checksum manifests.
+
+The manifest script is executed on the local host by the local node.
+"""
+
+import hashlib
+
+import pytest
+
+from utility.checksum_manifest import diff_manifests, get_checksum_manifest
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for i in range(50):
+        (tmp_path / f"file_{i}").write_bytes(bytes([i]) * (i * 1000))
+    (tmp_path / "dir1" / "dir2").mkdir(parents=True)
+    (tmp_path / "dir1" / "nested").write_text("nested")
+    (tmp_path / "dir1" / "dir2" / "deep").write_text("deep")
+    (tmp_path / "link").symlink_to(tmp_path / "file_1")
+    return tmp_path
+
+
+def test_manifest_in_single_invocation(tree, local_node):
+    manifest = get_checksum_manifest(local_node, str(tree), workers=4)
+
+    assert local_node.calls == 1
+    assert len(manifest) == 52
+    assert manifest["dir1/dir2/deep"].size == 4
+    assert manifest["file_7"].hash == hashlib.md5(bytes([7]) * 7000).hexdigest()
+    assert "link" not in manifest
+
+
+def test_manifest_maxdepth(tree, local_node):
+    assert len(get_checksum_manifest(local_node, str(tree), maxdepth=1)) == 50
+    assert len(get_checksum_manifest(local_node, str(tree), maxdepth=2)) == 51
+
+
+def test_diff_manifests(tree, local_node):
+    before = get_checksum_manifest(local_node, str(tree))
+
+    (tree / "file_1").write_bytes(b"changed")
+    (tree / "file_2").unlink()
+    (tree / "file_new").write_text("new")
+    (tree / "file_3").touch()
+    after = get_checksum_manifest(local_node, str(tree))
+
+    assert diff_manifests(before, after) == {
+        "added": ["file_new"],
+        "removed": ["file_2"],
+        "modified": ["file_1"],
+    }
+    assert diff_manifests(before, before) == {
+        "added": [],
+        "removed": [],
+        "modified": [],
+    }
@@ -0,0 +1,178 @@
+# -*- code: utf-8 -*-
+"""Unit testing module for the read-only ceph command cache."""
+
+import pytest
+
+from cli import Cli
+from utility.command_cache import (
+    CommandCache,
+    changes_daemons,
+    is_read_only,
+    parse_command,
+)
+
+
+class MockNode:
+    def __init__(self, ip_address, shortname="node"):
+        self.ip_address = ip_address
+        self.shortname = shortname
+        self.calls = []
+        self.cache = None
+        self.fail = False
+        self.exit_status = None
+
+    def exec_command(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        if self.cache:
+            self.cache.observe(self, cmd)
+        self.exit_status = 1 if self.fail else 0
+        if self.fail:
+            return "", "Error ENOENT"
+        return f"{len(self.calls)}", ""
+
+
+class MockCluster:
+    def __init__(self, name, nodes):
+        self.name = name
+        self.nodes = nodes
+
+    def get_nodes(self):
+        return self.nodes
+
+
+@pytest.fixture
+def cache():
+    return CommandCache(ttl=60, enabled=True)
+
+
+@pytest.mark.parametrize(
+    "cmd, read_only",
+    [
+        ("ceph osd tree -f json", True),
+        ("cephadm shell -- ceph df", True),
+        ("ceph -s", True),
+        ("ceph osd pool get rbd size", True),
+        ("ceph osd pool create ls 32", False),
+        ("ceph osd set noout", False),
+        ("ceph osd out 1", False),
+        ("ceph -f json orch apply osd --all-available-devices", False),
+    ],
+)
+def test_read_only_classification(cmd, read_only):
+    _, positional, _ = parse_command(cmd)
+    assert is_read_only(positional) is read_only
+
+
+@pytest.mark.parametrize(
+    "cmd, changes",
+    [
+        ("systemctl stop ceph-abc@osd.1.service", True),
+        ("sudo systemctl restart ceph.target", True),
+        ("cephadm rm-daemon --fsid abc --name osd.1 --force", True),
+        ("sudo reboot", True),
+        ("systemctl status ceph-abc@osd.1.service", False),
+        ("systemctl stop firewalld", False),
+        ("cephadm ls", False),
+    ],
+)
+def test_daemon_changes_classification(cmd, changes):
+    assert changes_daemons(cmd) is changes
+
+
+def test_non_ceph_command_is_not_cached(cache):
+    node = MockNode("10.0.0.1")
+    for _ in range(2):
+        cache.lookup(node, "uptime", lambda: node.exec_command("uptime"))
+
+    assert len(node.calls) == 2
+    assert cache.stats["misses"] == 0
+
+
+def test_hit_and_expiry(cache):
+    node = MockNode("10.0.0.1")
+    fetch = lambda: node.exec_command("ceph osd tree")  # noqa
+
+    assert cache.lookup(node, "ceph osd tree", fetch) == ("1", "")
+    assert cache.lookup(node, "ceph osd tree", fetch) == ("1", "")
+    assert cache.stats["hits"] == 1
+
+    cache.ttl = 0
+    cache.clear()
+    cache.lookup(node, "ceph osd tree", fetch)
+    assert cache.lookup(node, "ceph osd tree", fetch) == ("3", "")
+    assert cache.stats["expired"] == 1
+
+
+def test_mutation_invalidates_cluster(cache):
+    installer, client = MockNode("10.0.0.1"), MockNode("10.0.0.2")
+    other = MockNode("10.0.0.3")
+    installer.cache = client.cache = other.cache = cache
+    cache.register_cluster(MockCluster("ceph", [installer, client]))
+    cache.register_cluster(MockCluster("site2", [other]))
+
+    cache.lookup(installer, "ceph df", lambda: installer.exec_command("ceph df"))
+    cache.lookup(other, "ceph df", lambda: other.exec_command("ceph df"))
+
+    # Executed outside the cache, on another node of the same cluster
+    client.exec_command("ceph osd pool create test 32")
+
+    cache.lookup(installer, "ceph df", lambda: installer.exec_command("ceph df"))
+    cache.lookup(other, "ceph df", lambda: other.exec_command("ceph df"))
+    assert installer.calls == ["ceph df", "ceph df"]
+    assert other.calls == ["ceph df"]
+    assert cache.stats["invalidations"] == 1
+
+
+def test_daemon_change_invalidates_cluster(cache):
+    installer, host = MockNode("10.0.0.1"), MockNode("10.0.0.2")
+    host.cache = cache
+    cache.register_cluster(MockCluster("ceph", [installer, host]))
+
+    for cmd in ("systemctl stop ceph-abc@osd.1.service", "sudo reboot"):
+        cache.lookup(
+            installer, "ceph osd tree", lambda: installer.exec_command("ceph osd tree")
+        )
+        host.exec_command(cmd)
+
+    cache.lookup(
+        installer, "ceph osd tree", lambda: installer.exec_command("ceph osd tree")
+    )
+    assert len(installer.calls) == 3
+    assert cache.stats["invalidations"] == 2
+
+
+def test_disabled_cache_always_executes():
+    cache = CommandCache()
+    node = MockNode("10.0.0.1")
+    for _ in range(3):
+        cache.lookup(node, "ceph versions", lambda: node.exec_command("ceph versions"))
+
+    assert len(node.calls) == 3
+
+
+def test_cli_execute_uses_cache(cache, monkeypatch):
+    monkeypatch.setattr("cli.get_command_cache", lambda: cache)
+    node = MockNode("10.0.0.1")
+    cli = Cli(node)
+
+    for _ in range(3):
+        cli.execute(cmd="ceph orch ls -f json", sudo=True)
+    cli.execute(cmd="ceph orch ls -f json", long_running=True)
+
+    assert len(node.calls) == 2
+    assert cache.stats == {"hits": 2, "misses": 1, "expired": 0, "invalidations": 0}
+
+
+def test_cli_execute_does_not_cache_failures(cache, monkeypatch):
+    monkeypatch.setattr("cli.get_command_cache", lambda: cache)
+    node = MockNode("10.0.0.1")
+    node.fail = True
+    cli = Cli(node)
+
+    for _ in range(2):
+        assert cli.execute(cmd="ceph orch ls -f json") == ("", "Error ENOENT")
+
+    node.fail = False
+    assert cli.execute(cmd="ceph orch ls -f json") == ("3", "")
+    assert cli.execute(cmd="ceph orch ls -f json") == ("3", "")
+    assert cache.stats["hits"] == 1
@@ -4,12 +4,17 @@
 This test module uses pytest to unit test the sensitive data log filter
 """
 
+import logging
 import os
 from copy import deepcopy
+from multiprocessing import Manager, Process
+from time import perf_counter
 
+import mock
 import pytest
 
-from utility.log import Log
+from utility import log as log_module
+from utility.log import QUEUE_SIZE, Log, QueueBridge, SensitiveLogFilter
 
 str_data = "This has password something."
 str_data_no_passwd = "This test has no sensitive data."
@@ -116,3 +121,106 @@ def test_log_list_of_dictionaries(logger):
     assert list_dict_data[1]["test"]["module"] in log_contents
     assert "masked" not in log_contents
     assert None not in _test_data
+
+
+def _record(msg, *args):
+    return logging.LogRecord("cephci", logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_record_is_redacted_once():
+    log_filter = SensitiveLogFilter()
+    record = _record("Login with %s", "password secret")
+
+    with mock.patch.object(log_filter, "redact", wraps=log_filter.redact) as redact:
+        log_filter.filter(record)
+        calls = redact.call_count
+        log_filter.filter(record)
+        log_filter.filter(record)
+
+    assert record.getMessage() == "Login with password <masked>"
+    assert redact.call_count == calls
+
+
+def test_arguments_are_copied_only_when_masked():
+    log_filter = SensitiveLogFilter()
+    clean = {"name": "ceph", "nodes": ["node1", "node2"]}
+    sensitive = {"name": "ceph", "nodes": [{"token": "abc"}]}
+
+    record = _record("%s %s", clean, sensitive)
+    log_filter.filter(record)
+
+    assert record.args[0] is clean
+    assert record.args[1]["nodes"][0]["token"] == "<masked>"
+    assert sensitive["nodes"][0]["token"] == "abc"
+
+
+def test_benchmark_records_per_second():
+    """Filter records of the verbose command logging, 1 in 10 being sensitive."""
+    log_filter = SensitiveLogFilter()
+    records = [
+        (
+            _record("Running %s with password pass%d", "ceph auth ls", i)
+            if i % 10 == 0
+            else _record("Execute %s on %s: %s", "ceph osd tree", f"10.0.0.{i}", clean)
+        )
+        for i, clean in enumerate([{"status": "ok", "nodes": [1, 2]}] * 20000)
+    ]
+
+    start = perf_counter()
+    for record in records:
+        # The rotating file, .err and console handlers share the filter
+        for _ in range(3):
+            log_filter.filter(record)
+    rate = len(records) / (perf_counter() - start)
+
+    # The deepcopy based filter processed about 12k records per second
+    assert rate > 25000, f"{rate:.0f} records per second"
+
+
+@pytest.fixture
+def queue_logger(tmp_path, monkeypatch):
+    """Returns a logger writing its records from a background thread."""
+    monkeypatch.setattr(log_module, "_QUEUE_MODE", dict(log_module._QUEUE_MODE))
+    log = Log()
+    log.enable_queue_logging(max_size=10)
+    yield log, tmp_path
+    log.close_and_remove_filehandlers()
+
+
+def test_queue_logging(queue_logger):
+    log, run_dir = queue_logger
+    log.configure_logger("queued", str(run_dir), True)
+    handler = log.logger.handlers[-1]
+    assert handler.listening
+
+    for i in range(100):
+        log.info(f"record {i} with token abc")
+    log.error("failed")
+    log.flush()
+
+    content = (run_dir / "queued.log").read_text()
+    assert "record 99 with token <masked>" in content
+    assert "failed" in (run_dir / "queued.err").read_text()
+
+    # The next test drains the queue and stops the listener of the previous one
+    log.configure_logger("next", str(run_dir), True)
+    assert not handler.listening
+    assert handler not in log.logger.handlers
+
+
+def _child(log_queue, log_file):
+    QueueBridge.attach(log_queue, log_file)
+    logging.getLogger("cephci").info("child record with password xyz")
+    logging.getLogger("cephci").error("child error")
+
+
+def test_queue_bridge(tmp_path):
+    log_file = str(tmp_path / "parallel-test.log")
+    with Manager() as manager:
+        with QueueBridge(manager.Queue(QUEUE_SIZE), console=False) as bridge:
+            process = Process(target=_child, args=(bridge.queue, log_file))
+            process.start()
+            process.join()
+
+    assert "child record with password <masked>" in open(log_file).read()
+    assert "child error" in (tmp_path / "parallel-test.err").read_text()
@@ -0,0 +1,86 @@
+# -*- code: utf-8 -*-
+"""Unit testing of the single pass log scanner."""
+
+import pytest
+
+from utility.log_scanner import scan_daemon_logs, scan_logs
+
+
+@pytest.fixture
+def journal(tmp_path):
+    lines = [f"ganesha.nfsd-1[main] line {i} :EVENT :heartbeat" for i in range(1000)]
+    lines[10] = "nfs_start_grace :STATE :EVENT :NFS Server recovery event 4 nodeid 1"
+    lines[500] = "keyset callback: runt/missing key for kmip_key_id"
+    lines[998] = "kmip can't connect to 10.0.0.1:5696"
+    lines.append("-- cursor: s=abc;i=3e8")
+    path = tmp_path / "journal"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_scan_logs_single_pass(journal, local_node):
+    node = local_node
+    patterns = [
+        "NFS Server recovery event 4",
+        "kmip can't connect to",
+        "runt/missing key",
+        "not logged",
+    ]
+
+    result = scan_logs(node, f"cat {journal}", patterns, context=2)
+
+    assert len(node.commands) == 1
+    assert result.lines == 1000
+    assert result.cursor == "s=abc;i=3e8"
+    assert result.missing == ["not logged"]
+    [hit] = result.hits["runt/missing key"]
+    assert hit.line_number == 501
+    assert hit.before == [
+        "ganesha.nfsd-1[main] line 498 :EVENT :heartbeat",
+        "ganesha.nfsd-1[main] line 499 :EVENT :heartbeat",
+    ]
+    assert len(hit.after) == 2
+    # The context is truncated at the end of the log
+    assert result.hits["kmip can't connect to"][0].after == [
+        "ganesha.nfsd-1[main] line 999 :EVENT :heartbeat"
+    ]
+
+
+def test_scan_logs_counts_beyond_max_hits(journal, local_node):
+    result = scan_logs(
+        local_node, f"cat {journal}", [r"line \d+0 :"], regex=True, max_hits=5
+    )
+
+    assert result.counts[r"line \d+0 :"] == 97
+    assert len(result.hits[r"line \d+0 :"]) == 5
+
+
+def test_scan_logs_fails_with_the_log_command(local_node):
+    with pytest.raises(RuntimeError):
+        scan_logs(local_node, "cat /nonexistent/journal", ["Error"])
+
+
+def serve_journal(journal):
+    """Rewrite hook serving the journal file instead of running cephadm logs."""
+
+    def rewrite(cmd):
+        log_cmd = cmd.split("; ", 1)[1].split(" | ")[0]
+        return cmd.replace(log_cmd, f"cat {journal}")
+
+    return rewrite
+
+
+def test_scan_daemon_logs_from_cursor(journal, local_node):
+    node = local_node
+    node.rewrite = serve_journal(journal)
+    daemon = "nfs.cephfs-nfs.0.0.host.abc"
+
+    result = scan_daemon_logs(node, daemon, ["kmip"], cursor="s=a;i=1")
+    scan_daemon_logs(node, daemon, ["kmip"], since="2024-03-17 06:16:24")
+
+    assert result.found == ["kmip"]
+    assert (
+        f"cephadm logs --name {daemon} -- --show-cursor --after-cursor='s=a;i=1' |"
+        in node.commands[0]
+    )
+    assert "--show-cursor --since='2024-03-17 06:16:24' |" in node.commands[1]
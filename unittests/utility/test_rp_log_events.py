@@ -0,0 +1,38 @@
+# -*- code: utf-8 -*-
+"""Unit testing module for the parser of the .err files uploaded to ReportPortal."""
+
+import time
+
+from utility.rp_utils.log_events import event_time_ms, generate_log_events
+
+ERR_LOG = """2024-03-17 06:16:24,123 - cephci - run:1 - ERROR - Test failed
+Traceback (most recent call last):
+  File "run.py", line 1, in <module>
+CommandFailed: ceph -s
+2024-03-17 06:16:25,004 - cephci - ceph:2 - ERROR - Second error
+2024-03-17 06:16:26,000 - cephci - ceph:3 - ERROR - Last error
+"""
+
+
+def test_every_event_is_yielded_once():
+    events = list(generate_log_events(ERR_LOG.splitlines(keepends=True)))
+
+    assert [e["date"] for e in events] == [
+        "2024-03-17 06:16:24,123",
+        "2024-03-17 06:16:25,004",
+        "2024-03-17 06:16:26,000",
+    ]
+    assert events[0]["type"] == " cephci "
+    assert events[0]["text"].startswith(" ERROR - Test failed\nTraceback")
+    assert events[0]["text"].endswith("CommandFailed: ceph -s\n")
+    assert events[2]["text"] == " ERROR - Last error\n"
+
+
+def test_lines_before_first_event_are_skipped():
+    lines = ["no timestamp\n"] + ERR_LOG.splitlines(keepends=True)[4:]
+    assert len(list(generate_log_events(lines))) == 2
+
+
+def test_event_time_ms():
+    expected = time.mktime(time.strptime("2024-03-17 06:16:24", "%Y-%m-%d %H:%M:%S"))
+    assert event_time_ms("2024-03-17 06:16:24,123") == int(expected) * 1000 + 123
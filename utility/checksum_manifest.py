@@ -0,0 +1,147 @@
+"""Checksum manifests of the files of a directory tree.
+
+The manifest is computed on the client in a single remote invocation. The files are
+hashed concurrently, using as many workers as there are cores on the client, and the
+result is returned as one compact JSON document mapping the relative path of every
+file to its size, modification time and hash.
+
+Two manifests are compared locally, hence a before/after comparison across failovers,
+remounts or snapshot rollbacks costs one round trip per manifest irrespective of the
+number of files.
+
+Example::
+
+    before = get_checksum_manifest(client, "/mnt/cephfs/dir")
+    # failover, snapshot rollback ...
+    after = get_checksum_manifest(client, "/mnt/cephfs/dir")
+    changes = diff_manifests(before, after)
+    if any(changes.values()):
+        raise AssertionError(f"Data integrity check failed: {changes}")
+"""
+
+import json
+import shlex
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from utility.log import Log
+
+log = Log(__name__)
+
+ManifestEntry = namedtuple("ManifestEntry", ["size", "mtime", "hash"])
+
+# Executed with python3 on the client, arguments are directory, maxdepth, algorithm
+# and the number of workers. Python 3.6 compatible.
+MANIFEST_SCRIPT = r"""
+import hashlib, json, os, sys
+from concurrent.futures import ThreadPoolExecutor
+
+root, maxdepth, algorithm, workers = sys.argv[1], int(sys.argv[2]), sys.argv[3], int(sys.argv[4])
+
+def files():
+    base = root.rstrip("/").count("/")
+    for dirpath, dirnames, filenames in os.walk(root):
+        depth = dirpath.rstrip("/").count("/") - base + 1
+        if maxdepth and depth >= maxdepth:
+            dirnames[:] = []
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if os.path.isfile(path) and not os.path.islink(path):
+                yield path
+
+def checksum(path):
+    digest = hashlib.new(algorithm)
+    try:
+        stat = os.stat(path)
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+    except (IOError, OSError) as e:
+        return os.path.relpath(path, root), None, str(e)
+    return os.path.relpath(path, root), [stat.st_size, int(stat.st_mtime), digest.hexdigest()], None
+
+manifest, errors = {}, {}
+with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+    for path, entry, error in executor.map(checksum, files()):
+        if entry is None:
+            errors[path] = error
+        else:
+            manifest[path] = entry
+
+json.dump({"files": manifest, "errors": errors}, sys.stdout, separators=(",", ":"))
+"""
+
+
+def get_checksum_manifest(
+    client,
+    directory: str,
+    maxdepth: Optional[int] = None,
+    algorithm: str = "md5",
+    workers: Optional[int] = None,
+    timeout: int = 3600,
+) -> Dict[str, ManifestEntry]:
+    """
+    Return the manifest of the files under the directory of the client.
+
+    Args:
+        client: Client node having the file system mounted
+        directory: Absolute path of the directory
+        maxdepth: Levels of directories to descend, 1 for the files of the directory
+                  only and None for the whole tree
+        algorithm: Hash algorithm supported by hashlib
+        workers: Number of files hashed concurrently, defaults to the number of cores
+        timeout: Seconds allowed for the remote invocation
+
+    Returns:
+        Dict mapping the path relative to the directory to its ManifestEntry
+
+    Raises:
+        CommandFailed: when the manifest could not be computed
+    """
+    cmd = " ".join(
+        [
+            "python3 -c",
+            shlex.quote(MANIFEST_SCRIPT),
+            shlex.quote(directory),
+            str(maxdepth or 0),
+            shlex.quote(algorithm),
+            str(workers or 0),
+        ]
+    )
+    out, _ = client.exec_command(sudo=True, cmd=cmd, timeout=timeout)
+    result = json.loads(out)
+    for path, error in result["errors"].items():
+        log.warning(f"Unable to checksum {directory}/{path}: {error}")
+
+    manifest = {path: ManifestEntry(*entry) for path, entry in result["files"].items()}
+    log.info(f"Computed checksum manifest of {len(manifest)} files under {directory}")
+    return manifest
+
+
+def diff_manifests(
+    before: Dict[str, ManifestEntry],
+    after: Dict[str, ManifestEntry],
+    fields: Tuple[str, ...] = ("size", "hash"),
+) -> Dict[str, List[str]]:
+    """
+    Return the differences between two manifests.
+
+    Args:
+        before: The reference manifest
+        after: The manifest to be compared
+        fields: Fields of the entries that are compared, the modification time is
+                ignored by default as rollbacks and copies change it
+
+    Returns:
+        Dict with the sorted paths which are added, removed and modified
+    """
+    modified = [
+        path
+        for path in before.keys() & after.keys()
+        if any(getattr(before[path], f) != getattr(after[path], f) for f in fields)
+    ]
+    return {
+        "added": sorted(after.keys() - before.keys()),
+        "removed": sorted(before.keys() - after.keys()),
+        "modified": sorted(modified),
+    }
@@ -0,0 +1,417 @@
+"""Run wide cache of read-only ceph command results.
+
+Test modules query the cluster state (``ceph osd tree``, ``ceph df``, ``ceph orch ls``
+etc.) over and over, often within seconds of each other. When enabled, the output
+of the read-only queries listed in CACHEABLE_COMMANDS is retained for a short time
+and served without a round trip to the cluster.
+
+The entries are keyed by cluster and command. Any ceph command executed on a node
+of a cluster which is not known to be read-only invalidates every entry of that
+cluster, so a query issued after a change always reflects it. Stopping, restarting
+or removing the ceph daemons using systemctl or cephadm and rebooting a node
+invalidate the entries as well. Changes which are not made by a command on the
+cluster nodes, e.g. a crashed daemon or a node powered off using the cloud API,
+are reflected once the entries expire. Only the results of the commands which
+succeeded are retained.
+
+The cache is disabled by default and is enabled for a run using::
+
+    python run.py ... --custom-config command-cache-ttl=10
+
+Example::
+
+    cache = get_command_cache()
+    out, err = cache.lookup(node, "ceph osd tree -f json", fetch)
+"""
+
+import threading
+from time import monotonic
+
+from utility.log import Log
+
+LOG = Log(__name__)
+
+DEFAULT_TTL = 10
+
+# Binaries acting on the cluster state
+CEPH_TOOLS = ("ceph", "rados", "rbd", "radosgw-admin")
+
+# Command prefixes whose output is retained
+CACHEABLE_COMMANDS = (
+    ("ceph", "df"),
+    ("ceph", "fsid"),
+    ("ceph", "versions"),
+    ("ceph", "osd", "tree"),
+    ("ceph", "osd", "dump"),
+    ("ceph", "osd", "ls"),
+    ("ceph", "osd", "pool", "ls"),
+    ("ceph", "osd", "crush", "rule", "ls"),
+    ("ceph", "orch", "ls"),
+    ("ceph", "orch", "ps"),
+    ("ceph", "orch", "host", "ls"),
+    ("ceph", "mon", "dump"),
+    ("ceph", "fs", "ls"),
+)
+
+# Verbs of commands that only read the cluster state
+READ_VERBS = {
+    "-s",
+    "df",
+    "dump",
+    "find",
+    "fsid",
+    "get",
+    "health",
+    "info",
+    "list",
+    "ls",
+    "lspools",
+    "metadata",
+    "ps",
+    "query",
+    "quorum_status",
+    "report",
+    "show",
+    "stat",
+    "status",
+    "tree",
+    "version",
+    "versions",
+}
+
+# Verbs of commands that modify the cluster state
+WRITE_VERBS = {
+    "add",
+    "apply",
+    "create",
+    "daemon",
+    "delete",
+    "deep-scrub",
+    "destroy",
+    "disable",
+    "down",
+    "enable",
+    "fail",
+    "import",
+    "in",
+    "mv",
+    "out",
+    "purge",
+    "put",
+    "reconfig",
+    "redeploy",
+    "remove",
+    "rename",
+    "repair",
+    "restart",
+    "reweight",
+    "rm",
+    "scrub",
+    "set",
+    "start",
+    "stop",
+    "tell",
+    "unset",
+    "write",
+}
+
+# Options followed by a value which is not a verb
+OPTIONS_WITH_VALUE = {
+    "-c",
+    "-f",
+    "-n",
+    "-p",
+    "--cluster",
+    "--conf",
+    "--format",
+    "--id",
+    "--name",
+    "--pool",
+}
+
+SHELL_OPERATORS = {"|", "||", "&&", ";", ">", ">>", "<", "&"}
+
+# Commands rebooting or powering off the node
+REBOOT_COMMANDS = {"reboot", "shutdown", "poweroff", "halt"}
+
+# systemctl verbs changing the state of the ceph units
+SYSTEMCTL_VERBS = {"start", "stop", "restart", "kill"}
+
+# cephadm verbs deploying, removing or acting on the daemons
+CEPHADM_VERBS = {"adopt", "deploy", "rm-cluster", "rm-daemon", "unit"}
+
+
+def parse_command(cmd):
+    """
+    Return the ceph tool invocation of the command and its positional arguments.
+
+    Wrappers like ``sudo`` or ``cephadm shell --`` preceding the ceph tool are
+    skipped. The positional arguments end at the first shell operator.
+
+    Args:
+        cmd (Str): The command line.
+
+    Returns:
+        Tuple of the command starting at the ceph tool, the positional arguments
+        and a flag indicating the presence of shell operators. The command is
+        None when no ceph tool is invoked.
+    """
+    tokens = cmd.split()
+    for index, token in enumerate(tokens):
+        if token in CEPH_TOOLS:
+            break
+    else:
+        return None, (), False
+
+    tokens = tokens[index:]
+    positional = [tokens[0]]
+    skip, piped = False, False
+    for token in tokens[1:]:
+        if token in SHELL_OPERATORS:
+            piped = True
+            break
+
+        if skip:
+            skip = False
+        elif token in OPTIONS_WITH_VALUE:
+            skip = True
+        elif token == "-s" or not token.startswith("-"):
+            positional.append(token)
+
+    return " ".join(tokens), tuple(positional), piped
+
+
+def is_read_only(positional):
+    """
+    Return True if the ceph command does not modify the cluster state.
+
+    The first verb found in the arguments decides, commands without a known verb
+    are considered to modify the cluster.
+
+    Args:
+        positional (Tuple): The positional arguments returned by parse_command.
+    """
+    for token in positional[1:]:
+        if token in READ_VERBS:
+            return True
+
+        if token in WRITE_VERBS:
+            return False
+
+    return False
+
+
+def changes_daemons(cmd):
+    """
+    Return True if the command changes the ceph daemons without the ceph tools.
+
+    Covers the ceph units stopped or restarted using systemctl, the daemons
+    removed or deployed using cephadm and the node being rebooted.
+
+    Args:
+        cmd (Str): The command line.
+    """
+    tokens = cmd.split()
+    for index, token in enumerate(tokens):
+        name = token.rsplit("/", 1)[-1]
+        args = tokens[index + 1 :]
+        if name in REBOOT_COMMANDS:
+            return True
+
+        if name == "systemctl":
+            if args and args[0] in REBOOT_COMMANDS:
+                return True
+
+            if SYSTEMCTL_VERBS.intersection(args) and any(
+                arg.startswith("ceph") for arg in args
+            ):
+                return True
+
+        if name == "cephadm" and CEPHADM_VERBS.intersection(args):
+            return True
+
+    return False
+
+
+def is_cacheable(positional):
+    """Return True if the output of the ceph command can be retained."""
+    return any(positional[: len(_cmd)] == _cmd for _cmd in CACHEABLE_COMMANDS)
+
+
+class CommandCache:
+    """Time bound cache of read-only ceph command results."""
+
+    def __init__(self, ttl=DEFAULT_TTL, enabled=False):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (Float): Seconds for which a result is served from the cache.
+            enabled (Bool): Serve the results from the cache.
+        """
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries = dict()
+        self._clusters = dict()
+        self._generations = dict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "invalidations": 0}
+
+    @property
+    def stats(self):
+        """Return the number of hits, misses, expired entries and invalidations."""
+        with self._lock:
+            return dict(self._stats)
+
+    def enable(self, ttl=None):
+        """Enable the cache, optionally updating the time to live of the entries."""
+        if ttl is not None:
+            self.ttl = float(ttl)
+        self.enabled = True
+        LOG.info("Caching read-only ceph commands for %s seconds", self.ttl)
+
+    def disable(self):
+        """Disable the cache and drop all entries."""
+        self.enabled = False
+        self.clear()
+
+    def clear(self):
+        """Drop all the entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def register_cluster(self, cluster):
+        """
+        Map the nodes of the cluster to its name.
+
+        Commands executed on any node of the cluster share the entries and a
+        mutating command on any of them invalidates the entries of the cluster.
+
+        Args:
+            cluster (Ceph): The ceph cluster object.
+        """
+        with self._lock:
+            for node in cluster.get_nodes():
+                self._clusters[node.ip_address] = cluster.name
+
+    def cluster_of(self, node):
+        """Return the key of the cluster the node belongs to."""
+        node = getattr(node, "node", node)
+        ip_address = getattr(node, "ip_address", None)
+        return self._clusters.get(ip_address, ip_address)
+
+    def invalidate(self, cluster):
+        """Drop the entries of the given cluster."""
+        with self._lock:
+            self._generations[cluster] = self._generations.get(cluster, 0) + 1
+            keys = [_key for _key in self._entries if _key[0] == cluster]
+            for key in keys:
+                del self._entries[key]
+
+            if keys:
+                self._stats["invalidations"] += 1
+
+    def observe(self, node, cmd):
+        """
+        Invalidate the cluster entries if the command modifies the cluster.
+
+        Invoked once the command has completed, so that results fetched while the
+        command was in progress are not retained.
+
+        Args:
+            node (CephNode): The node on which the command is executed.
+            cmd (Str): The command line.
+        """
+        if not self.enabled:
+            return
+
+        if self._mutates(cmd):
+            LOG.debug("Invalidating cached ceph commands due to %s", cmd)
+            self.invalidate(self.cluster_of(node))
+
+    @staticmethod
+    def _mutates(cmd):
+        """Return True if the command modifies the cluster or its daemons."""
+        command, positional, _ = parse_command(cmd)
+        if command and not is_read_only(positional):
+            return True
+
+        return changes_daemons(cmd)
+
+    def lookup(self, node, cmd, fetch, succeeded=None):
+        """
+        Return the result of the command from the cache or by executing it.
+
+        The result of fetch is cached only when it returns without an exception
+        and succeeded, when given, returns True. Any command which is not read-only
+        invalidates the entries of the cluster.
+
+        Args:
+            node (CephNode): The node on which the command is executed.
+            cmd (Str): The command line.
+            fetch (Callable): Executes the command and returns its result.
+            succeeded (Callable): Returns False when the command executed by fetch
+                                  failed, e.g. on a non-zero exit code.
+        """
+        if not self.enabled:
+            return fetch()
+
+        cluster = self.cluster_of(node)
+        if self._mutates(cmd):
+            try:
+                return fetch()
+            finally:
+                self.invalidate(cluster)
+
+        command, positional, piped = parse_command(cmd)
+        if not command or piped or not is_cacheable(positional):
+            return fetch()
+
+        key = (cluster, command)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > monotonic():
+                self._stats["hits"] += 1
+                LOG.debug("Serving %s from the command cache", command)
+                return entry[1]
+
+            if entry:
+                self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            generation = self._generations.get(cluster, 0)
+
+        result = fetch()
+        if succeeded and not succeeded():
+            return result
+
+        with self._lock:
+            # Not retained when the cluster was modified while fetching
+            if generation == self._generations.get(cluster, 0):
+                self._entries[key] = (monotonic() + self.ttl, result)
+
+        return result
+
+    def log_stats(self):
+        """Write the cache statistics to the run log."""
+        if not self.enabled:
+            return
+
+        stats = self.stats
+        total = stats["hits"] + stats["misses"]
+        LOG.info(
+            "Command cache: %d hits, %d misses (%d expired), %d invalidations, "
+            "hit ratio %.1f%%",
+            stats["hits"],
+            stats["misses"],
+            stats["expired"],
+            stats["invalidations"],
+            100.0 * stats["hits"] / total if total else 0.0,
+        )
+
+
+_CACHE = CommandCache()
+
+
+def get_command_cache():
+    """Return the run wide command cache."""
+    return _CACHE
@@ -1,8 +1,10 @@
 import logging
 import logging.handlers
 import os
+import queue
 import re
-from copy import deepcopy
+import threading
+from functools import lru_cache
 from typing import Dict
 
 from .config import TestMetaData
@@ -14,6 +16,13 @@ LOG_FORMAT = (
 magna_server = "http://magna002.ceph.redhat.com"
 magna_url = f"{magna_server}/cephci-jenkins/"
 
+# Maximum number of records waiting to be written in queue mode, the loggers
+# block once it is reached.
+QUEUE_SIZE = 10000
+
+_QUEUE_MODE = {"enabled": False, "max_size": QUEUE_SIZE}
+_QUEUE_MODE_LOCK = threading.Lock()
+
 
 class LoggerInitializationException(Exception):
     """Exception raised for logger initialization errors."""
@@ -101,6 +110,19 @@ class Log(logging.Logger):
         self._log_errors.append(message)
         self.error(message)
 
+    @staticmethod
+    def enable_queue_logging(max_size: int = QUEUE_SIZE) -> None:
+        """Write the records of the subsequently configured tests from a background thread.
+
+        The logger only puts the records in a bounded queue, the file handlers are
+        driven by a QueueListener. The queue is drained when the test log is closed.
+
+        Args:
+            max_size: Maximum number of records waiting to be written.
+        """
+        with _QUEUE_MODE_LOCK:
+            _QUEUE_MODE.update(enabled=True, max_size=max_size)
+
     def configure_logger(self, test_name, run_dir, disable_console_log, **kwargs):
         """Configures a new FileHandler for the root logger.
 
@@ -117,7 +139,10 @@ class Log(logging.Logger):
             return None
 
         self.close_and_remove_filehandlers()
-        pass_filter = SensitiveLogFilter(name="cephci_filter")
+        # Records of the logger are redacted once, before reaching the handlers.
+        # The handlers keep the filter for records propagated by child loggers.
+        pass_filter = SENSITIVE_LOG_FILTER
+        self._logger.addFilter(pass_filter)
 
         log_format = logging.Formatter(self.log_format)
         full_log_name = f"{test_name}.log"
@@ -135,7 +160,6 @@ class Log(logging.Logger):
         )
         _handler.setFormatter(log_format)
         _handler.addFilter(pass_filter)
-        self._logger.addHandler(_handler)
 
         # error file handler
         err_logfile = os.path.join(run_dir, f"{test_name}.err")
@@ -143,14 +167,30 @@ class Log(logging.Logger):
         _err_handler.setFormatter(log_format)
         _err_handler.setLevel(logging.ERROR)
         _err_handler.addFilter(pass_filter)
-        self._logger.addHandler(_err_handler)
+        handlers = [_handler, _err_handler]
 
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(log_format)
         console_handler.addFilter(pass_filter)
-        if not any(isinstance(h, logging.StreamHandler) for h in self._logger.handlers):
-            self._logger.addHandler(console_handler)
+        if not any(
+            isinstance(h, logging.StreamHandler)
+            for h in self._logger.handlers + handlers
+        ):
+            handlers.append(console_handler)
+
+        with _QUEUE_MODE_LOCK:
+            queue_mode = dict(_QUEUE_MODE)
+
+        if queue_mode["enabled"]:
+            log_queue = queue.Queue(maxsize=queue_mode["max_size"])
+            listener = BlockingQueueListener(
+                log_queue, *handlers, respect_handler_level=True
+            )
+            self._logger.addHandler(BlockingQueueHandler(log_queue, listener))
+        else:
+            for handler in handlers:
+                self._logger.addHandler(handler)
 
         url_base = (
             magna_url + run_dir.split("/")[-1]
@@ -162,63 +202,249 @@ class Log(logging.Logger):
 
         return log_url
 
+    def flush(self) -> None:
+        """Wait for the queued records of the current test to be written."""
+        for handler in self._logger.handlers[:]:
+            handler.flush()
+
     def close_and_remove_filehandlers(self):
         """Close FileHandlers and then remove them from the logger's handlers list."""
         handlers = self._logger.handlers[:]
         for handler in handlers:
-            if isinstance(handler, logging.FileHandler):
+            if isinstance(handler, (logging.FileHandler, BlockingQueueHandler)):
                 handler.close()
                 self._logger.removeHandler(handler)
 
 
+class BlockingQueueListener(logging.handlers.QueueListener):
+    """Queue listener whose stop request waits for free space in a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class BlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler which waits for free space instead of dropping records.
+
+    The handler owns the listener writing the records, it starts the listener and
+    closing the handler drains the queue and closes the target handlers.
+    """
+
+    def __init__(self, log_queue, listener=None):
+        super().__init__(log_queue)
+        self.listener = listener
+        self.listening = False
+        if listener:
+            listener.start()
+            self.listening = True
+
+    def enqueue(self, record):
+        self.queue.put(record)
+
+    def flush(self):
+        if self.listening:
+            self.queue.join()
+            for handler in self.listener.handlers:
+                handler.flush()
+
+    def close(self):
+        if self.listening:
+            self.listening = False
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+        super().close()
+
+
+class RoutingFileHandler(logging.Handler):
+    """Writes the records to the log file named by their log_file attribute.
+
+    Records at ERROR level and above are written to the .err file as well, similar
+    to the handlers created by Log.configure_logger.
+    """
+
+    def __init__(self, log_format: str = LOG_FORMAT):
+        super().__init__()
+        self.formatter = logging.Formatter(log_format)
+        self._handlers = dict()
+
+    def _get_handlers(self, log_file):
+        if log_file not in self._handlers:
+            _handler = logging.FileHandler(log_file)
+            _err_handler = logging.FileHandler(f"{os.path.splitext(log_file)[0]}.err")
+            _err_handler.setLevel(logging.ERROR)
+            for handler in (_handler, _err_handler):
+                handler.setFormatter(self.formatter)
+            self._handlers[log_file] = (_handler, _err_handler)
+
+        return self._handlers[log_file]
+
+    def emit(self, record):
+        log_file = getattr(record, "log_file", None)
+        if not log_file:
+            return
+
+        for handler in self._get_handlers(log_file):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def close(self):
+        for handlers in self._handlers.values():
+            for handler in handlers:
+                handler.close()
+        self._handlers.clear()
+        super().close()
+
+
+class QueueBridge:
+    """Writes the records of child processes from a listener in the parent process.
+
+    The child processes put their records in a shared queue tagged with their log
+    file, instead of reconfiguring the handlers of the root logger.
+
+    Example::
+
+        with Manager() as manager:
+            bridge = QueueBridge(manager.Queue(QUEUE_SIZE))
+            with bridge:
+                # in the child process
+                QueueBridge.attach(bridge.queue, "/tmp/run/test.log")
+    """
+
+    def __init__(self, log_queue, console: bool = True):
+        """
+        Initialize the bridge.
+
+        Args:
+            log_queue: Queue shared with the child processes, e.g. Manager().Queue
+            console: Write the records of the child processes to the console too.
+        """
+        self.queue = log_queue
+        handlers = [RoutingFileHandler()]
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(logging.INFO)
+            console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            handlers.append(console_handler)
+
+        self.listener = BlockingQueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+
+    def __enter__(self):
+        self.listener.start()
+        return self
+
+    def __exit__(self, *args):
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+    @staticmethod
+    def attach(log_queue, log_file: str) -> None:
+        """Send the records of the calling process to the bridge.
+
+        The handlers inherited from the parent process are removed from the root
+        and cephci loggers, the records are written to the given log file.
+
+        Args:
+            log_queue: The queue of the bridge.
+            log_file: Absolute path of the log file of the process.
+        """
+        QueueBridge.detach()
+        root, cephci = logging.getLogger(), logging.getLogger("cephci")
+        for handler in cephci.handlers[:]:
+            cephci.removeHandler(handler)
+        cephci.propagate = True
+
+        def _tag(record):
+            record.log_file = log_file
+            return True
+
+        handler = BlockingQueueHandler(log_queue)
+        handler.addFilter(SENSITIVE_LOG_FILTER)
+        handler.addFilter(_tag)
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+
+    @staticmethod
+    def detach() -> None:
+        """Remove the handlers of the root logger of the calling process."""
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+
+
+EXCLUDED_WORDS = (
+    "access-key",
+    "access_key",
+    "keyring",
+    "password",
+    "passwd",
+    "token",
+)
+MASK = "<masked>"
+# Strings up to REDACT_CACHE_MAX_LENGTH are memoized, e.g. the formats and commands
+# logged repeatedly. Larger ones like command outputs are rarely seen twice.
+REDACT_CACHE_SIZE = 4096
+REDACT_CACHE_MAX_LENGTH = 1024
+
+_WORDS = "|".join(map(re.escape, EXCLUDED_WORDS))
+# A string is scanned for the values to be masked only when it contains a keyword
+_TRIGGER_PATTERN = re.compile(_WORDS, re.IGNORECASE)
+_REDACT_PATTERN = re.compile(
+    rf"({_WORDS})\s*[:=]?\s*([\"']?)([^\s\"']+)(\2)(\s|$)", re.IGNORECASE
+)
+_REDACTED_ATTR = "_cephci_redacted"
+
+
+def _redact(data):
+    """Return the string with the values following a keyword masked."""
+    if not _TRIGGER_PATTERN.search(data):
+        return data
+    return _REDACT_PATTERN.sub(rf"\1 {MASK}\5", data)
+
+
+_redact_memoized = lru_cache(maxsize=REDACT_CACHE_SIZE)(_redact)
+
+
+def _redact_str(data):
+    if len(data) > REDACT_CACHE_MAX_LENGTH:
+        return _redact(data)
+    return _redact_memoized(data)
+
+
 class SensitiveLogFilter(logging.Filter):
-    """Filter known sensitive data from being logged."""
+    """Filter known sensitive data from being logged.
 
-    excluded_words = [
-        "access-key",
-        "access_key",
-        "keyring",
-        "password",
-        "passwd",
-        "token",
-    ]
+    The record is redacted once, the filter can be attached to the logger and its
+    handlers without the record being processed again. The containers in the
+    message and its arguments are copied only when a value is masked, hence the
+    objects passed by the caller are never modified.
+    """
+
+    excluded_words = list(EXCLUDED_WORDS)
 
     def redact_list(self, data):
-        """Redact values in the iterator."""
-        for i, v in enumerate(data):
-            if isinstance(v, list):
-                self.redact_list(data[i])
-            elif isinstance(v, dict):
-                self.redact_dict(data[i])
-            elif isinstance(v, tuple):
-                data[i] = self.redact(v)
-            elif isinstance(v, (str, bytearray, bytes)):
-                data[i] = self.redact_str(v)
+        """Return the redacted list, the same object if nothing is masked."""
+        redacted = [self.redact(v) for v in data]
+        if all(_r is _v for _r, _v in zip(redacted, data)):
+            return data
+        return redacted
 
     def redact_dict(self, data):
-        """Redact values based on keys"""
-        for _key in data.keys():
-            if _key in self.excluded_words:
-                data[_key] = "<masked>"
-            elif isinstance(data[_key], dict):
-                self.redact_dict(data[_key])
-            elif isinstance(data[_key], list):
-                self.redact_list(data[_key])
-            elif isinstance(data[_key], tuple):
-                data[_key] = self.redact(data[_key])
-            elif isinstance(data[_key], (str, bytearray, bytes)):
-                data[_key] = self.redact_str(data[_key])
+        """Return the redacted dict based on keys, the same object if nothing is masked."""
+        redacted = dict()
+        for _key, _value in data.items():
+            redacted[_key] = MASK if _key in EXCLUDED_WORDS else self.redact(_value)
+
+        if all(redacted[_key] is _value for _key, _value in data.items()):
+            return data
+        return redacted
 
     def redact_str(self, data):
         """Redact strings containing sensitive keys."""
-        _words = "|".join(self.excluded_words)
-        rtn = re.sub(
-            rf'({_words})\s*[:=]?\s*(["\']?)([^\s"\']+)(\2)(\s|$)',
-            r"\1 <masked>\5",
-            data,
-            flags=re.IGNORECASE,
-        )
-        return rtn
+        return _redact_str(data)
 
     def redact(self, msg):
         """Return the redacted message if sensitive data found.
@@ -227,25 +453,26 @@ class SensitiveLogFilter(logging.Filter):
         the method encounters a dict, the keys of the dict are scanned for
         excluded fields.
         """
-        data = deepcopy(msg)
+        if isinstance(msg, str):
+            return _redact_str(msg)
 
-        if isinstance(data, dict):
-            self.redact_dict(data)
-            return data
+        if isinstance(msg, dict):
+            return self.redact_dict(msg)
 
-        if isinstance(data, list):
-            self.redact_list(data)
-            return data
+        if isinstance(msg, list):
+            return self.redact_list(msg)
 
-        if isinstance(data, tuple):
-            return tuple(self.redact(arg) for arg in data)
+        if isinstance(msg, tuple):
+            redacted = tuple(self.redact(arg) for arg in msg)
+            if all(_r is _m for _r, _m in zip(redacted, msg)):
+                return msg
+            return redacted
 
-        if isinstance(data, (str, bytearray, bytes)):
-            data = data if isinstance(data, str) else str(data, "utf-8")
-            return self.redact_str(data)
+        if isinstance(msg, (bytearray, bytes)):
+            return _redact_str(str(msg, "utf-8"))
 
         # Basic types that require no processing
-        return data
+        return msg
 
     def filter(self, record):
         """Modifies the log record.
@@ -256,11 +483,17 @@ class SensitiveLogFilter(logging.Filter):
         - logging of passwords when registering the server
         - logging of password using as authentication.
         """
+        if getattr(record, _REDACTED_ATTR, False):
+            return True
+
         record.msg = self.redact(record.msg)
         if isinstance(record.args, dict):
-            for k in record.args.keys():
-                record.args[k] = self.redact(record.args[k])
-        else:
-            record.args = tuple(self.redact(arg) for arg in record.args)
+            record.args = self.redact_dict(record.args)
+        elif record.args:
+            record.args = self.redact(tuple(record.args))
 
+        setattr(record, _REDACTED_ATTR, True)
         return True
+
+
+SENSITIVE_LOG_FILTER = SensitiveLogFilter(name="cephci_filter")
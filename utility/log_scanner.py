@@ -0,0 +1,167 @@
+"""Single pass scan of the logs of a daemon for multiple patterns.
+
+The log is streamed once on the node and every line is matched against all the
+patterns in the same pass, the node returns one compact JSON document having the
+hits of every pattern along with the surrounding lines. Only the hits travel back,
+hence the cost does not grow with the number of patterns or the size of the log.
+
+The journal cursor of the last line read is returned with the result, a subsequent
+scan started from it only reads the lines logged in between.
+
+Example::
+
+    result = scan_daemon_logs(node, "nfs.cephfs-nfs.0.0.host.abcdef", ["Error", "TLS"])
+    if result.missing:
+        raise AssertionError(f"Not found in the logs: {result.missing}")
+
+    # trigger the operation under test, then read the new lines only
+    result = scan_daemon_logs(node, daemon, ["Export removed"], cursor=result.cursor)
+"""
+
+import json
+import shlex
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from utility.log import Log
+
+log = Log(__name__)
+
+LogHit = namedtuple("LogHit", ["line_number", "line", "before", "after"])
+
+MAX_HITS = 50
+
+# Executed with python3 on the node reading the log from stdin, the argument is the
+# JSON encoded list of patterns, regex flag, number of context lines and max hits.
+# Python 3.6 compatible.
+SCAN_SCRIPT = r"""
+import json, re, sys
+from collections import deque
+
+patterns, regex, context, max_hits = json.loads(sys.argv[1])
+expressions = [re.compile(p if regex else re.escape(p)) for p in patterns]
+combined = re.compile("|".join("(?:%s)" % e.pattern for e in expressions) or "(?!)")
+hits = {p: [] for p in patterns}
+counts = {p: 0 for p in patterns}
+before, pending = deque(maxlen=context), []
+cursor, number = None, 0
+
+for line in sys.stdin:
+    line = line.rstrip("\n")
+    if line.startswith("-- cursor: "):
+        cursor = line[len("-- cursor: "):]
+        continue
+    number += 1
+    for hit in pending:
+        hit["after"].append(line)
+    pending = [h for h in pending if len(h["after"]) < context]
+    if combined.search(line):
+        for pattern, expression in zip(patterns, expressions):
+            if not expression.search(line):
+                continue
+            counts[pattern] += 1
+            if len(hits[pattern]) < max_hits:
+                hit = {"line_number": number, "line": line, "before": list(before), "after": []}
+                hits[pattern].append(hit)
+                if context:
+                    pending.append(hit)
+    before.append(line)
+
+json.dump({"hits": hits, "counts": counts, "cursor": cursor, "lines": number}, sys.stdout)
+"""
+
+
+class LogScanResult:
+    """Hits of the patterns in the scanned log."""
+
+    def __init__(self, patterns: List[str], data: Dict) -> None:
+        self.patterns = patterns
+        self.hits = {
+            p: [LogHit(**h) for h in data["hits"].get(p, [])] for p in patterns
+        }
+        self.counts = data["counts"]
+        self.cursor = data.get("cursor")
+        self.lines = data["lines"]
+
+    @property
+    def found(self) -> List[str]:
+        """Patterns having at least one hit."""
+        return [p for p in self.patterns if self.counts.get(p)]
+
+    @property
+    def missing(self) -> List[str]:
+        """Patterns without any hit."""
+        return [p for p in self.patterns if not self.counts.get(p)]
+
+
+def scan_logs(
+    node,
+    log_cmd: str,
+    patterns: List[str],
+    context: int = 0,
+    regex: bool = False,
+    max_hits: int = MAX_HITS,
+    timeout: int = 600,
+) -> LogScanResult:
+    """
+    Scan the output of the log command for all the patterns in a single pass.
+
+    Args:
+        node: Node having the logs, supporting exec_command
+        log_cmd: Shell command writing the log to stdout
+        patterns: Literal strings, or regular expressions when regex is set
+        context: Number of lines returned before and after every hit
+        regex: Treat the patterns as python regular expressions
+        max_hits: Maximum hits returned per pattern, all the hits are counted
+        timeout: Seconds allowed for the remote invocation
+
+    Returns:
+        LogScanResult having the hits per pattern
+
+    Raises:
+        CommandFailed: when the log could not be scanned
+    """
+    args = json.dumps([list(patterns), regex, context, max_hits])
+    cmd = (
+        f"set -o pipefail; {log_cmd} | "
+        f"python3 -c {shlex.quote(SCAN_SCRIPT)} {shlex.quote(args)}"
+    )
+    out, _ = node.exec_command(sudo=True, cmd=cmd, timeout=timeout)
+    result = LogScanResult(list(patterns), json.loads(out))
+    log.info(
+        f"Scanned {result.lines} log lines on {node.hostname}, found "
+        f"{result.found} and missing {result.missing}"
+    )
+    return result
+
+
+def scan_daemon_logs(
+    node,
+    daemon_name: str,
+    patterns: List[str],
+    since: Optional[str] = None,
+    cursor: Optional[str] = None,
+    **kwargs,
+) -> LogScanResult:
+    """
+    Scan the journal of the cephadm managed daemon for all the patterns.
+
+    Args:
+        node: Node hosting the daemon
+        daemon_name: Name of the daemon as listed by ceph orch ps
+        patterns: Literal strings, or regular expressions when regex is set
+        since: Read the entries on or newer than the date, e.g. "2024-03-17 06:16:24"
+        cursor: Read the entries after the cursor of a previous scan
+        kwargs: Refer scan_logs
+
+    Returns:
+        LogScanResult, the cursor attribute marks the last entry read
+    """
+    journal_args = ["--show-cursor"]
+    if cursor:
+        journal_args.append(f"--after-cursor={shlex.quote(cursor)}")
+    elif since:
+        journal_args.append(f"--since={shlex.quote(since)}")
+
+    log_cmd = f"cephadm logs --name {daemon_name} -- {' '.join(journal_args)}"
+    return scan_logs(node, log_cmd, patterns, **kwargs)
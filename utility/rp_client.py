@@ -77,17 +77,16 @@ Sample Output File:
 
 """
 
-import datetime
 import json
 import logging
 import os
-import re
 import sys
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 
 import xmltodict
 from docopt import docopt
+from rp_utils.log_events import event_time_ms, generate_log_events
 from rp_utils.preproc import PreProcClient
 from rp_utils.reportportalV1 import Launch, Launches, ReportPortalV1, RpLog
 from rp_utils.xunit_xml import TestCase, TestSuite, XunitXML
@@ -96,6 +95,8 @@ from utils import create_run_dir, generate_unique_id, tfacon
 from utility.retry import retry
 
 log = logging.getLogger(__name__)
+# Number of xUnit files processed concurrently
+MAX_WORKERS = 8
 doc = """
 Standard script to push all the logs from Xunit files and get launcher details from Report Portal
 
@@ -238,7 +239,7 @@ def upload_logs(config_file, payload_dir):
         )
         return 1
     return_obj = {}
-    with ThreadPoolExecutor() as executor:
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         log.info("Processing xunit files concurrently")
         log.info(dir(rportal.service))
         launch = Launch(rportal)
@@ -340,48 +341,16 @@ def process_testcase(xunit_xml, testcase, tsuite):
         with open(
             f"{fqpath}/{tsuite.xml_name}/{tcase.tc_name.replace(' ', '_')}_0.err", "r"
         ) as file:
-            log_entries = list(generate_log_events(file))
-            for i in log_entries:
-                timestamp = int(
-                    datetime.datetime.strptime(
-                        i["date"], "%Y-%m-%d %H:%M:%S,%f"
-                    ).strftime("%s")
-                )
-                tcase.rplog.add_message(
-                    message=i["text"],
-                    level="ERROR",
-                    test_item_id=tcase.test_item_id,
-                    msg_time=str(int(timestamp * 1000)),
-                )
-    tcase.finish()
-
-
-def generate_log_events(file_handler):
-    log_events = {}
-    for line in file_handler:
-        try:
-            if line.startswith(match_start_line(line)):
-                if log_events:
-                    yield log_events
-                log_events = {
-                    "date": line.split("__")[0][:23],
-                    "type": line.split("-", 5)[3],
-                    "text": line.split("-", 5)[-1],
+            messages = [
+                {
+                    "message": event["text"],
+                    "level": "ERROR",
+                    "msg_time": str(event_time_ms(event["date"])),
                 }
-            else:
-                log_events["text"] += line
-        except Exception:
-            log.error(f"Unable to parse the below Line : {line}")
-        yield log_events
-
-
-def match_start_line(line):
-    matched = re.match(r"\d\d\d\d-\d\d-\d\d\ \d\d:\d\d:\d\d,\d\d\d", line)
-    if matched:
-        matchThis = matched.group()
-    else:
-        matchThis = "NONE"
-    return matchThis
+                for event in generate_log_events(file)
+            ]
+            tcase.rplog.add_messages(messages, test_item_id=tcase.test_item_id)
+    tcase.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+"""Streaming parser of the cephci .err log files.
+
+A log event starts at a line beginning with the timestamp of the cephci log format
+and spans the following lines until the next timestamp, e.g. a traceback. The file
+is read once and every event is yielded once, when the next one starts.
+"""
+
+import logging
+import re
+import time
+from functools import lru_cache
+
+log = logging.getLogger(__name__)
+
+LOG_LINE_PATTERN = re.compile(r"\d\d\d\d-\d\d-\d\d\ \d\d:\d\d:\d\d,\d\d\d")
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def generate_log_events(file_handler):
+    """
+    Yield the events of the log file.
+
+    Args:
+        file_handler: Iterable of the lines of the log file.
+
+    Yields:
+        Dict with the date, type and text of the event.
+    """
+    event, text = None, []
+    for line in file_handler:
+        if LOG_LINE_PATTERN.match(line):
+            if event:
+                event["text"] = "".join(text)
+                yield event
+
+            fields = line.split("-", 5)
+            event = {
+                "date": line.split("__")[0][:23],
+                "type": fields[3] if len(fields) > 3 else "",
+            }
+            text = [fields[-1]]
+        elif event:
+            text.append(line)
+        else:
+            log.error(f"Unable to parse the below Line : {line}")
+
+    if event:
+        event["text"] = "".join(text)
+        yield event
+
+
+@lru_cache(maxsize=1024)
+def _epoch_seconds(date):
+    return int(time.mktime(time.strptime(date, DATE_FORMAT)))
+
+
+def event_time_ms(date):
+    """
+    Return the epoch time in milliseconds of the event date.
+
+    The date is in the local time of the log, the conversion of the seconds is
+    memoized as many events are logged within the same second.
+
+    Args:
+        date: Date of the event, e.g. 2024-03-17 06:16:24,123
+    """
+    return _epoch_seconds(date[:19]) * 1000 + int(date[20:23] or 0)
@@ -15,6 +15,9 @@ from reportportal_client import ReportPortalService
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 log = logging.getLogger(__name__)
 
+# Number of log messages sent per request to the multi-message endpoint
+LOG_BATCH_SIZE = 100
+
 
 class ReportPortalV1:
     """ReportPortal class to assist with RP API calls"""
@@ -41,6 +44,7 @@ class ReportPortalV1:
         self._project = project
         self._merge_launches = merge_launches
         self._launches = Launches(self)
+        self._session = None
 
     @property
     def rpuid(self):
@@ -196,6 +200,39 @@ class ReportPortalV1:
 
         return response
 
+    @property
+    def session(self):
+        """Keep-alive session shared by the batched API calls"""
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers["Authorization"] = "bearer {0}".format(self.api_token)
+            self._session.headers["Accept"] = "application/json"
+            self._session.verify = False
+
+        return self._session
+
+    def api_post_logs(self, log_entries):
+        """POST a batch of log entries to the multi-message endpoint
+
+        Args:
+            log_entries (list): Log entries as expected by the log API
+
+        Returns:
+            session response object
+        """
+        url = posixpath.join(self.endpoint, "api/v1/", self.project, "log")
+        log.debug("url: %s, %d entries", url, len(log_entries))
+
+        files = {
+            "json_request_part": (None, json.dumps(log_entries), "application/json")
+        }
+        response = self.session.post(url, files=files)
+
+        log.debug("r.status_code: %s", response.status_code)
+        log.debug("r.text: %s", response.text)
+
+        return response
+
     def api_post_zipfile(self, infile, outfile="/tmp/myresults.zip"):
         """POST a single zip file to the ReportPortal API"""
         with ZipFile(outfile, "w") as zipit:
@@ -438,6 +475,7 @@ class RpLog:
     ReportPortal works with the concept of "logging" results"""
 
     def __init__(self, rportal):
+        self.rportal = rportal
         self.service = rportal.service
 
     def add_attachment(self, test_item_id, filepath, level="INFO"):
@@ -497,6 +535,41 @@ class RpLog:
             time=msg_time, message=message, level=level, item_id=test_item_id
         )
 
+    def add_messages(self, messages, test_item_id=None, batch_size=LOG_BATCH_SIZE):
+        """Log the messages in ReportPortal using one request per batch
+
+        Args:
+            messages (list): Keyword arguments of add_message for every log
+            test_item_id (str): test item ID returned from RP
+            batch_size (int): Number of messages sent per request
+
+        The messages of a rejected batch are logged one by one.
+        """
+        launch_uuid = getattr(self.service, "launch_id", None)
+        for index in range(0, len(messages), batch_size):
+            batch = messages[index : index + batch_size]
+            entries = [
+                {
+                    "launchUuid": launch_uuid,
+                    "itemUuid": test_item_id,
+                    "time": _msg.get("msg_time") or str(int(time.time() * 1000)),
+                    "message": _msg["message"],
+                    "level": _msg.get("level", "INFO"),
+                }
+                for _msg in batch
+            ]
+
+            try:
+                response = self.rportal.api_post_logs(entries)
+                if response.ok:
+                    continue
+                log.debug("Batch of %d logs rejected: %s", len(batch), response.text)
+            except requests.RequestException as e:
+                log.debug("Batch of %d logs failed: %s", len(batch), e)
+
+            for _msg in batch:
+                self.add_message(test_item_id=test_item_id, **_msg)
+
     def truncate_message(self, msg_txt, tc_name, test_item_id, itempath, type):
         """Checks if the message to be logged is of a certain length. If it is greater than that
         then it truncates the message and logs it and then puts the remaining message as an attachment"
@@ -28,6 +28,7 @@ from jinja_markdown import MarkdownExtension
 from packaging.version import InvalidVersion, Version
 
 from cli.exceptions import ConfigError
+from utility.checksum_manifest import get_checksum_manifest
 from utility.log import Log
 
 log = Log(__name__)
@@ -665,16 +666,17 @@ def kernel_client_io(client, mounting_dir):
         log.error(e)
 
 
+def _client_md5(client):
+    """Return the MD5 sums of the files of the mount, ordered by file name."""
+    manifest = get_checksum_manifest(client, mounting_dir, maxdepth=1)
+    return [manifest[path].hash for path in sorted(manifest)]
+
+
 def fuse_client_md5(fuse_clients, md5sum_list1):
     try:
         log.info("Calculating MD5 sums of files in fuse-clients:")
         for client in fuse_clients:
-            md5sum_list1.append(
-                client.exec_command(
-                    cmd="sudo md5sum %s* | awk '{print $1}' " % (mounting_dir),
-                    long_running=True,
-                )
-            )
+            md5sum_list1.append(_client_md5(client))
 
     except Exception as e:
         log.error(e)
@@ -684,12 +686,7 @@ def kernel_client_md5(kernel_clients, md5sum_list2):
     try:
         log.info("Calculating MD5 sums of files in kernel-clients:")
         for client in kernel_clients:
-            md5sum_list2.append(
-                client.exec_command(
-                    cmd="sudo md5sum %s* | awk '{print $1}' " % (mounting_dir),
-                    long_running=True,
-                )
-            )
+            md5sum_list2.append(_client_md5(client))
     except Exception as e:
         log.error(e)
 